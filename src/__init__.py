@@ -0,0 +1,5 @@
+"""
+Extracción, carga y análisis del histórico de la Fórmula 1.
+
+Desde la raíz del repositorio el paquete se importa como `src`; instalado con `pip install .`, como `proyecto5`.
+"""
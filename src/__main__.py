@@ -0,0 +1,219 @@
+"""
+Punto de entrada de línea de comandos del proyecto.
+
+Uso:
+    python -m src extract historicos --salida datos/output
+    python -m src extract historicos --bbdd proyecto5
+    python -m src dump --entrada f1db_csv --salida ergast.db
+    python -m src extract historicos --local ergast.db --salida datos/output
+    python -m src extract escuderias --salida datos/output
+    python -m src extract audiencia --modo http
+    python -m src load --entrada datos/output --bbdd proyecto5
+    python -m src refresh --bbdd proyecto5
+    python -m src bench --salida bench.csv --referencia bench_main.csv
+
+Una vez instalado el paquete (`pip install .`), el mismo programa está disponible como `proyecto5`.
+
+Este módulo solo importa la biblioteca estándar. Cada subcomando importa los módulos que necesita al ejecutarse, de modo
+que `proyecto5 --help` arranca en milisegundos y, por ejemplo, `extract historicos` no necesita tener instalados
+selenium ni bs4.
+"""
+import argparse
+import sys
+import time
+
+PILOTOS = ["michael_schumacher", "hamilton", "vettel", "prost", "senna", "max_verstappen", "alonso"]
+PILOTOS_HISTORICOS = ["Michael Schumacher", "Lewis Hamilton", "Sebastian Vettel", "Alain Prost", "Ayrton Senna", "Max Verstappen", "Fernando Alonso"]
+URL_CONSTRUCTORES = "https://en.wikipedia.org/wiki/List_of_Formula_One_constructors"
+DATASETS_TABLAS = {
+    "escuderias_historicas": "listado_escuderias_historicas",
+    "equipos_presente": "escuderias_presente",
+    "datos_historicos": "historico_total_escuderias",
+    "mejores_pilotos": "historico_mejores_pilotos"
+}
+
+
+def main(argv=None):
+    """
+    Ejecuta el subcomando indicado en `argv` (por defecto, los argumentos del proceso).
+
+    Retorna:
+    - int: Código de salida (0 si todo fue bien).
+    """
+    parser = _crear_parser()
+    argumentos = parser.parse_args(argv)
+    if argumentos.comando is None:
+        parser.print_help()
+        return 2
+
+    inicio = time.perf_counter()
+    codigo = argumentos.funcion(argumentos)
+    if argumentos.metricas:
+        _exportar_metricas(argumentos.metricas)
+    print(f"{argumentos.comando} terminado en {time.perf_counter() - inicio:.2f} s")
+    return codigo
+
+
+def _crear_parser():
+    parser = argparse.ArgumentParser(prog="proyecto5", description="Extracción, carga y benchmarks del histórico de Fórmula 1.")
+    parser.add_argument("--metricas", help="Fichero en el que exportar las métricas al terminar (.prom para Prometheus, JSON en otro caso).")
+    subparsers = parser.add_subparsers(dest="comando")
+
+    extract = subparsers.add_parser("extract", help="Descarga datos de Ergast, Wikipedia o Liberty Media.")
+    extract.add_argument("fuente", choices=["historicos", "escuderias", "audiencia"])
+    extract.add_argument("--salida", default="datos/output", help="Carpeta en la que guardar los datasets. Por defecto datos/output.")
+    extract.add_argument("--formato", choices=["parquet", "csv"], default="parquet")
+    extract.add_argument("--cache", help="Carpeta de la caché HTTP en disco (CacheRespuestas).")
+    extract.add_argument("--concurrencia", type=int, default=8, help="Peticiones simultáneas. Por defecto 8.")
+    extract.add_argument("--pilotos", nargs="+", default=PILOTOS, help="Identificadores de Ergast de los pilotos (historicos).")
+    extract.add_argument("--nombres", nargs="+", default=PILOTOS_HISTORICOS, help="Nombres completos de los pilotos (historicos).")
+    extract.add_argument("--bbdd", help="(historicos) Cargar en flujo en esta base de datos en lugar de guardar el dataset.")
+    extract.add_argument("--diario", help="(historicos) Carpeta del diario de extracción con el que reanudar una ejecución interrumpida.")
+    extract.add_argument("--local", help="(historicos) Calcular desde el volcado de Ergast importado con `dump` (fichero SQLite), sin red.")
+    extract.add_argument("--modo", choices=["http", "navegador"], default="http", help="(audiencia) Cómo descargar los comunicados.")
+    extract.set_defaults(funcion=_extraer)
+
+    dump = subparsers.add_parser("dump", help="Importa el volcado CSV de Ergast en una base de datos SQLite local.")
+    dump.add_argument("--entrada", required=True, help="Carpeta con los CSV del volcado (races.csv, results.csv...).")
+    dump.add_argument("--salida", default="ergast.db", help="Fichero SQLite. Por defecto ergast.db.")
+    dump.set_defaults(funcion=_importar_dump)
+
+    load = subparsers.add_parser("load", help="Carga en PostgreSQL los datasets guardados y los antecedentes de los equipos.")
+    load.add_argument("--entrada", default="datos/output", help="Carpeta de los datasets. Por defecto datos/output.")
+    load.add_argument("--bbdd", default="proyecto5")
+    load.add_argument("--tablas", nargs="+", choices=list(DATASETS_TABLAS), default=list(DATASETS_TABLAS))
+    load.add_argument("--modo-commit", choices=["tabla", "atomico"], default="tabla")
+    load.add_argument("--crear", action="store_true", help="Crear la base de datos y las tablas si no existen.")
+    load.add_argument("--particionado", choices=["decada", "temporada"], help="(con --crear) Particionar mejores_pilotos por temporada.")
+    load.set_defaults(funcion=_cargar)
+
+    refresh = subparsers.add_parser("refresh", help="Refresca las vistas materializadas.")
+    refresh.add_argument("--bbdd", default="proyecto5")
+    refresh.add_argument("--bloqueante", action="store_true", help="Refrescar sin CONCURRENTLY.")
+    refresh.set_defaults(funcion=_refrescar)
+
+    bench = subparsers.add_parser("bench", help="Ejecuta los benchmarks sin red.")
+    bench.add_argument("--salida", help="CSV en el que guardar el informe.")
+    bench.add_argument("--referencia", help="Informe CSV de referencia con el que comparar.")
+    bench.add_argument("--tolerancia", type=float, default=0.2)
+    bench.add_argument("--omitir", nargs="+", choices=["historicos", "wikipedia", "insercion"], default=[])
+    bench.set_defaults(funcion=_medir)
+    return parser
+
+
+def _sesion(argumentos):
+    from .soporte_funciones_http import CacheRespuestas, crear_sesion
+
+    cache = CacheRespuestas(argumentos.cache) if argumentos.cache else None
+    return crear_sesion(max_conexiones=argumentos.concurrencia, cache=cache)
+
+
+def _extraer(argumentos):
+    from . import soporte_funciones_extraccion as sfe
+
+    if argumentos.fuente == "historicos" and argumentos.local:
+        return _extraer_local(argumentos)
+    if argumentos.fuente == "historicos" and argumentos.bbdd:
+        from .soporte_funciones_pipeline import ejecutar_pipeline_historicos
+
+        ejecutar_pipeline_historicos(argumentos.pilotos, argumentos.nombres, argumentos.bbdd, max_concurrencia=argumentos.concurrencia, sesion=_sesion(argumentos))
+        return 0
+
+    from . import soporte_funciones_almacenamiento as sfa
+
+    sesion = _sesion(argumentos)
+    if argumentos.fuente == "historicos":
+        diario = sfa.DiarioExtraccion(argumentos.diario) if argumentos.diario else None
+        df_historicos = sfe.obtener_historicos(argumentos.pilotos, max_concurrencia=argumentos.concurrencia, sesion=sesion, diario=diario)
+        df_historicos = sfe.formatear_datos_historicos(df_historicos, argumentos.nombres)
+        print(sfa.guardar_dataset(df_historicos, "historico_mejores_pilotos", argumentos.salida, argumentos.formato))
+    elif argumentos.fuente == "escuderias":
+        df_historicas, df_presente, _ = sfe.obtener_equipos_wikipedia(URL_CONSTRUCTORES, sesion=sesion)
+        df_listado = df_historicas[["nombre", "nacionalidad", "duracion"]].reset_index().rename(columns={"index": "id"})
+        print(sfa.guardar_dataset(df_listado, "listado_escuderias_historicas", argumentos.salida, argumentos.formato))
+        print(sfa.guardar_dataset(df_historicas, "historico_total_escuderias", argumentos.salida, argumentos.formato))
+        print(sfa.guardar_dataset(df_presente, "escuderias_presente", argumentos.salida, argumentos.formato))
+    else:
+        df_audiencia = sfe.obtener_datos_audiencia_liberty_media(modo=argumentos.modo, max_concurrencia=argumentos.concurrencia, sesion=sesion)
+        ruta = f"{argumentos.salida}/audiencia_liberty_media.csv"
+        df_audiencia.to_csv(ruta, index=False)
+        print(ruta)
+    return 0
+
+
+def _extraer_local(argumentos):
+    from . import soporte_funciones_almacenamiento as sfa
+    from . import soporte_funciones_extraccion as sfe
+    from .soporte_funciones_ergast_local import obtener_historicos_local
+
+    df_historicos = sfe.formatear_datos_historicos(obtener_historicos_local(argumentos.pilotos, argumentos.local), argumentos.nombres)
+    if argumentos.bbdd:
+        from . import soporte_funciones_creacion_bbdd as sfcb
+
+        sfcb.cargar_tablas({"mejores_pilotos": df_historicos}, argumentos.bbdd)
+    else:
+        print(sfa.guardar_dataset(df_historicos, "historico_mejores_pilotos", argumentos.salida, argumentos.formato))
+    return 0
+
+
+def _importar_dump(argumentos):
+    from .soporte_funciones_ergast_local import importar_dump_ergast
+
+    for tabla, filas in importar_dump_ergast(argumentos.entrada, argumentos.salida).items():
+        print(f"{tabla}: {filas} filas")
+    return 0
+
+
+def _cargar(argumentos):
+    from . import soporte_funciones_almacenamiento as sfa
+    from . import soporte_funciones_creacion_bbdd as sfcb
+
+    if argumentos.crear:
+        sfcb.crear_bbdd(argumentos.bbdd)
+        sfcb.crear_tablas(argumentos.bbdd, particionado=argumentos.particionado)
+    datos = {tabla: sfa.cargar_dataset(DATASETS_TABLAS[tabla], argumentos.entrada) for tabla in argumentos.tablas}
+    if {"escuderias_historicas", "equipos_presente"} <= datos.keys():
+        from .soporte_funciones_antecedentes import resolver_antecedentes
+
+        datos["equipos_antecedentes"] = resolver_antecedentes(datos["equipos_presente"], datos["escuderias_historicas"])
+    sfcb.cargar_tablas(datos, argumentos.bbdd, modo_commit=argumentos.modo_commit)
+    return 0
+
+
+def _refrescar(argumentos):
+    from . import soporte_funciones_creacion_bbdd as sfcb
+
+    with sfcb.conexion(argumentos.bbdd) as conn:
+        vistas_refrescadas = sfcb.refrescar_vistas(conn, concurrente=not argumentos.bloqueante)
+    for nombre_vista, segundos in vistas_refrescadas.items():
+        print(f"{nombre_vista}: refrescada en {segundos:.2f} s")
+    return 0
+
+
+def _medir(argumentos):
+    import pandas as pd
+
+    from . import soporte_funciones_benchmark as sfb
+
+    activos = {nombre: nombre not in argumentos.omitir for nombre in ("historicos", "wikipedia", "insercion")}
+    df_informe = sfb.ejecutar_benchmarks(ruta_salida=argumentos.salida, **activos)
+    print(df_informe.to_string(index=False))
+    if argumentos.referencia:
+        df_comparacion = sfb.comparar_benchmarks(df_informe, pd.read_csv(argumentos.referencia), argumentos.tolerancia)
+        print(df_comparacion.to_string(index=False))
+        if df_comparacion["regresion"].any():
+            return 1
+    return 0
+
+
+def _exportar_metricas(ruta):
+    from .soporte_funciones_metricas import METRICAS
+
+    if ruta.endswith(".prom"):
+        METRICAS.exportar_prometheus(ruta)
+    else:
+        METRICAS.exportar_json(ruta)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
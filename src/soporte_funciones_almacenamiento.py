@@ -0,0 +1,434 @@
+import glob
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+ESQUEMAS = {
+    "historico_mejores_pilotos": {
+        "piloto": "category",
+        "temporada": "Int64",
+        "equipo": "category",
+        "puntos_totales_constructor": "float64",
+        "total_carreras": "Int64",
+        "victorias": "Int64",
+        "podios": "Int64",
+        "puntos": "float64",
+        "promedio_posicion_carrera": "float64",
+        "promedio_posicion_clasificacion": "float64",
+        "poles": "Int64",
+        "cantidad_dnf": "Int64",
+        "promedio_puntos": "float64",
+        "titulo": "boolean"
+    },
+    "historico_total_escuderias": {
+        "nombre": "string",
+        "nacionalidad": "category",
+        "duracion": "string",
+        "carreras_inscritas": "Int64",
+        "carreras_empezadas": "Int64",
+        "pilotos_totales": "Int64",
+        "total_inscripciones": "Int64",
+        "victorias": "Int64",
+        "puntos_totales": "float64",
+        "cantidad_poles": "Int64",
+        "vueltas_rapidas": "Int64",
+        "podios": "Int64",
+        "titulos_constructores": "Int64",
+        "titulos_pilotos": "Int64"
+    },
+    "listado_escuderias_historicas": {
+        "id": "Int64",
+        "nombre": "string",
+        "nacionalidad": "category",
+        "duracion": "string"
+    },
+    "escuderias_presente": {
+        "nombre": "string",
+        "motor": "category",
+        "nacionalidad": "category",
+        "base": "category",
+        "duracion": "string",
+        "carreras_ingresadas": "Int64",
+        "carreras_empezadas": "Int64",
+        "pilotos_totales": "Int64",
+        "total_inscripciones": "Int64",
+        "victorias": "Int64",
+        "puntos_totales": "float64",
+        "cantidad_poles": "Int64",
+        "vueltas_rapidas": "Int64",
+        "cantidad_podiums": "Int64",
+        "titulos_constructores": "Int64",
+        "titulos_pilotos": "Int64",
+        "anteriores_equipos": "string"
+    }
+}
+
+PATRON_NO_NUMERICO = re.compile(r"[^\d.\-]")
+PATRON_ANIOS = re.compile(r"(\d{4})\s*[–-]\s*(\d{4}|present)|(\d{4})")
+
+# Proporción máxima de valores distintos para que una columna de texto se guarde como categoría.
+UMBRAL_CATEGORIAS = 0.5
+
+
+def aplicar_esquema(df: pd.DataFrame, nombre_dataset, compactar=True):
+    """
+    Convierte las columnas de un DataFrame a los tipos declarados para su dataset en `ESQUEMAS`.
+
+    Parámetros:
+    - df (pd.DataFrame): DataFrame tal y como lo devuelven los scrapers o `pd.read_csv` (valores como texto o tipos inferidos).
+    - nombre_dataset (str): Nombre del dataset en `ESQUEMAS` (por ejemplo "historico_mejores_pilotos").
+    - compactar (bool, opcional): Si después del esquema se reducen los tipos con `compactar_tipos`. Por defecto es True.
+
+    Retorna:
+    - pd.DataFrame: Copia del DataFrame con los tipos del esquema. Si el dataset tiene columna "duracion", se añaden
+      "anio_inicio" y "anio_fin" con el primer y el último año de participación (`<NA>` en "anio_fin" si sigue en activo).
+
+    Notas:
+    - Las columnas numéricas se limpian de separadores de miles y otros caracteres antes de convertirse; los valores que no
+      se pueden convertir quedan como nulos.
+    - Las columnas del DataFrame que no están en el esquema se conservan sin cambios, salvo la reducción de tipos de
+      `compactar_tipos`.
+    """
+    esquema = ESQUEMAS[nombre_dataset]
+    df = df.copy()
+    for columna, tipo in esquema.items():
+        if columna in df.columns:
+            df[columna] = _convertir(df[columna], tipo)
+    if "duracion" in esquema and "duracion" in df.columns:
+        anios = df["duracion"].map(_rango_anios)
+        df["anio_inicio"] = pd.array([inicio for inicio, _ in anios], dtype="Int64")
+        df["anio_fin"] = pd.array([fin for _, fin in anios], dtype="Int64")
+    return compactar_tipos(df) if compactar else df
+
+
+def compactar_tipos(df: pd.DataFrame, umbral_categorias=UMBRAL_CATEGORIAS):
+    """
+    Reduce la memoria de un DataFrame eligiendo para cada columna el tipo más pequeño que conserva sus valores.
+
+    Parámetros:
+    - df (pd.DataFrame): DataFrame a compactar.
+    - umbral_categorias (float, opcional): Proporción máxima de valores distintos (entre 0 y 1) para convertir una columna
+      de texto en categoría. Por defecto es 0.5.
+
+    Retorna:
+    - pd.DataFrame: Copia del DataFrame con los tipos reducidos. Los valores no cambian.
+
+    Notas:
+    - Los enteros se reducen al menor tamaño en el que caben sus valores (`int8`, `int16` o `int32`), manteniendo los
+      nulos en los enteros que los admiten (`Int64` -> `Int8`...). Las operaciones entre dos columnas reducidas conservan
+      el tipo pequeño; las agregaciones (`sum`, `mean`) ya devuelven enteros de 64 bits o decimales.
+    - Las columnas de texto que repiten valores (pilotos, equipos, nacionalidades, motores...) pasan a `category`, que
+      guarda cada valor distinto una sola vez.
+    - Las columnas de objetos con solo `True`, `False` y nulos pasan a `boolean`.
+    - Los decimales se mantienen en `float64`: reducirlos a `float32` cambiaría los valores redondeados que se cargan en
+      la base de datos.
+    """
+    df = df.copy()
+    for columna in df.columns:
+        df[columna] = _compactar_serie(df[columna], umbral_categorias)
+    return df
+
+
+def informe_memoria(df_antes: pd.DataFrame, df_despues: pd.DataFrame):
+    """
+    Compara la memoria que ocupa cada columna antes y después de compactar un DataFrame.
+
+    Parámetros:
+    - df_antes (pd.DataFrame): DataFrame original (por ejemplo, el de `pd.read_csv`).
+    - df_despues (pd.DataFrame): El mismo DataFrame con los tipos reducidos (por ejemplo, el de `cargar_dataset`).
+
+    Retorna:
+    - pd.DataFrame: Una fila por columna con "tipo_antes", "tipo_despues", "bytes_antes", "bytes_despues" y "reduccion"
+      (fracción de memoria ahorrada), más una fila final "total" con el DataFrame completo.
+
+    Notas:
+    - La memoria se mide con `memory_usage(deep=True)`, que incluye el tamaño real de los textos.
+    - Las columnas que solo existen en uno de los dos DataFrames (por ejemplo "anio_inicio", que añade `aplicar_esquema`)
+      aparecen con 0 bytes y sin tipo en el otro.
+    """
+    columnas = list(dict.fromkeys([*df_antes.columns, *df_despues.columns]))
+    df_informe = pd.DataFrame({
+        "tipo_antes": df_antes.dtypes.astype(str).reindex(columnas),
+        "tipo_despues": df_despues.dtypes.astype(str).reindex(columnas),
+        "bytes_antes": df_antes.memory_usage(deep=True, index=False).reindex(columnas, fill_value=0),
+        "bytes_despues": df_despues.memory_usage(deep=True, index=False).reindex(columnas, fill_value=0)
+    }, index=columnas)
+    df_informe.loc["total"] = [None, None, df_informe["bytes_antes"].sum(), df_informe["bytes_despues"].sum()]
+    df_informe[["bytes_antes", "bytes_despues"]] = df_informe[["bytes_antes", "bytes_despues"]].astype("int64")
+    bytes_antes = df_informe["bytes_antes"].where(df_informe["bytes_antes"] > 0)
+    df_informe["reduccion"] = (1 - df_informe["bytes_despues"] / bytes_antes).round(3)
+    return df_informe.rename_axis("columna").reset_index()
+
+
+def guardar_dataset(df: pd.DataFrame, nombre_dataset, directorio, formato="parquet"):
+    """
+    Aplica el esquema del dataset y lo guarda en disco.
+
+    Parámetros:
+    - df (pd.DataFrame): Datos a guardar.
+    - nombre_dataset (str): Nombre del dataset en `ESQUEMAS`; también es el nombre del fichero.
+    - directorio (str): Carpeta de destino (por ejemplo "../datos/output").
+    - formato (str, opcional): "parquet" o "csv". Por defecto es "parquet".
+
+    Retorna:
+    - str: Ruta del fichero guardado.
+
+    Notas:
+    - Parquet conserva los tipos del esquema (enteros con nulos, categorías), por lo que al leerlo no hay que volver a
+      inferirlos. Requiere `pyarrow`.
+    - El formato "csv" mantiene el fichero con índice que usaban los notebooks.
+    """
+    df = aplicar_esquema(df, nombre_dataset)
+    if formato == "parquet":
+        ruta = os.path.join(directorio, f"{nombre_dataset}.parquet")
+        df.to_parquet(ruta, engine="pyarrow", index=False)
+    elif formato == "csv":
+        ruta = os.path.join(directorio, f"{nombre_dataset}.csv")
+        df.to_csv(ruta)
+    else:
+        raise ValueError(f"Formato no soportado: {formato}")
+    return ruta
+
+
+def cargar_dataset(nombre_dataset, directorio, columnas=None):
+    """
+    Carga un dataset guardado con `guardar_dataset`, con los tipos de su esquema.
+
+    Parámetros:
+    - nombre_dataset (str): Nombre del dataset en `ESQUEMAS`.
+    - directorio (str): Carpeta donde está guardado.
+    - columnas (list, opcional): Columnas a leer. En Parquet solo se leen del disco esas columnas. Por defecto se leen todas.
+
+    Retorna:
+    - pd.DataFrame: Datos con los tipos del esquema.
+
+    Notas:
+    - Si no existe el fichero Parquet se lee el CSV del mismo nombre y se le aplica el esquema.
+    """
+    ruta_parquet = os.path.join(directorio, f"{nombre_dataset}.parquet")
+    if os.path.exists(ruta_parquet):
+        return pd.read_parquet(ruta_parquet, engine="pyarrow", columns=columnas)
+
+    df = aplicar_esquema(pd.read_csv(os.path.join(directorio, f"{nombre_dataset}.csv"), index_col=0), nombre_dataset)
+    return df[columnas] if columnas is not None else df
+
+
+class DiarioExtraccion:
+    """
+    Diario en disco, de solo añadir, de los registros (piloto, temporada) ya extraídos.
+
+    Parámetros:
+    - directorio (str): Carpeta del diario. Se crea si no existe; si ya tiene registros, se continúa a partir de ellos.
+    - registros_por_fichero (int, opcional): Registros de cada fichero de volcado antes de empezar el siguiente. Por
+      defecto es 1000.
+
+    Notas:
+    - Los registros se guardan como líneas JSON en ficheros `parte_00000.jsonl`, `parte_00001.jsonl`, ... Los ficheros
+      ya escritos no se modifican nunca: solo se añaden líneas al último.
+    - Cada llamada a `anadir` escribe y vacía el búfer antes de volver, así que si el proceso termina de forma abrupta
+      solo se pierden los registros que aún no se habían añadido. Una línea a medio escribir se ignora al leer.
+    - Si un mismo (piloto, temporada) aparece varias veces (por ejemplo, una temporada abierta descargada de nuevo), al
+      leer se queda el último.
+    - Se usa con `obtener_historicos(..., diario=DiarioExtraccion(ruta))`.
+    """
+
+    def __init__(self, directorio, registros_por_fichero=1000):
+        self.directorio = directorio
+        self.registros_por_fichero = registros_por_fichero
+        self._bloqueo = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+        ficheros = self._ficheros()
+        self._numero_fichero = int(os.path.basename(ficheros[-1])[6:11]) if ficheros else 0
+        self._registros_fichero = sum(1 for _ in self._leer_fichero(ficheros[-1])) if ficheros else 0
+        # Si el último fichero acaba en una línea a medio escribir, se sigue en uno nuevo para no pegarle la siguiente.
+        if ficheros and not self._termina_en_linea_completa(ficheros[-1]):
+            self._numero_fichero += 1
+            self._registros_fichero = 0
+
+    def completadas(self):
+        """
+        Devuelve los (piloto, temporada) que ya están en el diario.
+
+        Retorna:
+        - set: Tuplas (piloto, temporada) con la temporada como entero.
+        """
+        return {(registro["piloto"], int(registro["temporada"])) for registro in self.iterar()}
+
+    def anadir(self, registros):
+        """
+        Añade registros al diario.
+
+        Parámetros:
+        - registros (iterable): Diccionarios con al menos las claves "piloto" y "temporada".
+
+        Retorna:
+        - int: Número de registros añadidos.
+        """
+        anadidos = 0
+        with self._bloqueo:
+            f = None
+            try:
+                for registro in registros:
+                    if self._registros_fichero >= self.registros_por_fichero:
+                        self._numero_fichero += 1
+                        self._registros_fichero = 0
+                        if f is not None:
+                            f.close()
+                            f = None
+                    if f is None:
+                        f = open(self._ruta(self._numero_fichero), "a", encoding="utf-8")
+                    f.write(json.dumps(registro, ensure_ascii=False, default=_valor_json) + "\n")
+                    self._registros_fichero += 1
+                    anadidos += 1
+            finally:
+                if f is not None:
+                    f.close()
+        return anadidos
+
+    def iterar(self):
+        """
+        Genera los registros del diario en el orden en que se añadieron, leyendo los ficheros uno a uno.
+
+        Retorna:
+        - generator: Diccionarios con los registros.
+        """
+        for ruta in self._ficheros():
+            yield from self._leer_fichero(ruta)
+
+    def leer(self, columnas=None):
+        """
+        Reúne en un DataFrame los registros del diario.
+
+        Parámetros:
+        - columnas (list, opcional): Columnas del resultado, en su orden. Por defecto, las de los registros.
+
+        Retorna:
+        - pd.DataFrame: Un registro por (piloto, temporada), el último añadido si hay varios.
+        """
+        partes = [pd.DataFrame(list(self._leer_fichero(ruta)), columns=columnas) for ruta in self._ficheros()]
+        partes = [parte for parte in partes if not parte.empty]
+        if not partes:
+            return pd.DataFrame(columns=columnas)
+        df = pd.concat(partes, ignore_index=True)
+        return df.drop_duplicates(["piloto", "temporada"], keep="last").reset_index(drop=True)
+
+    def limpiar(self):
+        """
+        Elimina todos los ficheros del diario.
+        """
+        with self._bloqueo:
+            for ruta in self._ficheros():
+                os.remove(ruta)
+            self._numero_fichero = 0
+            self._registros_fichero = 0
+
+    def __len__(self):
+        return sum(1 for _ in self.iterar())
+
+    def _ruta(self, numero):
+        return os.path.join(self.directorio, f"parte_{numero:05d}.jsonl")
+
+    def _ficheros(self):
+        return sorted(glob.glob(os.path.join(self.directorio, "parte_*.jsonl")))
+
+    @staticmethod
+    def _termina_en_linea_completa(ruta):
+        with open(ruta, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def _leer_fichero(ruta):
+        with open(ruta, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    yield json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+
+
+def _valor_json(valor):
+    """
+    Convierte a tipos de Python los valores de NumPy y pandas que `json` no sabe serializar.
+    """
+    if pd.isna(valor):
+        return None
+    if hasattr(valor, "item"):
+        return valor.item()
+    return str(valor)
+
+
+def _convertir(serie: pd.Series, tipo):
+    if tipo in ("Int64", "float64"):
+        if not pd.api.types.is_numeric_dtype(serie):
+            serie = pd.to_numeric(serie.astype("string").str.replace(PATRON_NO_NUMERICO, "", regex=True).replace("", pd.NA), errors="coerce")
+        if tipo == "Int64":
+            return serie.round().astype("Int64")
+        return serie.astype("float64")
+    if tipo == "boolean":
+        if not pd.api.types.is_bool_dtype(serie):
+            serie = serie.map({True: True, False: False, "True": True, "False": False}, na_action="ignore")
+        return serie.astype("boolean")
+    if tipo == "category":
+        return serie.astype("category")
+    return serie.astype(tipo)
+
+
+def _compactar_serie(serie: pd.Series, umbral_categorias):
+    if isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(serie):
+        return serie
+    if pd.api.types.is_integer_dtype(serie):
+        if serie.isna().all():
+            return serie
+        admite_nulos = isinstance(serie.dtype, pd.api.extensions.ExtensionDtype)
+        minimo, maximo = serie.min(), serie.max()
+        for bits in (8, 16, 32):
+            limites = np.iinfo(f"int{bits}")
+            if limites.min <= minimo and maximo <= limites.max:
+                return serie.astype(f"Int{bits}" if admite_nulos else f"int{bits}")
+        return serie
+    if pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+        valores = serie.dropna()
+        if valores.empty:
+            return serie
+        if pd.api.types.is_object_dtype(serie) and valores.map(type).eq(bool).all():
+            return serie.astype("boolean")
+        try:
+            distintos = valores.nunique()
+        except TypeError:
+            return serie
+        if distintos <= umbral_categorias * len(serie):
+            return serie.astype("category")
+    return serie
+
+
+def _rango_anios(duracion):
+    """
+    Obtiene el primer y el último año de una cadena de duración como "1959–1960,2021–present".
+
+    Retorna:
+    - tuple: (primer_año, último_año); el último es `None` si el equipo sigue en activo ("present").
+    """
+    if pd.isna(duracion):
+        return None, None
+    inicios = []
+    finales = []
+    for inicio, fin, unico in PATRON_ANIOS.findall(str(duracion)):
+        if unico:
+            inicios.append(int(unico))
+            finales.append(int(unico))
+        else:
+            inicios.append(int(inicio))
+            finales.append(None if fin == "present" else int(fin))
+    if not inicios:
+        return None, None
+    if None in finales:
+        return min(inicios), None
+    return min(inicios), max(finales)
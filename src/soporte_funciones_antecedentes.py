@@ -0,0 +1,168 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher, get_close_matches
+
+import pandas as pd
+
+from .soporte_funciones_almacenamiento import _rango_anios
+
+PATRON_ANTECEDENTE = re.compile(r"\s*([^,()]+?)\s*\(([^)]*)\)")
+PATRON_NO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+PATRON_SOLO_ANIOS = re.compile(r"^[\d\s,–\-]*(present)?[\d\s,–\-]*$")
+
+# Prioridad de cada tipo de clave del índice: ante varias escuderías con la misma clave gana la de menor prioridad.
+PRIORIDADES_CLAVES = {"completa": 0, "nombre": 1, "alias": 2, "siglas": 3}
+UMBRAL_SIMILITUD = 0.8
+
+
+def resolver_antecedentes(df_presente: pd.DataFrame, df_historicas: pd.DataFrame, umbral=UMBRAL_SIMILITUD):
+    """
+    Relaciona cada equipo presente con las escuderías históricas de las que procede, a partir de su columna "anteriores_equipos".
+
+    Parámetros:
+    - df_presente (pd.DataFrame): Equipos presentes, con las columnas "nombre" y "anteriores_equipos" (por ejemplo
+      "Toleman(1981–1985),Benetton(1986–2001),Renault(2002–2011, 2016–2020),Lotus(2012–2015)").
+    - df_historicas (pd.DataFrame): Escuderías históricas, con las columnas "nombre" y "duracion" (por ejemplo el dataset
+      "listado_escuderias_historicas").
+    - umbral (float, opcional): Similitud mínima (entre 0 y 1) para aceptar una coincidencia aproximada. Por defecto es 0.8.
+
+    Retorna:
+    - pd.DataFrame: Una fila por antecedente con las columnas:
+        - "equipo_presente": Nombre del equipo presente.
+        - "antecedente": Antecedente tal y como aparece en "anteriores_equipos".
+        - "anio_inicio" y "anio_fin": Años del antecedente (`<NA>` en "anio_fin" si sigue en activo).
+        - "escuderia_historica": Nombre de la escudería histórica que le corresponde, o `None` si no se encuentra.
+        - "metodo": Cómo se ha encontrado: "completa", "nombre", "alias", "siglas", "aproximada" o `None`.
+        - "similitud": 1.0 en las coincidencias exactas, la similitud en las aproximadas.
+      Se carga en `equipos_antecedentes` con `insertar_datos` o `cargar_tablas`, que descartan las filas sin escudería.
+
+    Notas:
+    - Las cadenas se analizan una sola vez y todas las búsquedas se hacen con `merge` contra un índice de claves
+      normalizadas (minúsculas, sin acentos ni signos) de las escuderías históricas, en lugar de recorrer las escuderías
+      por cada antecedente. Cada escudería aparece en el índice con varias claves:
+        - "completa": el nombre tal cual, con su paréntesis (distingue "Lotus(1958–1994)" de "Lotus(2012–2015)").
+        - "nombre": el nombre sin el paréntesis.
+        - "alias": el contenido del paréntesis si no son años ("AGS" en "Automobiles Gonfaronnaises Sportives(AGS)").
+        - "siglas": las iniciales de los nombres de varias palabras ("BAR" para "British American Racing").
+    - Primero se busca el antecedente completo y después su nombre. Si varias escuderías comparten una clave, se elige la
+      de menor prioridad y, a igualdad, la que más años tiene en común con los del antecedente.
+    - Los nombres que siguen sin escudería se comparan con `difflib` contra las claves del índice (una vez por nombre
+      distinto, no por fila). También se acepta como aproximada una clave que empieza por el nombre completo del
+      antecedente ("Brawn" -> "Brawn GP").
+    - Los textos sin paréntesis, como "Sin equipos antecedentes", no generan filas.
+    """
+    df_antecedentes = _analizar_antecedentes(df_presente)
+    df_indice = _indice_escuderias(df_historicas)
+
+    coincidencias = df_antecedentes.merge(df_indice[df_indice["tipo"] == "completa"], left_on="clave_completa", right_on="clave")
+    resueltos = set(coincidencias["posicion"])
+
+    candidatos = df_antecedentes[~df_antecedentes["posicion"].isin(resueltos)].merge(
+        df_indice[df_indice["tipo"] != "completa"], left_on="clave_nombre", right_on="clave")
+    coincidencias = pd.concat([coincidencias, candidatos], ignore_index=True)
+    coincidencias["comunes"] = _anios_comunes(coincidencias)
+    coincidencias["prioridad"] = coincidencias["tipo"].map(PRIORIDADES_CLAVES)
+    coincidencias = coincidencias.sort_values(["posicion", "prioridad", "comunes"], ascending=[True, True, False]).drop_duplicates("posicion")
+    coincidencias["similitud"] = 1.0
+
+    pendientes = df_antecedentes[~df_antecedentes["posicion"].isin(coincidencias["posicion"])]
+    aproximadas = _coincidencias_aproximadas(pendientes, df_indice, umbral)
+
+    # Se omiten las tablas vacías al concatenar: pandas dejará de ignorarlas al deducir los tipos de las columnas.
+    encontradas = [df for df in (coincidencias[["posicion", "escuderia_historica", "tipo", "similitud"]], aproximadas) if not df.empty]
+    df_resultado = df_antecedentes.merge(
+        pd.concat(encontradas, ignore_index=True) if encontradas else aproximadas, on="posicion", how="left")
+    df_resultado = df_resultado.rename(columns={"tipo": "metodo"}).sort_values("posicion")
+    df_resultado = df_resultado.astype({"escuderia_historica": object, "metodo": object})
+    df_resultado = df_resultado.where(df_resultado.notna(), None)
+    return df_resultado[["equipo_presente", "antecedente", "anio_inicio", "anio_fin", "escuderia_historica", "metodo", "similitud"]].reset_index(drop=True)
+
+
+def normalizar_nombre(nombre):
+    """
+    Normaliza un nombre de escudería para compararlo: minúsculas, sin acentos y con los signos sustituidos por espacios.
+    """
+    texto = unicodedata.normalize("NFKD", str(nombre)).encode("ascii", "ignore").decode("ascii").lower()
+    return PATRON_NO_ALFANUMERICO.sub(" ", texto).strip()
+
+
+def _analizar_antecedentes(df_presente):
+    """
+    Separa la columna "anteriores_equipos" en una fila por antecedente, con sus claves normalizadas y sus años.
+    """
+    filas = []
+    for equipo, anteriores in zip(df_presente["nombre"], df_presente["anteriores_equipos"]):
+        if pd.isna(anteriores):
+            continue
+        for nombre, anios in PATRON_ANTECEDENTE.findall(str(anteriores)):
+            inicio, fin = _rango_anios(anios)
+            filas.append((equipo, f"{nombre}({anios})", normalizar_nombre(f"{nombre}({anios})"), normalizar_nombre(nombre), inicio, fin))
+
+    df_antecedentes = pd.DataFrame(filas, columns=["equipo_presente", "antecedente", "clave_completa", "clave_nombre", "anio_inicio", "anio_fin"])
+    df_antecedentes["anio_inicio"] = df_antecedentes["anio_inicio"].astype("Int64")
+    df_antecedentes["anio_fin"] = df_antecedentes["anio_fin"].astype("Int64")
+    df_antecedentes["posicion"] = range(len(df_antecedentes))
+    return df_antecedentes
+
+
+def _indice_escuderias(df_historicas):
+    """
+    Construye el índice de claves normalizadas de las escuderías históricas.
+
+    Retorna:
+    - pd.DataFrame: Una fila por (clave, escudería) con "clave", "tipo", "escuderia_historica", "inicio" y "fin" (años de
+      participación de la escudería, `<NA>` en "fin" si sigue en activo).
+    """
+    filas = []
+    for nombre, duracion in zip(df_historicas["nombre"], df_historicas["duracion"]):
+        inicio, fin = _rango_anios(duracion)
+        base, _, resto = str(nombre).partition("(")
+        alias = resto.rstrip(")").strip()
+        palabras = normalizar_nombre(base).split()
+        claves = {"completa": normalizar_nombre(nombre), "nombre": normalizar_nombre(base)}
+        if alias and not PATRON_SOLO_ANIOS.match(alias):
+            claves["alias"] = normalizar_nombre(alias)
+        if len(palabras) > 1:
+            claves["siglas"] = "".join(palabra[0] for palabra in palabras)
+        filas.extend((clave, tipo, nombre, inicio, fin) for tipo, clave in claves.items() if clave)
+
+    df_indice = pd.DataFrame(filas, columns=["clave", "tipo", "escuderia_historica", "inicio", "fin"])
+    df_indice["inicio"] = df_indice["inicio"].astype("Int64")
+    df_indice["fin"] = df_indice["fin"].astype("Int64")
+    return df_indice
+
+
+def _anios_comunes(coincidencias):
+    """
+    Calcula, para cada par (antecedente, escudería), el número de años que tienen en común sus periodos.
+    """
+    if coincidencias.empty:
+        return pd.Series(dtype="Int64")
+    anio_actual = pd.Timestamp.now().year
+    fin = pd.concat([coincidencias["anio_fin"].fillna(anio_actual), coincidencias["fin"].fillna(anio_actual)], axis=1).min(axis=1)
+    inicio = pd.concat([coincidencias["anio_inicio"], coincidencias["inicio"]], axis=1).max(axis=1)
+    return (fin - inicio + 1).clip(lower=0).fillna(0)
+
+
+def _coincidencias_aproximadas(pendientes, df_indice, umbral):
+    """
+    Busca una escudería para los nombres de antecedente que no tienen coincidencia exacta.
+
+    Retorna:
+    - pd.DataFrame: Columnas "posicion", "escuderia_historica", "tipo" ("aproximada") y "similitud".
+    """
+    claves = df_indice.drop_duplicates("clave").set_index("clave")["escuderia_historica"]
+    elegidas = {}
+    for clave_nombre in pendientes["clave_nombre"].unique():
+        prefijos = [clave for clave in claves.index if clave.startswith(clave_nombre + " ")]
+        cercanas = prefijos[:1] or get_close_matches(clave_nombre, claves.index, n=1, cutoff=umbral)
+        if cercanas:
+            elegidas[clave_nombre] = (claves[cercanas[0]], SequenceMatcher(None, clave_nombre, cercanas[0]).ratio())
+
+    filas = [
+        (posicion, *elegidas[clave_nombre]) for posicion, clave_nombre in zip(pendientes["posicion"], pendientes["clave_nombre"])
+        if clave_nombre in elegidas
+    ]
+    df_aproximadas = pd.DataFrame(filas, columns=["posicion", "escuderia_historica", "similitud"])
+    df_aproximadas.insert(2, "tipo", "aproximada")
+    return df_aproximadas
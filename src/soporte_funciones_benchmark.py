@@ -0,0 +1,705 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+from requests.adapters import HTTPAdapter
+
+from . import soporte_funciones_extraccion as sfe
+from .soporte_funciones_ergast_local import importar_dump_ergast, obtener_historicos_local
+from .soporte_funciones_http import crear_sesion
+
+URL_WIKIPEDIA_CONSTRUCTORES = "https://en.wikipedia.org/wiki/List_of_Formula_One_constructors"
+CABECERA_HOST_ORIGINAL = "X-Fixture-Host"
+EQUIPOS_FICTICIOS = ["McLaren", "Ferrari", "Red Bull", "Mercedes", "Williams", "Alpine F1 Team", "Aston Martin", "Haas F1 Team", "Sauber", "RB F1 Team"]
+
+
+class ServidorFixtures:
+    """
+    Servidor HTTP local que sustituye a la API de Ergast y a Wikipedia respondiendo con respuestas grabadas o generadas.
+
+    Parámetros:
+    - latencia (float, opcional): Segundos que tarda el servidor en responder cada petición. Por defecto es 0.
+    - variacion_latencia (float, opcional): Segundos aleatorios (entre 0 y este valor) que se suman a `latencia`. Por defecto es 0.
+
+    Atributos:
+    - peticiones (int): Peticiones atendidas.
+    - no_encontradas (list): URLs pedidas que no tenían fixture (responden 404).
+
+    Notas:
+    - Las fixtures se indexan por host original, ruta y parámetros de la query (ordenados), de modo que una misma URL de
+      Ergast o Wikipedia se responde igual que en la grabación.
+    - Las sesiones creadas con `crear_sesion` redirigen a este servidor las URLs originales (`https://ergast.com/...`) sin
+      cambiar el código de extracción: las peticiones pasan por sockets reales y por la pila completa de `requests`.
+    - Se usa como gestor de contexto (`with ServidorFixtures() as servidor:`), que lo arranca en un hilo y lo detiene al salir.
+    """
+
+    def __init__(self, latencia=0.0, variacion_latencia=0.0):
+        self.latencia = latencia
+        self.variacion_latencia = variacion_latencia
+        self.peticiones = 0
+        self.no_encontradas = []
+        self._fixtures = {}
+        self._bloqueo = threading.Lock()
+        self._servidor = None
+        self._hilo = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *excepcion):
+        self.detener()
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self):
+        """
+        Arranca el servidor en un puerto libre de `127.0.0.1`, en un hilo en segundo plano.
+        """
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), _manejador(self))
+        self._servidor.daemon_threads = True
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """
+        Detiene el servidor y libera el puerto.
+        """
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    def anadir(self, url, contenido, content_type="application/json", status_code=200):
+        """
+        Registra la respuesta de una URL.
+
+        Parámetros:
+        - url (str): URL original, incluidos los parámetros de la query (por ejemplo "https://ergast.com/api/f1/2020/results.json?limit=1000&offset=0").
+        - contenido (bytes, str o dict): Cuerpo de la respuesta. Los diccionarios se serializan como JSON.
+        - content_type (str, opcional): Cabecera `Content-Type` de la respuesta. Por defecto es "application/json".
+        - status_code (int, opcional): Código HTTP de la respuesta. Por defecto es 200.
+        """
+        if isinstance(contenido, dict):
+            contenido = json.dumps(contenido)
+        if isinstance(contenido, str):
+            contenido = contenido.encode("utf-8")
+        partes = urlsplit(url)
+        self._fixtures[_clave_fixture(partes.netloc, partes.path, partes.query)] = (status_code, content_type, contenido)
+
+    def cargar_grabacion(self, directorio):
+        """
+        Registra como fixtures las respuestas guardadas por una `CacheRespuestas`.
+
+        Parámetros:
+        - directorio (str): Carpeta de la caché (por ejemplo "../datos/cache/http") tras una extracción real.
+
+        Retorna:
+        - int: Número de respuestas registradas.
+
+        Notas:
+        - Así, cualquier ejecución real con caché sirve de grabación para reproducirla después sin red.
+        """
+        registradas = 0
+        for carpeta, _, ficheros in os.walk(directorio):
+            for fichero in ficheros:
+                if not fichero.endswith(".json"):
+                    continue
+                ruta_meta = os.path.join(carpeta, fichero)
+                with open(ruta_meta, encoding="utf-8") as f:
+                    meta = json.load(f)
+                with open(ruta_meta[:-len(".json")] + ".body", "rb") as f:
+                    contenido = f.read()
+                self.anadir(meta["url"], contenido, meta["headers"].get("Content-Type", "application/json"), meta["status_code"])
+                registradas += 1
+        return registradas
+
+    def crear_sesion(self, max_conexiones=10):
+        """
+        Crea una sesión HTTP que envía a este servidor todas las peticiones, sin caché, sin limitador de ritmo y sin reintentos.
+
+        Parámetros:
+        - max_conexiones (int, opcional): Tamaño del pool de conexiones. Por defecto es 10.
+
+        Retorna:
+        - SesionHTTP: Sesión que se puede pasar a cualquier función de extracción.
+        """
+        sesion = crear_sesion(max_conexiones=max_conexiones, peticiones_por_segundo=None, reintentos=0)
+        adaptador = _AdaptadorRedireccion(self, pool_connections=max_conexiones, pool_maxsize=max_conexiones)
+        sesion.mount("http://", adaptador)
+        sesion.mount("https://", adaptador)
+        return sesion
+
+    def _responder(self, host, ruta):
+        partes = urlsplit(ruta)
+        with self._bloqueo:
+            self.peticiones += 1
+        espera = self.latencia + random.uniform(0, self.variacion_latencia)
+        if espera > 0:
+            time.sleep(espera)
+        respuesta = self._fixtures.get(_clave_fixture(host, partes.path, partes.query))
+        if respuesta is None:
+            with self._bloqueo:
+                self.no_encontradas.append(f"{host}{ruta}")
+            return 404, "text/plain", b""
+        return respuesta
+
+
+class _AdaptadorRedireccion(HTTPAdapter):
+    def __init__(self, servidor, **kwargs):
+        self.servidor = servidor
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        partes = urlsplit(request.url)
+        request.headers[CABECERA_HOST_ORIGINAL] = partes.netloc
+        request.url = self.servidor.url + partes.path + (f"?{partes.query}" if partes.query else "")
+        return super().send(request, **kwargs)
+
+
+def _manejador(servidor):
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            host = self.headers.get(CABECERA_HOST_ORIGINAL, self.headers.get("Host", ""))
+            status_code, content_type, contenido = servidor._responder(host, self.path)
+            self.send_response(status_code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(contenido)))
+            self.end_headers()
+            self.wfile.write(contenido)
+
+        def log_message(self, *args):
+            pass
+
+    return Manejador
+
+
+def _clave_fixture(host, ruta, query):
+    return host, ruta, urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+
+def generar_fixtures_ergast(servidor, pilotos=10, temporadas=10, carreras=20, semilla=0):
+    """
+    Genera y registra en el servidor las respuestas de Ergast que usa `obtener_historicos` en sus dos modos.
+
+    Parámetros:
+    - servidor (ServidorFixtures): Servidor en el que registrar las fixtures.
+    - pilotos (int, opcional): Número de pilotos. Todos disputan todas las carreras de todas las temporadas. Por defecto es 10.
+    - temporadas (int, opcional): Número de temporadas, desde 2000. Por defecto es 10.
+    - carreras (int, opcional): Carreras por temporada. Por defecto es 20.
+    - semilla (int, opcional): Semilla de los resultados aleatorios, para que las fixtures sean reproducibles. Por defecto es 0.
+
+    Retorna:
+    - list: Identificadores de los pilotos generados, para pasarlos a `obtener_historicos`.
+
+    Notas:
+    - Se registran `/drivers/{piloto}/seasons.json`, `/{temporada}/drivers/{piloto}/results.json`, las páginas de
+      `/{temporada}/results.json` (de 1000 en 1000), `/{temporada}/driverStandings/1.json` y
+      `/{temporada}/constructorStandings.json`.
+    """
+    base = "https://ergast.com/api/f1"
+    ids_pilotos, temporadas_generadas = _generar_temporadas(pilotos, temporadas, carreras, semilla)
+    anios = list(temporadas_generadas)
+
+    for piloto in ids_pilotos:
+        servidor.anadir(f"{base}/drivers/{piloto}/seasons.json",
+                        {"MRData": {"SeasonTable": {"Seasons": [{"season": anio} for anio in anios]}}})
+
+    for anio, races in temporadas_generadas.items():
+        races_por_piloto = {piloto: [] for piloto in ids_pilotos}
+        for race in races:
+            for resultado in race["Results"]:
+                races_por_piloto[resultado["Driver"]["driverId"]].append({**race, "Results": [resultado]})
+        for piloto, races_piloto in races_por_piloto.items():
+            servidor.anadir(f"{base}/{anio}/drivers/{piloto}/results.json",
+                            {"MRData": {"total": str(len(races_piloto)), "RaceTable": {"Races": races_piloto}}})
+
+        resultados_planos = [(race, resultado) for race in races for resultado in race["Results"]]
+        for offset in range(0, max(1, len(resultados_planos)), 1000):
+            pagina = []
+            for race, resultado in resultados_planos[offset:offset + 1000]:
+                if pagina and pagina[-1]["round"] == race["round"]:
+                    pagina[-1]["Results"].append(resultado)
+                else:
+                    pagina.append({**race, "Results": [resultado]})
+            servidor.anadir(f"{base}/{anio}/results.json?limit=1000&offset={offset}",
+                            {"MRData": {"limit": "1000", "offset": str(offset), "total": str(len(resultados_planos)), "RaceTable": {"Races": pagina}}})
+
+        puntos_pilotos, puntos_equipos = _clasificaciones_temporada(races)
+        campeon = max(puntos_pilotos, key=puntos_pilotos.get)
+        servidor.anadir(f"{base}/{anio}/driverStandings/1.json",
+                        {"MRData": {"StandingsTable": {"StandingsLists": [{"DriverStandings": [{"Driver": {"driverId": campeon}}]}]}}})
+        servidor.anadir(f"{base}/{anio}/constructorStandings.json?limit=100",
+                        {"MRData": {"StandingsTable": {"StandingsLists": [{"ConstructorStandings": [
+                            {"points": str(puntos), "Constructor": {"constructorId": equipo.lower().replace(" ", "_"), "name": equipo}}
+                            for equipo, puntos in puntos_equipos.items()]}]}}})
+    return ids_pilotos
+
+
+def generar_dump_ergast(directorio, pilotos=10, temporadas=10, carreras=20, semilla=0):
+    """
+    Escribe un volcado CSV con el formato de Ergast con los mismos datos que `generar_fixtures_ergast`.
+
+    Parámetros:
+    - directorio (str): Carpeta en la que escribir los CSV. Se crea si no existe.
+    - pilotos, temporadas, carreras, semilla: Igual que en `generar_fixtures_ergast`; con los mismos valores se generan
+      los mismos resultados.
+
+    Retorna:
+    - list: Identificadores (`driverRef`) de los pilotos generados.
+
+    Notas:
+    - Se escriben `races.csv`, `results.csv`, `drivers.csv`, `constructors.csv`, `driver_standings.csv` y
+      `constructor_standings.csv`, con las columnas del volcado real y `\\N` como valor nulo. Las clasificaciones solo
+      se escriben tras la última carrera de cada temporada.
+    - Sirve para comparar `obtener_historicos_local` con `obtener_historicos` sobre los mismos datos.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    ids_pilotos, temporadas_generadas = _generar_temporadas(pilotos, temporadas, carreras, semilla)
+    numero_piloto = {piloto: i + 1 for i, piloto in enumerate(ids_pilotos)}
+    numero_equipo = {equipo: i + 1 for i, equipo in enumerate(EQUIPOS_FICTICIOS)}
+
+    races, results, driver_standings, constructor_standings = [], [], [], []
+    for anio, carreras_temporada in temporadas_generadas.items():
+        for race in carreras_temporada:
+            race_id = len(races) + 1
+            races.append((race_id, anio, race["round"], 1, f"Gran Premio {race['round']}", f"{anio}-01-01", "\\N", "\\N"))
+            for resultado in race["Results"]:
+                retirado = resultado["positionText"] == "R"
+                results.append((len(results) + 1, race_id, numero_piloto[resultado["Driver"]["driverId"]], numero_equipo[resultado["Constructor"]["name"]],
+                                "\\N", resultado["grid"], "\\N" if retirado else resultado["position"], resultado["positionText"], resultado["position"],
+                                resultado["points"], 0, "\\N", "\\N", "\\N", "\\N", "\\N", "\\N", 1))
+        puntos_pilotos, puntos_equipos = _clasificaciones_temporada(carreras_temporada)
+        for posicion, piloto in enumerate(sorted(puntos_pilotos, key=puntos_pilotos.get, reverse=True), 1):
+            driver_standings.append((len(driver_standings) + 1, len(races), numero_piloto[piloto], puntos_pilotos[piloto], posicion, posicion, 0))
+        for posicion, equipo in enumerate(sorted(puntos_equipos, key=puntos_equipos.get, reverse=True), 1):
+            constructor_standings.append((len(constructor_standings) + 1, len(races), numero_equipo[equipo], puntos_equipos[equipo], posicion, posicion, 0))
+
+    ficheros = {
+        "races.csv": (["raceId", "year", "round", "circuitId", "name", "date", "time", "url"], races),
+        "results.csv": (["resultId", "raceId", "driverId", "constructorId", "number", "grid", "position", "positionText", "positionOrder", "points",
+                         "laps", "time", "milliseconds", "fastestLap", "rank", "fastestLapTime", "fastestLapSpeed", "statusId"], results),
+        "drivers.csv": (["driverId", "driverRef", "number", "code", "forename", "surname", "dob", "nationality", "url"],
+                        [(numero, piloto, "\\N", "\\N", "Piloto", piloto, "1990-01-01", "Spanish", "") for piloto, numero in numero_piloto.items()]),
+        "constructors.csv": (["constructorId", "constructorRef", "name", "nationality", "url"],
+                             [(numero, equipo.lower().replace(" ", "_"), equipo, "British", "") for equipo, numero in numero_equipo.items()]),
+        "driver_standings.csv": (["driverStandingsId", "raceId", "driverId", "points", "position", "positionText", "wins"], driver_standings),
+        "constructor_standings.csv": (["constructorStandingsId", "raceId", "constructorId", "points", "position", "positionText", "wins"], constructor_standings)
+    }
+    for nombre, (columnas, filas) in ficheros.items():
+        pd.DataFrame(filas, columns=columnas).to_csv(os.path.join(directorio, nombre), index=False)
+    return ids_pilotos
+
+
+def _generar_temporadas(pilotos, temporadas, carreras, semilla):
+    """
+    Genera los resultados aleatorios (reproducibles con `semilla`) que comparten `generar_fixtures_ergast` y
+    `generar_dump_ergast`.
+
+    Retorna:
+    - tuple: (ids_pilotos, {temporada: carreras}), con las carreras en el formato `Races` de la API.
+    """
+    aleatorio = random.Random(semilla)
+    ids_pilotos = [f"piloto_{i}" for i in range(pilotos)]
+    temporadas_generadas = {}
+    for anio in (str(anio) for anio in range(2000, 2000 + temporadas)):
+        equipos = {piloto: EQUIPOS_FICTICIOS[i % len(EQUIPOS_FICTICIOS)] for i, piloto in enumerate(ids_pilotos)}
+        races = []
+        for ronda in range(1, carreras + 1):
+            orden = ids_pilotos[:]
+            aleatorio.shuffle(orden)
+            resultados = []
+            for posicion, piloto in enumerate(orden, 1):
+                equipo = equipos[piloto]
+                resultados.append({
+                    "position": str(posicion),
+                    "positionText": str(posicion) if aleatorio.random() > 0.1 else "R",
+                    "points": str(max(0, 11 - posicion)),
+                    "grid": str(aleatorio.randint(1, pilotos)),
+                    "Driver": {"driverId": piloto},
+                    "Constructor": {"constructorId": equipo.lower().replace(" ", "_"), "name": equipo},
+                })
+            races.append({"season": anio, "round": str(ronda), "Results": resultados})
+        temporadas_generadas[anio] = races
+    return ids_pilotos, temporadas_generadas
+
+
+def _clasificaciones_temporada(races):
+    """
+    Suma los puntos de cada piloto y de cada equipo en las carreras de una temporada.
+    """
+    puntos_pilotos = {}
+    puntos_equipos = {}
+    for race in races:
+        for resultado in race["Results"]:
+            piloto = resultado["Driver"]["driverId"]
+            equipo = resultado["Constructor"]["name"]
+            puntos_pilotos[piloto] = puntos_pilotos.get(piloto, 0) + float(resultado["points"])
+            puntos_equipos[equipo] = puntos_equipos.get(equipo, 0) + float(resultado["points"])
+    return puntos_pilotos, puntos_equipos
+
+
+def generar_fixture_wikipedia(servidor, filas=100, url=URL_WIKIPEDIA_CONSTRUCTORES):
+    """
+    Genera y registra en el servidor una página con la estructura de `List_of_Formula_One_constructors`.
+
+    Parámetros:
+    - servidor (ServidorFixtures): Servidor en el que registrar la página.
+    - filas (int, opcional): Filas de cada una de las dos tablas (equipos presentes e históricos). Por defecto es 100.
+    - url (str, opcional): URL con la que se registra. Por defecto es `URL_WIKIPEDIA_CONSTRUCTORES`.
+
+    Retorna:
+    - str: La URL registrada.
+
+    Notas:
+    - Las celdas llevan enlaces y referencias (`[1]`) y la página incluye contenido de relleno, como la página real, para
+      que el coste del análisis HTML sea representativo.
+    """
+    def tabla(columnas, generar_fila):
+        cabecera = "<tr>" + "".join(f"<th>{columna}</th>" for columna in columnas) + "</tr>"
+        cuerpo = "".join(
+            "<tr>" + "".join(f"<td><a href=\"/wiki/{i}\">{valor}</a><sup>[{i % 9 + 1}]</sup></td>" for valor in generar_fila(i)) + "</tr>"
+            for i in range(filas)
+        )
+        return f"<table class=\"wikitable sortable\">{cabecera}{cuerpo}</table>"
+
+    def fila_presente(i):
+        return [f"Equipo {i}", f"Motor {i % 5}", "Italy", "Maranello", "1950–present", 1000 + i, 1000 + i, 100, 1100 + i,
+                i, f"{i * 10.5:,.1f}", i, i, i * 2, i % 10, i % 5, f"Equipo {i - 1}" if i else "—"]
+
+    def fila_historica(i):
+        if i % 7 == 0:
+            return [f"Escudería {i}"] + ["n/a"] * (len(sfe.COLUMNAS_EQUIPOS_HISTORICOS) - 1)
+        return [f"Escudería {i}", "United Kingdom", "1958–1960, 1962", 10 + i, 10 + i, 5, 12 + i, i % 3, f"{i * 1.5}",
+                i % 4, i % 2, i % 5, 0, 0]
+
+    relleno = "<div><p>" + "Lorem ipsum dolor sit amet. " * 100 + "</p><ul>" + "<li><a href=\"/wiki/x\">x</a></li>" * 200 + "</ul></div>"
+    pagina = (f"<html><head><title>List of Formula One constructors</title></head><body>{relleno * 5}"
+              f"{tabla(sfe.COLUMNAS_EQUIPOS_PRESENTES, fila_presente)}{relleno * 3}"
+              f"{tabla(sfe.COLUMNAS_EQUIPOS_HISTORICOS, fila_historica)}{relleno * 5}</body></html>")
+    servidor.anadir(url, pagina, content_type="text/html; charset=UTF-8")
+    return url
+
+
+def generar_mejores_pilotos(filas, semilla=0):
+    """
+    Genera un DataFrame con la estructura de `historico_mejores_pilotos` para medir la carga en la base de datos.
+
+    Parámetros:
+    - filas (int): Número de filas. Cada fila tiene una clave natural (piloto, temporada) distinta.
+    - semilla (int, opcional): Semilla de los valores aleatorios. Por defecto es 0.
+
+    Retorna:
+    - pd.DataFrame: DataFrame con las columnas de `COLUMNAS_HISTORICOS`.
+    """
+    aleatorio = np.random.default_rng(semilla)
+    indices = np.arange(filas)
+    return pd.DataFrame({
+        "piloto": [f"Piloto {i // 70}" for i in indices],
+        "temporada": 1950 + indices % 70,
+        "equipo": np.array(EQUIPOS_FICTICIOS)[indices % len(EQUIPOS_FICTICIOS)],
+        "puntos_totales_constructor": aleatorio.integers(0, 800, filas).astype(float),
+        "total_carreras": aleatorio.integers(1, 24, filas),
+        "victorias": aleatorio.integers(0, 10, filas),
+        "podios": aleatorio.integers(0, 15, filas),
+        "puntos": aleatorio.integers(0, 400, filas).astype(float),
+        "promedio_posicion_carrera": aleatorio.uniform(1, 20, filas).round(2),
+        "promedio_posicion_clasificacion": aleatorio.uniform(1, 20, filas).round(2),
+        "poles": aleatorio.integers(0, 10, filas),
+        "cantidad_dnf": aleatorio.integers(0, 5, filas),
+        "promedio_puntos": aleatorio.uniform(0, 20, filas).round(2),
+        "titulo": aleatorio.random(filas) < 0.05,
+    })
+
+
+class MonitorMemoria:
+    """
+    Mide cuánto crece la memoria residente (RSS) del proceso mientras se ejecuta un bloque `with`.
+
+    Atributos:
+    - inicial_bytes (int): RSS al entrar en el bloque, o `None` si el sistema no permite medirlo.
+    - pico_bytes (int): Máximo RSS observado durante el bloque, o `None` si el sistema no permite medirlo.
+    - incremento_bytes (int): `pico_bytes - inicial_bytes`, es decir, la memoria que ha necesitado el bloque por encima
+      de la que ya ocupaba el proceso (intérprete, pandas, pruebas anteriores...), o `None` si no se puede medir.
+
+    Notas:
+    - En Linux muestrea `/proc/self/statm` cada `intervalo` segundos desde un hilo. En otros sistemas Unix solo está
+      disponible el máximo de toda la vida del proceso (`resource.getrusage`): el incremento solo refleja cuánto supera el
+      bloque el máximo anterior, y es 0 si no lo supera. En Windows, donde no existe el módulo `resource`, no se mide.
+    """
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.inicial_bytes = None
+        self.pico_bytes = None
+        self._parar = threading.Event()
+        self._hilo = None
+
+    def __enter__(self):
+        self.inicial_bytes = self.pico_bytes = _rss_actual()
+        if self.pico_bytes is None:
+            self._hilo = None
+            return self
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *excepcion):
+        if self._hilo is None:
+            return
+        self._parar.set()
+        self._hilo.join()
+        self.pico_bytes = max(self.pico_bytes, _rss_actual())
+
+    @property
+    def incremento_bytes(self):
+        if self.pico_bytes is None:
+            return None
+        return self.pico_bytes - self.inicial_bytes
+
+    def _muestrear(self):
+        while not self._parar.wait(self.intervalo):
+            self.pico_bytes = max(self.pico_bytes, _rss_actual())
+
+
+def _rss_actual():
+    """
+    Devuelve el RSS actual del proceso en bytes o, fuera de Linux, su máximo; `None` si no se puede medir.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # `ru_maxrss` está en bytes en macOS y en kilobytes en Linux y los BSD.
+    escala = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * escala
+
+
+def medir(prueba, tamano, funcion, sesion=None, repeticiones=3, preparar=None):
+    """
+    Ejecuta una función varias veces y resume su rendimiento.
+
+    Parámetros:
+    - prueba (str): Nombre de la prueba en el informe.
+    - tamano (int): Tamaño de los datos de la prueba (pilotos, filas...), para el informe.
+    - funcion (callable): Función sin argumentos a medir. Debe devolver el número de filas producidas o cargadas.
+    - sesion (requests.Session, opcional): Sesión que usa la función, para contar las peticiones y medir sus latencias.
+    - repeticiones (int, opcional): Número de ejecuciones; se informa de la mediana. Por defecto es 3.
+    - preparar (callable, opcional): Función sin argumentos que se ejecuta antes de cada repetición, fuera del tiempo
+      medido (por ejemplo, para vaciar la tabla en la que carga `funcion`).
+
+    Retorna:
+    - dict: "prueba", "tamano", "segundos" (mediana), "filas", "filas_por_segundo", "peticiones", "peticiones_por_segundo",
+      "rss_incremento_mb" (pico de RSS durante las repeticiones menos el RSS antes de empezar) y las latencias de petición "latencia_p50_ms", "latencia_p90_ms" y "latencia_p99_ms".
+    """
+    latencias = []
+    if sesion is not None:
+        registrar = lambda response, *args, **kwargs: latencias.append(response.elapsed.total_seconds())
+        sesion.hooks["response"].append(registrar)
+
+    tiempos = []
+    filas = 0
+    try:
+        with MonitorMemoria() as monitor:
+            for _ in range(repeticiones):
+                if preparar is not None:
+                    preparar()
+                inicio = time.perf_counter()
+                filas = funcion()
+                tiempos.append(time.perf_counter() - inicio)
+    finally:
+        if sesion is not None:
+            sesion.hooks["response"].remove(registrar)
+
+    segundos = float(np.median(tiempos))
+    peticiones = len(latencias) / repeticiones
+    percentiles = np.percentile(latencias, [50, 90, 99]) * 1000 if latencias else [np.nan] * 3
+    return {
+        "prueba": prueba,
+        "tamano": tamano,
+        "segundos": round(segundos, 4),
+        "filas": filas,
+        "filas_por_segundo": round(filas / segundos, 1) if segundos else np.nan,
+        "peticiones": peticiones,
+        "peticiones_por_segundo": round(peticiones / segundos, 1) if segundos and peticiones else np.nan,
+        "rss_incremento_mb": round(monitor.incremento_bytes / 1024 ** 2, 1) if monitor.incremento_bytes is not None else np.nan,
+        "latencia_p50_ms": round(float(percentiles[0]), 2),
+        "latencia_p90_ms": round(float(percentiles[1]), 2),
+        "latencia_p99_ms": round(float(percentiles[2]), 2),
+    }
+
+
+def benchmark_historicos(tamanos=(5, 20), temporadas=10, carreras=20, modos=("piloto", "temporada", "local"), latencia=0.005, max_concurrencia=8, repeticiones=3):
+    """
+    Mide `obtener_historicos` contra la API de Ergast simulada, para varios números de pilotos.
+
+    Parámetros:
+    - tamanos (tuple, opcional): Números de pilotos a probar. Por defecto es (5, 20).
+    - temporadas (int, opcional): Temporadas de cada piloto. Por defecto es 10.
+    - carreras (int, opcional): Carreras por temporada. Por defecto es 20.
+    - modos (tuple, opcional): Modos de `obtener_historicos` a probar. El modo "local" mide en su lugar
+      `obtener_historicos_local` sobre un volcado con los mismos datos, importado en SQLite fuera de la medida. Por
+      defecto ("piloto", "temporada", "local").
+    - latencia (float, opcional): Latencia del servidor simulado en segundos. Por defecto es 0.005.
+    - max_concurrencia (int, opcional): Concurrencia de `obtener_historicos`. Por defecto es 8.
+    - repeticiones (int, opcional): Ejecuciones por medida. Por defecto es 3.
+
+    Retorna:
+    - list: Una fila de `medir` por tamaño y modo.
+    """
+    filas = []
+    for tamano in tamanos:
+        with ServidorFixtures(latencia=latencia) as servidor:
+            pilotos = generar_fixtures_ergast(servidor, pilotos=tamano, temporadas=temporadas, carreras=carreras)
+            sesion = servidor.crear_sesion(max_conexiones=max_concurrencia)
+            for modo in modos:
+                if modo == "local":
+                    continue
+                funcion = lambda: len(sfe.obtener_historicos(pilotos, max_concurrencia=max_concurrencia, sesion=sesion, modo=modo))
+                filas.append(medir(f"obtener_historicos[{modo}]", tamano, funcion, sesion, repeticiones))
+        if "local" in modos:
+            with tempfile.TemporaryDirectory() as directorio:
+                generar_dump_ergast(directorio, pilotos=tamano, temporadas=temporadas, carreras=carreras)
+                ruta_bbdd = os.path.join(directorio, "ergast.db")
+                importar_dump_ergast(directorio, ruta_bbdd)
+                funcion = lambda: len(obtener_historicos_local(pilotos, ruta_bbdd))
+                filas.append(medir("obtener_historicos[local]", tamano, funcion, repeticiones=repeticiones))
+    return filas
+
+
+def benchmark_wikipedia(tamanos=(100, 1000), latencia=0.0, repeticiones=3):
+    """
+    Mide los scrapers de Wikipedia contra una página simulada, para varios números de filas por tabla.
+
+    Parámetros:
+    - tamanos (tuple, opcional): Filas de cada tabla a probar. Por defecto es (100, 1000).
+    - latencia (float, opcional): Latencia del servidor simulado en segundos. Por defecto es 0.
+    - repeticiones (int, opcional): Ejecuciones por medida. Por defecto es 3.
+
+    Retorna:
+    - list: Una fila de `medir` por tamaño y scraper (`obtener_equipos_historicos_wikipedia`,
+      `obtener_equipos_presentes_wikipedia` y `obtener_equipos_wikipedia`, que obtiene ambas tablas de una vez).
+    """
+    scrapers = {
+        "obtener_equipos_historicos_wikipedia": lambda url, sesion: len(sfe.obtener_equipos_historicos_wikipedia(url, sesion)),
+        "obtener_equipos_presentes_wikipedia": lambda url, sesion: len(sfe.obtener_equipos_presentes_wikipedia(url, sesion)),
+        "obtener_equipos_wikipedia": lambda url, sesion: sum(len(df) for df in sfe.obtener_equipos_wikipedia(url, sesion)[:2]),
+    }
+    filas = []
+    for tamano in tamanos:
+        with ServidorFixtures(latencia=latencia) as servidor:
+            url = generar_fixture_wikipedia(servidor, filas=tamano)
+            sesion = servidor.crear_sesion()
+            for nombre, scraper in scrapers.items():
+                filas.append(medir(nombre, tamano, lambda: scraper(url, sesion), sesion, repeticiones))
+    return filas
+
+
+def benchmark_insercion(database_name="proyecto5_benchmark", tamanos=(1000, 100000), metodos=("copy", "execute_values"), repeticiones=3):
+    """
+    Mide `insertar_datos` sobre la tabla `mejores_pilotos` de una base de datos PostgreSQL local de pruebas.
+
+    Parámetros:
+    - database_name (str, opcional): Base de datos de pruebas. Se crea con sus tablas si no existe y la tabla
+      `mejores_pilotos` se vacía antes de cada ejecución, fuera del tiempo medido. Por defecto es "proyecto5_benchmark".
+    - tamanos (tuple, opcional): Filas a cargar. Por defecto es (1000, 100000).
+    - metodos (tuple, opcional): Métodos de `insertar_datos` a probar. Por defecto ("copy", "execute_values").
+    - repeticiones (int, opcional): Ejecuciones por medida. Por defecto es 3.
+
+    Retorna:
+    - list: Una fila de `medir` por tamaño y método.
+
+    Notas:
+    - La conexión usa las mismas variables de entorno (`PGHOST`, `PGPASSWORD`...) que el resto del proyecto.
+    - No usar la base de datos del proyecto: la tabla se vacía en cada ejecución.
+    - Cada método usa una sola conexión del pool para todas sus repeticiones, de modo que el tiempo medido es el de
+      `insertar_datos` y su `commit`, sin el préstamo de la conexión ni el `TRUNCATE`.
+    - `soporte_funciones_creacion_bbdd` (y con él psycopg2, del extra `bbdd`) se importa aquí y no al importar el módulo,
+      para poder ejecutar el resto de benchmarks sin tenerlo instalado.
+    """
+    from . import soporte_funciones_creacion_bbdd as sfcb
+
+    sfcb.crear_bbdd(database_name)
+    sfcb.crear_tablas(database_name)
+    filas = []
+    for tamano in tamanos:
+        df = generar_mejores_pilotos(tamano)
+        for metodo in metodos:
+            with sfcb.conexion(database_name) as conn:
+                def vaciar():
+                    with conn.cursor() as cursor:
+                        cursor.execute("TRUNCATE mejores_pilotos")
+                    conn.commit()
+
+                def cargar():
+                    filas_cargadas = sfcb.insertar_datos(conn, df, "mejores_pilotos", metodo=metodo)["filas"]
+                    conn.commit()
+                    return filas_cargadas
+                filas.append(medir(f"insertar_datos[{metodo}]", tamano, cargar, repeticiones=repeticiones, preparar=vaciar))
+    return filas
+
+
+def ejecutar_benchmarks(historicos=True, wikipedia=True, insercion=True, ruta_salida=None, **opciones):
+    """
+    Ejecuta la batería de benchmarks sin acceder a la red y devuelve un informe.
+
+    Parámetros:
+    - historicos (bool, opcional): Si se mide `obtener_historicos`. Por defecto es True.
+    - wikipedia (bool, opcional): Si se miden los scrapers de Wikipedia. Por defecto es True.
+    - insercion (bool, opcional): Si se mide `insertar_datos`. Requiere un PostgreSQL local. Por defecto es True.
+    - ruta_salida (str, opcional): Si se indica, se guarda el informe en CSV en esa ruta.
+    - **opciones: Argumentos para cada benchmark con el prefijo de su nombre, por ejemplo `historicos_tamanos=(5, 50)`,
+      `wikipedia_repeticiones=5` o `insercion_database_name="otra_bbdd"`.
+
+    Retorna:
+    - pd.DataFrame: Una fila por prueba y tamaño con las columnas de `medir`.
+    """
+    benchmarks = {"historicos": (historicos, benchmark_historicos), "wikipedia": (wikipedia, benchmark_wikipedia), "insercion": (insercion, benchmark_insercion)}
+    filas = []
+    for nombre, (activo, benchmark) in benchmarks.items():
+        if activo:
+            prefijo = f"{nombre}_"
+            filas.extend(benchmark(**{clave[len(prefijo):]: valor for clave, valor in opciones.items() if clave.startswith(prefijo)}))
+
+    df_informe = pd.DataFrame(filas)
+    if ruta_salida is not None:
+        df_informe.to_csv(ruta_salida, index=False)
+    return df_informe
+
+
+def comparar_benchmarks(df_actual: pd.DataFrame, df_referencia: pd.DataFrame, tolerancia=0.2):
+    """
+    Compara un informe de benchmarks con otro de referencia para detectar regresiones.
+
+    Parámetros:
+    - df_actual (pd.DataFrame): Informe de `ejecutar_benchmarks` de la versión a evaluar.
+    - df_referencia (pd.DataFrame): Informe de referencia (por ejemplo, el de la rama principal guardado en CSV).
+    - tolerancia (float, opcional): Aumento relativo de tiempo a partir del cual se marca una regresión. Por defecto es 0.2 (20%).
+
+    Retorna:
+    - pd.DataFrame: Por prueba y tamaño, "segundos_referencia", "segundos", la "variacion" relativa y "regresion" (bool).
+    """
+    df_comparacion = df_referencia[["prueba", "tamano", "segundos"]].merge(
+        df_actual[["prueba", "tamano", "segundos"]], on=["prueba", "tamano"], suffixes=("_referencia", ""))
+    df_comparacion["variacion"] = (df_comparacion["segundos"] / df_comparacion["segundos_referencia"] - 1).round(3)
+    df_comparacion["regresion"] = df_comparacion["variacion"] > tolerancia
+    return df_comparacion
@@ -0,0 +1,247 @@
+import inspect
+from functools import lru_cache, wraps
+
+import pandas as pd
+
+from .soporte_funciones_creacion_bbdd import conexion, version_datos
+
+TAMANO_CACHE = 256
+
+COLUMNAS_CARRERA_PILOTOS = {"temporadas", "carreras", "victorias", "podios", "poles", "puntos", "cantidad_dnf", "titulos"}
+COLUMNAS_CARRERA_CONSTRUCTORES = {"temporadas", "pilotos", "victorias", "podios", "poles", "titulos_pilotos", "puntos_constructor"}
+COLUMNAS_RANKING_TEMPORADA = {"puntos", "victorias", "podios", "poles", "promedio_puntos", "promedio_posicion_carrera"}
+COLUMNAS_ESCUDERIAS = {"victorias", "puntos_totales", "podios", "titulos_constructores", "titulos_pilotos", "carreras_empezadas"}
+
+_CONSULTAS_CACHEADAS = []
+
+
+def _consulta_cacheada(funcion):
+    """
+    Decora una consulta para guardar sus resultados en una caché LRU en memoria.
+
+    Notas:
+    - La clave de la caché incluye `version_datos` de la base de datos, así que tras una carga con `cargar_tablas` en este
+      mismo proceso las consultas se vuelven a ejecutar sin tener que vaciar la caché a mano.
+    - `version_datos` es un contador del proceso: las cargas hechas desde otro proceso (otro notebook, `proyecto5 load`...)
+      no lo incrementan, y la caché seguiría devolviendo los resultados anteriores. En ese caso hay que llamar a
+      `invalidar_cache`.
+    - Se devuelve una copia del DataFrame guardado, para que modificar el resultado no altere la caché. Con el modo
+      copy-on-write de pandas activado (`pd.set_option("mode.copy_on_write", True)`) la copia es superficial y no duplica
+      los datos; sin él es una copia completa, cuyo coste crece con el tamaño del resultado.
+    """
+    firma = inspect.signature(funcion)
+    cacheada = lru_cache(maxsize=TAMANO_CACHE)(lambda version, argumentos: funcion(**dict(argumentos)))
+    _CONSULTAS_CACHEADAS.append((funcion.__name__, cacheada))
+
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        argumentos = firma.bind(*args, **kwargs)
+        argumentos.apply_defaults()
+        version = version_datos(argumentos.arguments["database_name"])
+        return cacheada(version, tuple(argumentos.arguments.items())).copy(deep=pd.options.mode.copy_on_write is not True)
+
+    return envoltura
+
+
+def _consultar(sentencia, parametros, database_name):
+    with conexion(database_name) as conn:
+        cursor = conn.cursor()
+        cursor.execute(sentencia, parametros)
+        columnas = [descripcion[0] for descripcion in cursor.description]
+        filas = cursor.fetchall()
+        cursor.close()
+    return pd.DataFrame(filas, columns=columnas)
+
+
+def _validar_columna(columna, permitidas):
+    if columna not in permitidas:
+        raise ValueError(f"Columna no soportada: {columna}. Usa una de {sorted(permitidas)}")
+
+
+@_consulta_cacheada
+def carrera_pilotos(orden="victorias", limite=None, database_name=None):
+    """
+    Devuelve los totales de carrera de cada piloto, calculados de antemano en `mv_carrera_pilotos`.
+
+    Parámetros:
+    - orden (str, opcional): Columna por la que ordenar de mayor a menor: "temporadas", "carreras", "victorias", "podios",
+      "poles", "puntos", "cantidad_dnf" o "titulos". Por defecto es "victorias".
+    - limite (int, opcional): Número máximo de pilotos. Por defecto se devuelven todos.
+    - database_name (str, opcional): Nombre de la base de datos.
+
+    Retorna:
+    - pd.DataFrame: Una fila por piloto con sus temporadas, primera y última temporada, carreras, victorias, podios, poles,
+      puntos, retiros, títulos y equipos.
+    """
+    _validar_columna(orden, COLUMNAS_CARRERA_PILOTOS)
+    return _consultar(f"SELECT * FROM mv_carrera_pilotos ORDER BY {orden} DESC, nombre LIMIT %s", (limite,), database_name)
+
+
+@_consulta_cacheada
+def carrera_constructores(orden="puntos_constructor", limite=None, database_name=None):
+    """
+    Devuelve los totales de cada constructor en las temporadas de los pilotos seguidos, calculados de antemano en
+    `mv_carrera_constructores`.
+
+    Parámetros:
+    - orden (str, opcional): Columna por la que ordenar de mayor a menor: "temporadas", "pilotos", "victorias", "podios",
+      "poles", "titulos_pilotos" o "puntos_constructor". Por defecto es "puntos_constructor".
+    - limite (int, opcional): Número máximo de constructores. Por defecto se devuelven todos.
+    - database_name (str, opcional): Nombre de la base de datos.
+
+    Retorna:
+    - pd.DataFrame: Una fila por constructor.
+    """
+    _validar_columna(orden, COLUMNAS_CARRERA_CONSTRUCTORES)
+    return _consultar(f"SELECT * FROM mv_carrera_constructores ORDER BY {orden} DESC, equipo LIMIT %s", (limite,), database_name)
+
+
+@_consulta_cacheada
+def ranking_temporada(temporada, criterio="puntos", database_name=None):
+    """
+    Ordena a los pilotos de una temporada según un criterio.
+
+    Parámetros:
+    - temporada (int): Temporada (año).
+    - criterio (str, opcional): "puntos", "victorias", "podios", "poles", "promedio_puntos" o "promedio_posicion_carrera"
+      (este último de menor a mayor). Por defecto es "puntos".
+    - database_name (str, opcional): Nombre de la base de datos.
+
+    Retorna:
+    - pd.DataFrame: Columnas "posicion" (con empates), "nombre", "equipo", el criterio y "titulo".
+    """
+    _validar_columna(criterio, COLUMNAS_RANKING_TEMPORADA)
+    direccion = "ASC" if criterio == "promedio_posicion_carrera" else "DESC"
+    sentencia = f"""
+        SELECT RANK() OVER (ORDER BY {criterio} {direccion}) AS posicion, nombre, equipo, {criterio}, titulo
+        FROM mejores_pilotos
+        WHERE temporada = %s
+        ORDER BY posicion, nombre
+    """
+    return _consultar(sentencia, (int(temporada),), database_name)
+
+
+@_consulta_cacheada
+def cara_a_cara(piloto_a, piloto_b, database_name=None):
+    """
+    Compara temporada a temporada a dos pilotos en las temporadas que disputaron ambos.
+
+    Parámetros:
+    - piloto_a (str): Nombre del primer piloto, tal y como aparece en `mejores_pilotos`.
+    - piloto_b (str): Nombre del segundo piloto.
+    - database_name (str, opcional): Nombre de la base de datos.
+
+    Retorna:
+    - pd.DataFrame: Una fila por temporada común con el equipo, los puntos, las victorias y los podios de cada uno
+      (sufijos "_a" y "_b"), "mismo_equipo" y "mejor" (el piloto con más puntos, o `None` si empatan).
+
+    Notas:
+    - El total del enfrentamiento se obtiene, por ejemplo, con `df["mejor"].value_counts()`.
+    """
+    sentencia = """
+        SELECT
+            a.temporada,
+            a.equipo AS equipo_a, b.equipo AS equipo_b,
+            a.puntos AS puntos_a, b.puntos AS puntos_b,
+            a.victorias AS victorias_a, b.victorias AS victorias_b,
+            a.podios AS podios_a, b.podios AS podios_b,
+            a.equipo = b.equipo AS mismo_equipo,
+            CASE WHEN a.puntos > b.puntos THEN a.nombre WHEN b.puntos > a.puntos THEN b.nombre END AS mejor
+        FROM mejores_pilotos a
+        JOIN mejores_pilotos b ON b.temporada = a.temporada
+        WHERE a.nombre = %s AND b.nombre = %s
+        ORDER BY a.temporada
+    """
+    return _consultar(sentencia, (piloto_a, piloto_b), database_name)
+
+
+@_consulta_cacheada
+def puntos_constructor_por_temporada(equipo=None, database_name=None):
+    """
+    Devuelve los puntos de constructor de cada equipo y temporada.
+
+    Parámetros:
+    - equipo (str, opcional): Equipo a consultar. Por defecto se devuelven todos.
+    - database_name (str, opcional): Nombre de la base de datos.
+
+    Retorna:
+    - pd.DataFrame: Columnas "equipo", "temporada" y "puntos_constructor", ordenadas por equipo y temporada.
+    """
+    sentencia = """
+        SELECT equipo, temporada, MAX(puntos_totales_constructor) AS puntos_constructor
+        FROM mejores_pilotos
+        WHERE equipo IS NOT NULL AND (%s IS NULL OR equipo = %s)
+        GROUP BY equipo, temporada
+        ORDER BY equipo, temporada
+    """
+    return _consultar(sentencia, (equipo, equipo), database_name)
+
+
+@_consulta_cacheada
+def ranking_escuderias_historicas(criterio="victorias", limite=10, database_name=None):
+    """
+    Ordena las escuderías históricas según sus totales en `datos_historicos`.
+
+    Parámetros:
+    - criterio (str, opcional): "victorias", "puntos_totales", "podios", "titulos_constructores", "titulos_pilotos" o
+      "carreras_empezadas". Por defecto es "victorias".
+    - limite (int, opcional): Número máximo de escuderías. Por defecto es 10.
+    - database_name (str, opcional): Nombre de la base de datos.
+
+    Retorna:
+    - pd.DataFrame: Columnas "nombre", "nacionalidad", "duracion" y los totales de la escudería.
+    """
+    _validar_columna(criterio, COLUMNAS_ESCUDERIAS)
+    sentencia = f"""
+        SELECT eh.nombre, eh.nacionalidad, eh.duracion, dh.carreras_empezadas, dh.victorias, dh.podios,
+               dh.puntos_totales, dh.titulos_constructores, dh.titulos_pilotos
+        FROM datos_historicos dh
+        JOIN escuderias_historicas eh ON eh.nombre = dh.nombre
+        ORDER BY dh.{criterio} DESC NULLS LAST, eh.nombre
+        LIMIT %s
+    """
+    return _consultar(sentencia, (limite,), database_name)
+
+
+@_consulta_cacheada
+def equipos_presentes(orden="titulos_constructores", database_name=None):
+    """
+    Devuelve los equipos de la parrilla actual con sus estadísticas.
+
+    Parámetros:
+    - orden (str, opcional): Columna por la que ordenar de mayor a menor ("victorias", "puntos_totales", "podios",
+      "titulos_constructores", "titulos_pilotos" o "carreras_empezadas"). Por defecto es "titulos_constructores".
+    - database_name (str, opcional): Nombre de la base de datos.
+
+    Retorna:
+    - pd.DataFrame: Una fila por equipo de `equipos_presente`.
+    """
+    _validar_columna(orden, COLUMNAS_ESCUDERIAS)
+    return _consultar(f"SELECT * FROM equipos_presente ORDER BY {orden} DESC NULLS LAST, nombre", None, database_name)
+
+
+def estadisticas_cache():
+    """
+    Devuelve los aciertos y fallos de la caché de cada consulta.
+
+    Retorna:
+    - dict: Diccionario {nombre_consulta: {"aciertos", "fallos", "tamano"}}.
+    """
+    estadisticas = {}
+    for nombre, cacheada in _CONSULTAS_CACHEADAS:
+        informacion = cacheada.cache_info()
+        estadisticas[nombre] = {"aciertos": informacion.hits, "fallos": informacion.misses, "tamano": informacion.currsize}
+    return estadisticas
+
+
+def invalidar_cache():
+    """
+    Vacía la caché de todas las consultas.
+
+    Notas:
+    - No hace falta llamarla después de `cargar_tablas`, `cargar_en_flujo` o `reemplazar_temporada` en este mismo
+      proceso, que ya invalidan la caché. Sí después de cargar datos por otra vía: con `insertar_datos` directamente o
+      desde otro proceso, porque `version_datos` solo cuenta las cargas del proceso actual.
+    """
+    for _, cacheada in _CONSULTAS_CACHEADAS:
+        cacheada.cache_clear()
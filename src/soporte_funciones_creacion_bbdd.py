@@ -1,30 +1,375 @@
 
+import io
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import psycopg2
+import psycopg2.extensions
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import pandas as pd
+from .soporte_funciones_metricas import METRICAS
 
-def establecer_conexion(database_name, postgres_pass, usuario, host="localhost", autocommit=False):
+_POOLS = {}
+_BLOQUEO_POOLS = threading.Lock()
+_VERSIONES_DATOS = {}
+
+COLUMNAS_TABLAS = {
+    "escuderias_historicas": {
+        "nombre": "nombre",
+        "nacionalidad": "nacionalidad",
+        "duracion": "duracion"
+    },
+    "equipos_presente": {
+        "nombre": "nombre",
+        "motor": "motor",
+        "base": "base",
+        "nacionalidad": "nacionalidad",
+        "duracion": "duracion",
+        "carreras_ingresadas": "carreras_ingresadas",
+        "carreras_empezadas": "carreras_empezadas",
+        "pilotos_totales": "pilotos_totales",
+        "total_inscripciones": "total_inscripciones",
+        "victorias": "victorias",
+        "puntos_totales": "puntos_totales",
+        "poles": "cantidad_poles",
+        "vueltas_rapidas": "vueltas_rapidas",
+        "podios": "cantidad_podiums",
+        "titulos_constructores": "titulos_constructores",
+        "titulos_pilotos": "titulos_pilotos",
+        "escuderias_antecedentes": "anteriores_equipos"
+    },
+    "datos_historicos": {
+        "nombre": "nombre",
+        "carreras_inscritas": "carreras_inscritas",
+        "carreras_empezadas": "carreras_empezadas",
+        "pilotos_totales": "pilotos_totales",
+        "total_inscripciones": "total_inscripciones",
+        "victorias": "victorias",
+        "puntos_totales": "puntos_totales",
+        "cantidad_poles": "cantidad_poles",
+        "vueltas_rapidas": "vueltas_rapidas",
+        "podios": "podios",
+        "titulos_constructores": "titulos_constructores",
+        "titulos_pilotos": "titulos_pilotos"
+    },
+    "mejores_pilotos": {
+        "nombre": "piloto",
+        "temporada": "temporada",
+        "equipo": "equipo",
+        "puntos_totales_constructor": "puntos_totales_constructor",
+        "total_carreras": "total_carreras",
+        "victorias": "victorias",
+        "podios": "podios",
+        "puntos": "puntos",
+        "promedio_posicion_carrera": "promedio_posicion_carrera",
+        "promedio_posicion_clasificacion": "promedio_posicion_clasificacion",
+        "poles": "poles",
+        "cantidad_dnf": "cantidad_dnf",
+        "promedio_puntos": "promedio_puntos",
+        "titulo": "titulo"
+    },
+    "equipos_antecedentes": {
+        "id_equipo_presente": "id_equipo_presente",
+        "id_escuderia_historica": "id_escuderia_historica"
+    }
+}
+
+DEPENDENCIAS_TABLAS = {
+    "escuderias_historicas": (),
+    "equipos_presente": (),
+    "datos_historicos": ("escuderias_historicas",),
+    "mejores_pilotos": (),
+    "equipos_antecedentes": ("escuderias_historicas", "equipos_presente")
+}
+
+CLAVES_NATURALES = {
+    "escuderias_historicas": ("nombre",),
+    "equipos_presente": ("nombre",),
+    "datos_historicos": ("nombre",),
+    "mejores_pilotos": ("nombre", "temporada"),
+    "equipos_antecedentes": ("id_equipo_presente", "id_escuderia_historica")
+}
+
+INDICES = {
+    "ix_mejores_pilotos_equipo": "mejores_pilotos (equipo, temporada)",
+    "ix_mejores_pilotos_temporada": "mejores_pilotos (temporada)",
+    "ix_mejores_pilotos_campeones": "mejores_pilotos (temporada) WHERE titulo",
+    "ix_equipos_antecedentes_escuderia": "equipos_antecedentes (id_escuderia_historica)"
+}
+
+CLAVES_FORANEAS = {
+    "fk_datos_historicos_escuderia": "ALTER TABLE datos_historicos ADD CONSTRAINT fk_datos_historicos_escuderia FOREIGN KEY (nombre) REFERENCES escuderias_historicas (nombre)"
+}
+
+PRIMERA_TEMPORADA = 1950
+PARTICIONADOS = ("decada", "temporada")
+
+VISTAS_MATERIALIZADAS = {
+    "mv_carrera_pilotos": {
+        "tablas": ("mejores_pilotos",),
+        "clave": ("nombre",),
+        "consulta": """
+            SELECT
+                nombre,
+                COUNT(*) AS temporadas,
+                MIN(temporada) AS primera_temporada,
+                MAX(temporada) AS ultima_temporada,
+                SUM(total_carreras) AS carreras,
+                SUM(victorias) AS victorias,
+                SUM(podios) AS podios,
+                SUM(poles) AS poles,
+                SUM(puntos) AS puntos,
+                SUM(cantidad_dnf) AS cantidad_dnf,
+                COUNT(*) FILTER (WHERE titulo) AS titulos,
+                STRING_AGG(DISTINCT equipo, ', ') AS equipos
+            FROM mejores_pilotos
+            GROUP BY nombre
+        """
+    },
+    "mv_carrera_constructores": {
+        "tablas": ("mejores_pilotos",),
+        "clave": ("equipo",),
+        "consulta": """
+            WITH temporadas_equipo AS (
+                SELECT equipo, temporada, MAX(puntos_totales_constructor) AS puntos_constructor
+                FROM mejores_pilotos
+                WHERE equipo IS NOT NULL
+                GROUP BY equipo, temporada
+            )
+            SELECT
+                mp.equipo,
+                COUNT(DISTINCT mp.temporada) AS temporadas,
+                MIN(mp.temporada) AS primera_temporada,
+                MAX(mp.temporada) AS ultima_temporada,
+                COUNT(DISTINCT mp.nombre) AS pilotos,
+                SUM(mp.victorias) AS victorias,
+                SUM(mp.podios) AS podios,
+                SUM(mp.poles) AS poles,
+                COUNT(*) FILTER (WHERE mp.titulo) AS titulos_pilotos,
+                (SELECT SUM(te.puntos_constructor) FROM temporadas_equipo te WHERE te.equipo = mp.equipo) AS puntos_constructor
+            FROM mejores_pilotos mp
+            WHERE mp.equipo IS NOT NULL
+            GROUP BY mp.equipo
+        """
+    }
+}
+
+def configuracion_conexion(database_name=None, postgres_pass=None, usuario=None, host=None, puerto=None):
+    """
+    Reúne los parámetros de conexión a PostgreSQL a partir de los argumentos o de las variables de entorno.
+
+    Parámetros:
+    - database_name (str, opcional): Nombre de la base de datos. Por defecto es `PGDATABASE` o "postgres".
+    - postgres_pass (str, opcional): Contraseña del usuario. Por defecto es `PGPASSWORD` o "admin".
+    - usuario (str, opcional): Nombre de usuario. Por defecto es `PGUSER` o "postgres".
+    - host (str, opcional): Host del servidor. Por defecto es `PGHOST` o "localhost".
+    - puerto (int, opcional): Puerto del servidor. Por defecto es `PGPORT` o 5432.
+
+    Retorna:
+    - dict: Parámetros listos para `psycopg2.connect`.
+
+    Notas:
+    - Los valores por defecto son los que usaba el proyecto hasta ahora, por lo que sin variables de entorno el
+      comportamiento no cambia.
+    """
+    return {
+        "host": host or os.environ.get("PGHOST", "localhost"),
+        "port": int(puerto or os.environ.get("PGPORT", 5432)),
+        "user": usuario or os.environ.get("PGUSER", "postgres"),
+        "password": postgres_pass if postgres_pass is not None else os.environ.get("PGPASSWORD", "admin"),
+        "database": database_name or os.environ.get("PGDATABASE", "postgres")
+    }
+
+class CursorInstrumentado(psycopg2.extensions.cursor):
+    """
+    Cursor de psycopg2 que registra en `METRICAS` el tiempo de cada `execute`, `executemany` y `copy_expert`.
+
+    Notas:
+    - Es el cursor por defecto de las conexiones de `establecer_conexion` y de los pools de `obtener_pool`, así que
+      también mide las sentencias que lanza `execute_values`.
+    """
+
+    def execute(self, query, vars=None):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            METRICAS.registrar_consulta(query, time.perf_counter() - inicio)
+
+    def executemany(self, query, vars_list):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            METRICAS.registrar_consulta(query, time.perf_counter() - inicio)
+
+    def copy_expert(self, sql, file, size=8192):
+        inicio = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            METRICAS.registrar_consulta(sql, time.perf_counter() - inicio)
+
+def establecer_conexion(database_name=None, postgres_pass=None, usuario=None, host=None, autocommit=False):
     """
     Establece una conexión a la base de datos PostgreSQL.
 
     Parámetros:
-    - database_name (str): Nombre de la base de datos a la que se va a conectar.
-    - postgres_pass (str): Contraseña del usuario de PostgreSQL.
-    - usuario (str): Nombre de usuario de PostgreSQL.
+    - database_name (str, opcional): Nombre de la base de datos a la que se va a conectar.
+    - postgres_pass (str, opcional): Contraseña del usuario de PostgreSQL.
+    - usuario (str, opcional): Nombre de usuario de PostgreSQL.
     - host (str, opcional): Dirección del host donde se encuentra la base de datos. Por defecto es "localhost".
     - autocommit (bool, opcional): Si se debe habilitar el autocommit para la conexión. Por defecto es False.
 
     Retorna:
     - conn (psycopg2.connection): Objeto de conexión a la base de datos.
+
+    Notas:
+    - Los parámetros que no se indiquen se toman de `configuracion_conexion` (variables de entorno `PG*`).
+    - Abre una conexión nueva en cada llamada; para reutilizar conexiones usa `conexion`.
     """
-    conn = psycopg2.connect(
-        host=host,
-        user=usuario,
-        password=postgres_pass,
-        database=database_name
-    )
+    conn = psycopg2.connect(cursor_factory=CursorInstrumentado, **configuracion_conexion(database_name, postgres_pass, usuario, host))
     conn.autocommit = autocommit
     return conn
 
+def obtener_pool(database_name=None, minconn=1, maxconn=10, **credenciales):
+    """
+    Devuelve el pool de conexiones de una base de datos, creándolo la primera vez que se pide.
+
+    Parámetros:
+    - database_name (str, opcional): Nombre de la base de datos.
+    - minconn (int, opcional): Conexiones que se abren al crear el pool. Por defecto es 1.
+    - maxconn (int, opcional): Máximo de conexiones abiertas a la vez. Por defecto es 10.
+    - **credenciales: `postgres_pass`, `usuario`, `host` y `puerto`, como en `configuracion_conexion`.
+
+    Retorna:
+    - tuple: (`psycopg2.pool.ThreadedConnectionPool`, `threading.BoundedSemaphore`). El semáforo limita las conexiones
+      prestadas a `maxconn`, de forma que los hilos esperan en lugar de recibir un `PoolError`.
+
+    Notas:
+    - Hay un pool por combinación de parámetros de conexión; `minconn` y `maxconn` solo se aplican al crearlo.
+    """
+    configuracion = configuracion_conexion(database_name, **credenciales)
+    clave = tuple(sorted(configuracion.items()))
+    with _BLOQUEO_POOLS:
+        if clave not in _POOLS:
+            _POOLS[clave] = (ThreadedConnectionPool(minconn, maxconn, cursor_factory=CursorInstrumentado, **configuracion), threading.BoundedSemaphore(maxconn))
+        return _POOLS[clave]
+
+@contextmanager
+def conexion(database_name=None, autocommit=False, comprobar=True, **opciones):
+    """
+    Presta una conexión del pool de la base de datos y la devuelve al terminar.
+
+    Parámetros:
+    - database_name (str, opcional): Nombre de la base de datos.
+    - autocommit (bool, opcional): Si se debe habilitar el autocommit mientras se usa la conexión. Por defecto es False.
+    - comprobar (bool, opcional): Si se comprueba con `SELECT 1` que la conexión sigue viva antes de prestarla. Las
+      conexiones caídas se descartan y se sustituyen por una nueva. Por defecto es True.
+    - **opciones: `minconn`, `maxconn` y las credenciales aceptadas por `obtener_pool`.
+
+    Retorna:
+    - psycopg2.connection: Conexión lista para usar dentro de un bloque `with`.
+
+    Notas:
+    - Si el bloque termina sin errores se hace `commit`; si lanza una excepción se hace `rollback` y se propaga.
+    - Ejemplo:
+        with conexion("proyecto5") as conn:
+            insertar_datos(conn, df, "mejores_pilotos")
+    """
+    pool, semaforo = obtener_pool(database_name, **opciones)
+    semaforo.acquire()
+    conn = None
+    try:
+        conn = pool.getconn()
+        if comprobar and not _conexion_viva(conn):
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        conn.autocommit = autocommit
+        try:
+            yield conn
+            if not autocommit:
+                conn.commit()
+        except Exception:
+            if not autocommit and not conn.closed:
+                conn.rollback()
+            raise
+    finally:
+        if conn is not None:
+            if not conn.closed:
+                conn.autocommit = False
+            pool.putconn(conn, close=bool(conn.closed))
+        semaforo.release()
+
+def cerrar_pools():
+    """
+    Cierra todas las conexiones de todos los pools abiertos con `obtener_pool`.
+    """
+    with _BLOQUEO_POOLS:
+        for pool, _ in _POOLS.values():
+            pool.closeall()
+        _POOLS.clear()
+
+def version_datos(database_name=None):
+    """
+    Devuelve la versión de los datos de una base de datos en este proceso.
+
+    Parámetros:
+    - database_name (str, opcional): Nombre de la base de datos.
+
+    Retorna:
+    - int: Número de cargas con filas modificadas completadas con `cargar_tablas` desde que se inició el proceso.
+
+    Notas:
+    - Sirve para invalidar cachés de consultas (por ejemplo, las de `soporte_funciones_consultas`): si la versión cambia,
+      los resultados guardados ya no son válidos.
+    - Solo cuenta las cargas de este proceso: si otro proceso carga datos en la misma base de datos, la versión no cambia
+      y las cachés que dependen de ella hay que vaciarlas a mano (`soporte_funciones_consultas.invalidar_cache`).
+    """
+    return _VERSIONES_DATOS.get(configuracion_conexion(database_name)["database"], 0)
+
+def _incrementar_version_datos(database_name):
+    nombre = configuracion_conexion(database_name)["database"]
+    with _BLOQUEO_POOLS:
+        _VERSIONES_DATOS[nombre] = _VERSIONES_DATOS.get(nombre, 0) + 1
+
+def _conexion_viva(conn):
+    if conn.closed:
+        return False
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.close()
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+def leer_tabla(nombre_tabla, database_name=None, **opciones):
+    """
+    Lee una tabla completa de la base de datos en un DataFrame usando el pool de conexiones.
+
+    Parámetros:
+    - nombre_tabla (str): Nombre de la tabla o vista.
+    - database_name (str, opcional): Nombre de la base de datos.
+    - **opciones: Opciones de `conexion`.
+
+    Retorna:
+    - pd.DataFrame: Contenido de la tabla.
+    """
+    with conexion(database_name, **opciones) as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM {nombre_tabla}")
+        columnas = [descripcion[0] for descripcion in cursor.description]
+        filas = cursor.fetchall()
+        cursor.close()
+    return pd.DataFrame(filas, columns=columnas)
+
 def crear_bbdd(database_name):
     """
     Crea una base de datos en PostgreSQL si no existe.
@@ -33,7 +378,7 @@ def crear_bbdd(database_name):
     - database_name (str): Nombre de la base de datos que se desea crear.
 
     Este método establece una conexión a la base de datos `postgres`, verifica si la base de datos especificada ya existe, 
-    y, si no es así, la crea. Utiliza la función `establecer_conexion` para establecer la conexión a la base de datos.
+    y, si no es así, la crea. Utiliza el pool de conexiones compartido (`conexion`) para conectarse a la base de datos.
 
     Retorna:
     - None
@@ -43,25 +388,24 @@ def crear_bbdd(database_name):
     - En caso de error, imprime el mensaje de error correspondiente.
     """
     try:
-        conn = establecer_conexion("postgres", "admin", "postgres", autocommit=True)
-        cursor = conn.cursor()
+        with conexion("postgres", autocommit=True) as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (database_name,))
-        bbdd_existe = cursor.fetchone()
-    
-        if not bbdd_existe:
-            cursor.execute(f"CREATE DATABASE {database_name};")
-            print(f"Base de datos {database_name} creada con éxito")
-        else:
-            print(f"La base de datos ya existe")
-            
-        cursor.close()
-        conn.close()
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (database_name,))
+            bbdd_existe = cursor.fetchone()
+
+            if not bbdd_existe:
+                cursor.execute(f"CREATE DATABASE {database_name};")
+                print(f"Base de datos {database_name} creada con éxito")
+            else:
+                print(f"La base de datos ya existe")
+
+            cursor.close()
 
     except (Exception, psycopg2.DatabaseError) as error:
         print(f"Error al crear la base de datos: {error}")
 
-def insertar_datos(conn, df: pd.DataFrame, nombre_tabla):
+def insertar_datos(conn, df: pd.DataFrame, nombre_tabla, metodo="copy", tamano_lote=50000, upsert=True):
     """
     Inserta los datos de un DataFrame en la tabla especificada de la base de datos PostgreSQL.
 
@@ -69,6 +413,15 @@ def insertar_datos(conn, df: pd.DataFrame, nombre_tabla):
     - conn (psycopg2.connection): Objeto de conexión a la base de datos.
     - df (pd.DataFrame): DataFrame que contiene los datos que se desean insertar.
     - nombre_tabla (str): Nombre de la tabla en la que se insertarán los datos.
+    - metodo (str, opcional): Forma de cargar los datos. Por defecto es "copy".
+        - "copy": envía los datos en bloque con `COPY ... FROM STDIN` en formato CSV.
+        - "execute_values": agrupa las filas en sentencias `INSERT` de varias filas con `psycopg2.extras.execute_values`.
+          Sirve como alternativa cuando no se puede usar `COPY`.
+    - tamano_lote (int, opcional): Número de filas que se envían en cada `COPY` o `INSERT`. Por defecto es 50000.
+    - upsert (bool, opcional): Si es `True`, los datos se cargan en una tabla temporal de staging y se fusionan con la tabla
+      mediante `INSERT ... ON CONFLICT DO UPDATE` sobre su clave natural (`CLAVES_NATURALES`), de modo que volver a cargar
+      los mismos datos no duplica filas y solo se modifican las que han cambiado. Si es `False`, se insertan directamente.
+      Por defecto es True.
 
     La función inserta datos en varias tablas según el valor del parámetro `nombre_tabla`. Las tablas soportadas son:
     - `escuderias_historicas`: Inserta información sobre escuderías históricas.
@@ -77,203 +430,728 @@ def insertar_datos(conn, df: pd.DataFrame, nombre_tabla):
     - `mejores_pilotos`: Inserta información sobre los mejores pilotos de la historia.
     - `equipos_antecedentes`: Inserta relaciones entre equipos presentes y sus antecedentes históricos.
 
-    La función utiliza un cursor para ejecutar las sentencias `INSERT` y cierra el cursor después de realizar las inserciones.
+    Retorna:
+    - dict: Estadísticas de la carga con las claves "tabla", "filas" (filas enviadas), "filas_modificadas" (filas insertadas o
+      actualizadas), "segundos" y "filas_por_segundo".
 
     Notas:
-    - Se asume que las columnas del DataFrame coinciden con los campos de la tabla correspondiente.
+    - La correspondencia entre las columnas de cada tabla y las del DataFrame se declara una sola vez en `COLUMNAS_TABLAS`.
+      Si el DataFrame no tiene la columna indicada pero sí una con el nombre de la columna de la tabla, se usa esa.
+    - Los datos se envían por lotes de `tamano_lote` filas, de modo que la memoria usada no crece con el tamaño de la tabla.
+    - La función no hace `commit`; la transacción queda abierta en `conn`.
+    - Las filas enviadas y modificadas por tabla y el tiempo de la carga ("bbdd.insertar.<tabla>") se registran en `METRICAS`.
     - En caso de que `nombre_tabla` no coincida con ninguna tabla soportada, no se realiza ninguna inserción.
+    - `equipos_antecedentes` también acepta el DataFrame de `resolver_antecedentes`, con los nombres de los equipos en
+      "equipo_presente" y "escuderia_historica" en lugar de sus ids. Los ids se obtienen en la propia base de datos con
+      un único `INSERT ... SELECT` que cruza los nombres con `equipos_presente` y `escuderias_historicas`; las filas sin
+      escudería o cuyos nombres no están en esas tablas no se insertan.
+    - Si `mejores_pilotos` está particionada, antes de cargarla se crean las particiones de las temporadas que no tienen.
+    """
+    if nombre_tabla not in COLUMNAS_TABLAS:
+        print(f"La tabla {nombre_tabla} no está soportada, no se insertan datos")
+        return {"tabla": nombre_tabla, "filas": 0, "filas_modificadas": 0, "segundos": 0.0, "filas_por_segundo": 0.0}
+    if metodo not in ("copy", "execute_values"):
+        raise ValueError(f"Método de carga no soportado: {metodo}")
+    if nombre_tabla == "equipos_antecedentes" and "escuderia_historica" in df.columns:
+        return _insertar_antecedentes_por_nombre(conn, df, metodo, tamano_lote)
+
+    with METRICAS.etapa("bbdd.preparar"):
+        datos = _preparar_datos(df, nombre_tabla)
+    columnas = ", ".join(datos.columns)
+
+    inicio = time.perf_counter()
+    with METRICAS.etapa(f"bbdd.insertar.{nombre_tabla}"):
+        cursor = conn.cursor()
+        if nombre_tabla == "mejores_pilotos" and _esta_particionada(cursor, nombre_tabla):
+            _asegurar_particiones(cursor, datos["temporada"].dropna())
+        if upsert:
+            tabla_staging = f"staging_{nombre_tabla}"
+            cursor.execute(f"DROP TABLE IF EXISTS {tabla_staging}")
+            cursor.execute(f"CREATE TEMP TABLE {tabla_staging} AS SELECT {columnas} FROM {nombre_tabla} WITH NO DATA")
+            _enviar_datos(cursor, tabla_staging, datos, metodo, tamano_lote)
+            cursor.execute(_sentencia_fusion(nombre_tabla, tabla_staging, list(datos.columns)))
+            filas_modificadas = cursor.rowcount
+            cursor.execute(f"DROP TABLE {tabla_staging}")
+        else:
+            _enviar_datos(cursor, nombre_tabla, datos, metodo, tamano_lote)
+            filas_modificadas = len(datos)
+        cursor.close()
+    segundos = time.perf_counter() - inicio
+    METRICAS.contar("bbdd_filas", len(datos), tabla=nombre_tabla)
+    METRICAS.contar("bbdd_filas_modificadas", filas_modificadas, tabla=nombre_tabla)
+
+    return {
+        "tabla": nombre_tabla,
+        "filas": len(datos),
+        "filas_modificadas": filas_modificadas,
+        "segundos": segundos,
+        "filas_por_segundo": len(datos) / segundos if segundos > 0 else 0.0
+    }
+
+
+def _enviar_datos(cursor, tabla_destino, datos: pd.DataFrame, metodo, tamano_lote):
+    """
+    Envía las filas de `datos` a `tabla_destino` por lotes con `COPY` o con `execute_values`.
+    """
+    columnas = ", ".join(datos.columns)
+    for posicion in range(0, len(datos), tamano_lote):
+        lote = datos.iloc[posicion:posicion + tamano_lote]
+        if metodo == "copy":
+            buffer = io.StringIO()
+            lote.to_csv(buffer, header=False, index=False)
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {tabla_destino} ({columnas}) FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            valores = lote.astype(object).where(lote.notna(), None).itertuples(index=False, name=None)
+            execute_values(cursor, f"INSERT INTO {tabla_destino} ({columnas}) VALUES %s", valores, page_size=tamano_lote)
+
+
+def _sentencia_fusion(nombre_tabla, tabla_staging, columnas):
+    """
+    Construye el `INSERT ... ON CONFLICT` que fusiona la tabla de staging con `nombre_tabla` usando su clave natural.
+
+    Parámetros:
+    - nombre_tabla (str): Tabla de destino.
+    - tabla_staging (str): Tabla temporal con los datos nuevos.
+    - columnas (list): Columnas a fusionar.
+
+    Retorna:
+    - str: Sentencia SQL.
+
+    Notas:
+    - Si la staging trae varias filas con la misma clave, se queda la última cargada.
+    - Solo se actualizan las filas cuyo contenido ha cambiado (`IS DISTINCT FROM`); si todas las columnas forman parte de
+      la clave, las filas existentes se ignoran.
     """
+    clave = CLAVES_NATURALES[nombre_tabla]
+    lista_columnas = ", ".join(columnas)
+    lista_clave = ", ".join(clave)
+    sentencia = f"""
+        INSERT INTO {nombre_tabla} ({lista_columnas})
+        SELECT DISTINCT ON ({lista_clave}) {lista_columnas}
+        FROM {tabla_staging}
+        ORDER BY {lista_clave}, ctid DESC
+        ON CONFLICT ({lista_clave})
+    """
+    no_clave = [columna for columna in columnas if columna not in clave]
+    if not no_clave:
+        return sentencia + " DO NOTHING"
+    asignaciones = ", ".join(f"{columna} = EXCLUDED.{columna}" for columna in no_clave)
+    actuales = ", ".join(f"{nombre_tabla}.{columna}" for columna in no_clave)
+    nuevos = ", ".join(f"EXCLUDED.{columna}" for columna in no_clave)
+    return sentencia + f" DO UPDATE SET {asignaciones} WHERE ROW({actuales}) IS DISTINCT FROM ROW({nuevos})"
+
+
+def _insertar_antecedentes_por_nombre(conn, df: pd.DataFrame, metodo, tamano_lote):
+    """
+    Carga en `equipos_antecedentes` las parejas (equipo_presente, escuderia_historica) por nombre, resolviendo los ids
+    con un cruce en la base de datos.
+    """
+    datos = df.loc[df["escuderia_historica"].notna(), ["equipo_presente", "escuderia_historica"]].drop_duplicates()
+
+    inicio = time.perf_counter()
+    with METRICAS.etapa("bbdd.insertar.equipos_antecedentes"):
+        cursor = conn.cursor()
+        cursor.execute("DROP TABLE IF EXISTS staging_equipos_antecedentes")
+        cursor.execute("CREATE TEMP TABLE staging_equipos_antecedentes (equipo_presente VARCHAR(200), escuderia_historica VARCHAR(200))")
+        _enviar_datos(cursor, "staging_equipos_antecedentes", datos, metodo, tamano_lote)
+        cursor.execute("""
+            INSERT INTO equipos_antecedentes (id_equipo_presente, id_escuderia_historica)
+            SELECT DISTINCT ep.id_equipo_presente, eh.id_escuderia
+            FROM staging_equipos_antecedentes s
+            JOIN equipos_presente ep ON ep.nombre = s.equipo_presente
+            JOIN escuderias_historicas eh ON eh.nombre = s.escuderia_historica
+            ON CONFLICT (id_equipo_presente, id_escuderia_historica) DO NOTHING
+        """)
+        filas_modificadas = cursor.rowcount
+        cursor.execute("DROP TABLE staging_equipos_antecedentes")
+        cursor.close()
+    segundos = time.perf_counter() - inicio
+    METRICAS.contar("bbdd_filas", len(datos), tabla="equipos_antecedentes")
+    METRICAS.contar("bbdd_filas_modificadas", filas_modificadas, tabla="equipos_antecedentes")
+
+    return {
+        "tabla": "equipos_antecedentes",
+        "filas": len(datos),
+        "filas_modificadas": filas_modificadas,
+        "segundos": segundos,
+        "filas_por_segundo": len(datos) / segundos if segundos > 0 else 0.0
+    }
+
+
+def cargar_tablas(datos, database_name=None, modo_commit="tabla", max_workers=4, refrescar=True, **opciones_carga):
+    """
+    Carga varias tablas respetando sus dependencias y cargando en paralelo las que son independientes.
+
+    Parámetros:
+    - datos (dict): Diccionario {nombre_tabla: DataFrame} con las tablas a cargar.
+    - database_name (str, opcional): Nombre de la base de datos.
+    - modo_commit (str, opcional): Cómo se confirman las cargas. Por defecto es "tabla".
+        - "tabla": cada tabla se carga en su propia conexión del pool y se confirma al terminar. Las tablas de un mismo
+          nivel de dependencias se cargan a la vez.
+        - "atomico": todas las tablas se cargan en una única conexión y transacción, en orden de dependencias, y se
+          confirman juntas; si alguna falla no se guarda ninguna.
+    - max_workers (int, opcional): Número máximo de tablas que se cargan a la vez en modo "tabla". Por defecto es 4.
+    - refrescar (bool, opcional): Si al terminar se refrescan las vistas materializadas que dependen de las tablas con
+      filas modificadas (`refrescar_vistas`). Por defecto es True.
+    - **opciones_carga: Opciones de `insertar_datos` (`metodo`, `tamano_lote`, `upsert`).
+
+    Retorna:
+    - dict: Diccionario {nombre_tabla: estadísticas} con lo que devuelve `insertar_datos` más "segundos_total", que incluye
+      la espera por la conexión y el `commit`.
+      Si se refresca alguna vista, se añade la clave "vistas_refrescadas" con lo que devuelve `refrescar_vistas`.
+
+    Notas:
+    - Las dependencias se declaran en `DEPENDENCIAS_TABLAS`; una tabla solo se carga cuando todas las tablas de las que
+      depende y que están en `datos` se han confirmado.
+    - El modo atómico no carga en paralelo: las conexiones distintas no pueden compartir una misma transacción y las
+      claves foráneas de `equipos_antecedentes` necesitan ver las filas de las tablas de las que depende.
+    - En modo "tabla", si una tabla falla se lanza la excepción y no se cargan los niveles siguientes; las tablas ya
+      confirmadas se mantienen.
+    - Cada vez que se confirma una carga con filas modificadas se incrementa `version_datos`, lo que invalida las cachés
+      de consultas.
+    """
+    if modo_commit not in ("tabla", "atomico"):
+        raise ValueError(f"Modo de commit no soportado: {modo_commit}")
+    niveles = _niveles_dependencias(list(datos))
+    informe = {}
+
+    if modo_commit == "atomico":
+        with conexion(database_name) as conn:
+            for nivel in niveles:
+                for nombre_tabla in nivel:
+                    inicio = time.perf_counter()
+                    informe[nombre_tabla] = insertar_datos(conn, datos[nombre_tabla], nombre_tabla, **opciones_carga)
+                    informe[nombre_tabla]["segundos_total"] = time.perf_counter() - inicio
+            tablas_modificadas = [nombre_tabla for nombre_tabla, estadisticas in informe.items() if estadisticas["filas_modificadas"]]
+            vistas_refrescadas = refrescar_vistas(conn, tablas_modificadas) if refrescar and tablas_modificadas else {}
+        if tablas_modificadas:
+            _incrementar_version_datos(database_name)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for nivel in niveles:
+                estadisticas = executor.map(lambda nombre_tabla: _cargar_tabla(datos[nombre_tabla], nombre_tabla, database_name, opciones_carga), nivel)
+                informe.update(zip(nivel, estadisticas))
+        tablas_modificadas = [nombre_tabla for nombre_tabla, estadisticas in informe.items() if estadisticas["filas_modificadas"]]
+        vistas_refrescadas = {}
+        if refrescar and tablas_modificadas:
+            with conexion(database_name) as conn:
+                vistas_refrescadas = refrescar_vistas(conn, tablas_modificadas)
+            _incrementar_version_datos(database_name)
+
+    for nombre_tabla, estadisticas in informe.items():
+        print(f"{nombre_tabla}: {estadisticas['filas']} filas ({estadisticas['filas_modificadas']} modificadas) en {estadisticas['segundos_total']:.2f} s")
+    for nombre_vista, segundos in vistas_refrescadas.items():
+        print(f"{nombre_vista}: refrescada en {segundos:.2f} s")
+    if vistas_refrescadas:
+        informe["vistas_refrescadas"] = vistas_refrescadas
+    return informe
+
+
+def cargar_en_flujo(registros, nombre_tabla, database_name=None, tamano_lote=200, refrescar=True, **opciones_carga):
+    """
+    Carga en una tabla los registros de un iterable a medida que llegan, por lotes confirmados uno a uno.
+
+    Parámetros:
+    - registros (iterable): Diccionarios con las columnas del DataFrame de la tabla (por ejemplo, los que genera
+      `iterar_historicos` para "mejores_pilotos"). Puede ser un generador: no se materializa entero.
+    - nombre_tabla (str): Tabla de destino, una de `COLUMNAS_TABLAS`.
+    - database_name (str, opcional): Nombre de la base de datos.
+    - tamano_lote (int, opcional): Número de registros que se insertan y confirman juntos. Por defecto es 200.
+    - refrescar (bool, opcional): Si al terminar se refrescan las vistas materializadas que dependen de la tabla. Por
+      defecto es True.
+    - **opciones_carga: Opciones de `insertar_datos` (`metodo`, `upsert`).
+
+    Retorna:
+    - dict: Estadísticas con "tabla", "filas", "filas_modificadas", "lotes", "segundos_primer_lote" (desde que se llama a
+      la función hasta que se confirma el primer lote), "segundos_total" y, si se refresca alguna vista,
+      "vistas_refrescadas".
+
+    Notas:
+    - Las inserciones se hacen en un hilo aparte con su propia conexión del pool, de modo que el iterable (y las
+      descargas que haya detrás) siguen avanzando mientras se escribe en la base de datos. Entre ambos hay una cola de
+      como mucho dos lotes, así que la memoria usada depende de `tamano_lote` y no del número total de registros.
+    - Cada lote se confirma por separado: si la carga falla a medias, los lotes anteriores se mantienen y, al usar
+      `upsert`, se puede repetir la carga completa sin duplicar filas.
+    - Si falla la inserción se deja de consumir el iterable y se lanza la excepción.
+    """
+    inicio = time.perf_counter()
+    lotes = queue.Queue(maxsize=2)
+    informe = {"tabla": nombre_tabla, "filas": 0, "filas_modificadas": 0, "lotes": 0, "segundos_primer_lote": None}
+    errores = []
+
+    def escritor():
+        try:
+            with conexion(database_name) as conn:
+                while (lote := lotes.get()) is not None:
+                    estadisticas = insertar_datos(conn, pd.DataFrame(lote), nombre_tabla, **opciones_carga)
+                    conn.commit()
+                    informe["filas"] += estadisticas["filas"]
+                    informe["filas_modificadas"] += estadisticas["filas_modificadas"]
+                    informe["lotes"] += 1
+                    if informe["segundos_primer_lote"] is None:
+                        informe["segundos_primer_lote"] = time.perf_counter() - inicio
+                        METRICAS.observar("bbdd_primer_lote_segundos", informe["segundos_primer_lote"], tabla=nombre_tabla)
+        except Exception as error:
+            errores.append(error)
+            while lotes.get() is not None:
+                pass
+
+    hilo = threading.Thread(target=escritor, daemon=True)
+    hilo.start()
+    try:
+        lote = []
+        for registro in registros:
+            if errores:
+                break
+            lote.append(registro)
+            if len(lote) >= tamano_lote:
+                lotes.put(lote)
+                lote = []
+        if lote and not errores:
+            lotes.put(lote)
+    finally:
+        lotes.put(None)
+        hilo.join()
+    if errores:
+        raise errores[0]
+
+    if informe["filas_modificadas"]:
+        if refrescar:
+            with conexion(database_name) as conn:
+                vistas_refrescadas = refrescar_vistas(conn, [nombre_tabla])
+            if vistas_refrescadas:
+                informe["vistas_refrescadas"] = vistas_refrescadas
+        _incrementar_version_datos(database_name)
+    informe["segundos_total"] = time.perf_counter() - inicio
+    print(f"{nombre_tabla}: {informe['filas']} filas ({informe['filas_modificadas']} modificadas) en {informe['lotes']} lotes y {informe['segundos_total']:.2f} s")
+    return informe
+
+
+def refrescar_vistas(conn, tablas=None, concurrente=True):
+    """
+    Refresca las vistas materializadas que dependen de las tablas indicadas.
+
+    Parámetros:
+    - conn (psycopg2.connection): Conexión a la base de datos.
+    - tablas (iterable, opcional): Tablas que han cambiado. Solo se refrescan las vistas de `VISTAS_MATERIALIZADAS` que
+      leen de alguna de ellas. Por defecto se refrescan todas.
+    - concurrente (bool, opcional): Si se usa `REFRESH MATERIALIZED VIEW CONCURRENTLY`, que no bloquea las lecturas de la
+      vista mientras se recalcula. Por defecto es True.
+
+    Retorna:
+    - dict: Diccionario {nombre_vista: segundos} con las vistas refrescadas.
+
+    Notas:
+    - La función no hace `commit`; la transacción queda abierta en `conn`.
+    """
+    refrescadas = {}
     cursor = conn.cursor()
-    for index, row in df.iterrows():
-        if nombre_tabla == "escuderias_historicas":
-            cursor.execute("""
-                INSERT INTO escuderias_historicas (nombre, nacionalidad, duracion)
-                VALUES (%s, %s, %s)
-            """, (row["nombre"], row["nacionalidad"], row["duracion"]))
-        elif nombre_tabla == "equipos_presente":
-            query = """
-                INSERT INTO equipos_presente (nombre,
-                motor,
-                base,
-                nacionalidad,
-                duracion,
-                carreras_ingresadas,
-                carreras_empezadas,
-                pilotos_totales,
-                total_inscripciones,
-                victorias,
-                puntos_totales,
-                poles,
-                vueltas_rapidas,
-                podios,
-                titulos_constructores,
-                titulos_pilotos,
-                escuderias_antecedentes
-            )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (
-                row["nombre"], row["motor"], row["base"], row["nacionalidad"], row["duracion"],
-                row["carreras_ingresadas"], row["carreras_empezadas"], row["pilotos_totales"],
-                row["total_inscripciones"], row["victorias"], row["puntos_totales"], row["cantidad_poles"],
-                row["vueltas_rapidas"], row["cantidad_podiums"], row["titulos_constructores"], row["titulos_pilotos"],
-                row["anteriores_equipos"]
-            ))
-        elif nombre_tabla == "datos_historicos":
-            query = """
-                INSERT INTO datos_historicos (carreras_inscritas,
-                carreras_empezadas,
-                pilotos_totales,
-                total_inscripciones,
-                victorias,
-                puntos_totales,
-                cantidad_poles,
-                vueltas_rapidas,
-                podios,
-                titulos_constructores,
-                titulos_pilotos)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (
-                row["carreras_inscritas"], row["carreras_empezadas"], row["pilotos_totales"],
-                row["total_inscripciones"], row["victorias"], row["puntos_totales"], row["cantidad_poles"],
-                row["vueltas_rapidas"], row["podios"], row["titulos_constructores"], row["titulos_pilotos"]
-            ))
-        elif nombre_tabla == "mejores_pilotos":
-            query = """
-                INSERT INTO mejores_pilotos (nombre,
-                temporada,
-                equipo,
-                puntos_totales_constructor,
-                total_carreras,
-                victorias,
-                podios,
-                puntos,
-                promedio_posicion_carrera,
-                promedio_posicion_clasificacion,
-                poles,
-                cantidad_dnf,
-                promedio_puntos,
-                titulo)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (
-                row["nombre"], row["temporada"], row["equipo"], row["puntos_totales_constructor"],
-                row["total_carreras"], row["victorias"], row["cantidad_podiums"], row["puntos"],
-                row["promedio_posicion_carrera"], row["promedio_posicion_clasificacion"],
-                row["poles"], row["cantidad_dnf"], row["promedio_puntos"], row["titulo"]
-            ))
-        elif nombre_tabla == "equipos_antecedentes":
-                query = """
-                    INSERT INTO equipos_antecedentes (id_equipo_presente, id_escuderia_historica)
-                    VALUES (%s, %s)
-                """
-                cursor.execute(query, (row["id_equipo_presente"], row["id_escuderia_historica"]))
-    
+    for nombre_vista, vista in VISTAS_MATERIALIZADAS.items():
+        if tablas is not None and not set(vista["tablas"]) & set(tablas):
+            continue
+        inicio = time.perf_counter()
+        with METRICAS.etapa(f"bbdd.refrescar.{nombre_vista}"):
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrente else ''}{nombre_vista}")
+        refrescadas[nombre_vista] = time.perf_counter() - inicio
     cursor.close()
+    return refrescadas
+
+
+def _cargar_tabla(df, nombre_tabla, database_name, opciones_carga):
+    """
+    Carga una tabla en su propia conexión del pool y la confirma.
+    """
+    inicio = time.perf_counter()
+    with conexion(database_name) as conn:
+        estadisticas = insertar_datos(conn, df, nombre_tabla, **opciones_carga)
+    if estadisticas["filas_modificadas"]:
+        _incrementar_version_datos(database_name)
+    estadisticas["segundos_total"] = time.perf_counter() - inicio
+    return estadisticas
+
+
+def _niveles_dependencias(tablas):
+    """
+    Agrupa las tablas en niveles según `DEPENDENCIAS_TABLAS`, de forma que cada tabla quede en un nivel posterior al de
+    todas las tablas de la lista de las que depende.
+
+    Parámetros:
+    - tablas (list): Nombres de las tablas a cargar.
+
+    Retorna:
+    - list: Lista de niveles; cada nivel es una lista de tablas que se pueden cargar a la vez.
+    """
+    pendientes = {tabla: {dependencia for dependencia in DEPENDENCIAS_TABLAS.get(tabla, ()) if dependencia in tablas} for tabla in tablas}
+    niveles = []
+    while pendientes:
+        nivel = [tabla for tabla, dependencias in pendientes.items() if not dependencias]
+        if not nivel:
+            raise ValueError(f"Dependencias circulares entre las tablas: {sorted(pendientes)}")
+        niveles.append(nivel)
+        for tabla in nivel:
+            del pendientes[tabla]
+        for dependencias in pendientes.values():
+            dependencias.difference_update(nivel)
+    return niveles
+
+
+def reemplazar_temporada(df: pd.DataFrame, temporada, database_name=None, refrescar=True, metodo="copy"):
+    """
+    Sustituye de forma atómica todas las filas de una temporada de `mejores_pilotos` por las de `df`.
+
+    Parámetros:
+    - df (pd.DataFrame): Datos de `mejores_pilotos` (como en `insertar_datos`). Solo se usan las filas de `temporada`.
+    - temporada (int): Temporada a sustituir.
+    - database_name (str, opcional): Nombre de la base de datos.
+    - refrescar (bool, opcional): Si al terminar se refrescan las vistas materializadas de `mejores_pilotos`. Por defecto
+      es True.
+    - metodo (str, opcional): "copy" o "execute_values", como en `insertar_datos`. Por defecto es "copy".
+
+    Retorna:
+    - dict: Estadísticas con "tabla", "temporada", "filas", "filas_anteriores" y "segundos" y, si se refresca alguna vista,
+      "vistas_refrescadas".
+
+    Notas:
+    - Requiere que `mejores_pilotos` esté particionada (`crear_tablas(..., particionado=...)`) y que la temporada tenga su
+      propia partición; si está dentro de una partición de década se lanza `ValueError`.
+    - Los datos se cargan en una tabla nueva con la misma estructura, una restricción `CHECK` sobre la temporada y ya con
+      la clave primaria y los índices de `mejores_pilotos` (`CLAVES_NATURALES` e `INDICES`), de modo que
+      `ATTACH PARTITION` no tiene que volver a comprobar las filas ni construir índices, solo enlazarlos. Después, en la
+      misma transacción, se separa y se borra la partición anterior y se adjunta la nueva en su lugar. Hasta el `commit`
+      las consultas siguen viendo los datos anteriores, y el resto de temporadas no se leen ni se escriben.
+    - `DETACH PARTITION` bloquea `mejores_pilotos` por completo (también para lectura) hasta el `commit`, pero solo durante
+      el intercambio, que no recorre filas. La carga y la creación de los índices se hacen antes, sin bloquear la tabla.
+    - Las vistas materializadas se refrescan después del `commit`, en otra transacción, para no alargar el bloqueo: entre
+      ambas, las vistas todavía muestran la temporada anterior.
+    - Si `df` trae varias filas del mismo piloto, se queda la última, igual que con el upsert de `insertar_datos`.
+    - Al terminar se incrementa `version_datos`.
+    """
+    temporada = int(temporada)
+    particion = f"mejores_pilotos_{temporada}"
+    particion_nueva = f"{particion}_nueva"
+    datos = _preparar_datos(df[df["temporada"].astype(int) == temporada], "mejores_pilotos")
+    datos = datos.drop_duplicates(list(CLAVES_NATURALES["mejores_pilotos"]), keep="last")
+
+    inicio = time.perf_counter()
+    with conexion(database_name) as conn:
+        cursor = conn.cursor()
+        if not _esta_particionada(cursor, "mejores_pilotos"):
+            raise ValueError("mejores_pilotos no está particionada; créala con crear_tablas(..., particionado=...)")
+        particion_actual = _particion_de_temporada(cursor, temporada)
+        if particion_actual not in (None, particion):
+            raise ValueError(f"La temporada {temporada} está en la partición {particion_actual}, que contiene otras temporadas")
+
+        with METRICAS.etapa("bbdd.reemplazar_temporada"):
+            cursor.execute(f"DROP TABLE IF EXISTS {particion_nueva}")
+            cursor.execute(f"CREATE TABLE {particion_nueva} (LIKE mejores_pilotos INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+            cursor.execute(f"ALTER TABLE {particion_nueva} ADD CONSTRAINT ck_{particion}_temporada CHECK (temporada IS NOT NULL AND temporada >= {temporada} AND temporada < {temporada + 1})")
+            _enviar_datos(cursor, particion_nueva, datos, metodo, 50000)
+            _crear_indices_particion(cursor, particion_nueva)
+
+            filas_anteriores = 0
+            if particion_actual is not None:
+                cursor.execute(f"SELECT COUNT(*) FROM {particion}")
+                filas_anteriores = cursor.fetchone()[0]
+                cursor.execute(f"ALTER TABLE mejores_pilotos DETACH PARTITION {particion}")
+                cursor.execute(f"DROP TABLE {particion}")
+            cursor.execute(f"ALTER TABLE {particion_nueva} RENAME TO {particion}")
+            cursor.execute(f"ALTER TABLE mejores_pilotos ATTACH PARTITION {particion} FOR VALUES FROM ({temporada}) TO ({temporada + 1})")
+        cursor.close()
+        conn.commit()
+        vistas_refrescadas = refrescar_vistas(conn, ["mejores_pilotos"]) if refrescar else {}
+    _incrementar_version_datos(database_name)
+
+    informe = {
+        "tabla": "mejores_pilotos",
+        "temporada": temporada,
+        "filas": len(datos),
+        "filas_anteriores": filas_anteriores,
+        "segundos": time.perf_counter() - inicio
+    }
+    if vistas_refrescadas:
+        informe["vistas_refrescadas"] = vistas_refrescadas
+    print(f"mejores_pilotos: temporada {temporada} sustituida ({filas_anteriores} -> {len(datos)} filas) en {informe['segundos']:.2f} s")
+    return informe
+
+
+def _crear_indices_particion(cursor, particion):
+    """
+    Crea en una tabla que se va a adjuntar a `mejores_pilotos` su clave primaria y los mismos índices que la tabla padre,
+    para que `ATTACH PARTITION` los enlace en lugar de construirlos.
+    """
+    cursor.execute(f"ALTER TABLE {particion} ADD PRIMARY KEY (id, temporada)")
+    cursor.execute(f"CREATE UNIQUE INDEX ON {particion} ({', '.join(CLAVES_NATURALES['mejores_pilotos'])})")
+    for definicion in INDICES.values():
+        nombre_tabla, _, columnas = definicion.partition(" ")
+        if nombre_tabla == "mejores_pilotos":
+            cursor.execute(f"CREATE INDEX ON {particion} {columnas}")
+
+
+def _esta_particionada(cursor, nombre_tabla):
+    cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", (nombre_tabla,))
+    return cursor.fetchone() is not None
+
+
+def _particion_de_temporada(cursor, temporada):
+    """
+    Devuelve el nombre de la partición de `mejores_pilotos` que contiene una temporada, o `None` si no hay ninguna.
+    """
+    decada = temporada - temporada % 10
+    cursor.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'mejores_pilotos'::regclass AND c.relname IN (%s, %s)
+    """, (f"mejores_pilotos_{temporada}", f"mejores_pilotos_{decada}s"))
+    fila = cursor.fetchone()
+    return fila[0] if fila else None
+
+
+def _crear_particiones_mejores_pilotos(cursor, particionado, hasta=None):
+    """
+    Crea las particiones de `mejores_pilotos` desde `PRIMERA_TEMPORADA` hasta `hasta` (por defecto, el año en curso).
+    """
+    hasta = hasta or datetime.now().year
+    desde = PRIMERA_TEMPORADA
+    if particionado == "decada":
+        decada_actual = hasta - hasta % 10
+        for decada in range(PRIMERA_TEMPORADA - PRIMERA_TEMPORADA % 10, decada_actual, 10):
+            if _particion_de_temporada(cursor, decada) is None:
+                cursor.execute(f"CREATE TABLE mejores_pilotos_{decada}s PARTITION OF mejores_pilotos FOR VALUES FROM ({decada}) TO ({decada + 10})")
+        desde = decada_actual
+    _asegurar_particiones(cursor, range(desde, hasta + 1))
+
+
+def _asegurar_particiones(cursor, temporadas):
+    """
+    Crea una partición por temporada para las temporadas de `mejores_pilotos` que aún no tienen partición.
+    """
+    for temporada in sorted({int(temporada) for temporada in temporadas}):
+        if _particion_de_temporada(cursor, temporada) is None:
+            cursor.execute(f"CREATE TABLE mejores_pilotos_{temporada} PARTITION OF mejores_pilotos FOR VALUES FROM ({temporada}) TO ({temporada + 1})")
+
+
+def _preparar_datos(df: pd.DataFrame, nombre_tabla):
+    """
+    Selecciona y renombra las columnas del DataFrame según `COLUMNAS_TABLAS` para cargarlas en `nombre_tabla`.
+
+    Parámetros:
+    - df (pd.DataFrame): DataFrame con los datos originales.
+    - nombre_tabla (str): Nombre de la tabla de destino.
+
+    Retorna:
+    - pd.DataFrame: DataFrame con las columnas de la tabla, en su orden.
+
+    Notas:
+    - Las columnas decimales cuyos valores son todos enteros (por ejemplo, conteos con huecos leídos de un CSV) se
+      convierten a enteros con nulos (`Int64`) para que `COPY` las acepte en columnas `INT`.
+    - Lanza `ValueError` si al DataFrame le falta alguna columna de la tabla, o si alguna fila tiene vacía una columna de
+      su clave natural (`CLAVES_NATURALES`): en PostgreSQL `NULL` no es igual a nada, así que esas filas nunca chocarían
+      con el `ON CONFLICT` del upsert y cada carga las volvería a insertar duplicadas.
+    """
+    columnas_tabla = COLUMNAS_TABLAS[nombre_tabla]
+    faltantes = [columna_df for columna_tabla, columna_df in columnas_tabla.items() if columna_df not in df.columns and columna_tabla not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas para cargar {nombre_tabla}: {', '.join(faltantes)}")
+
+    datos = pd.DataFrame({
+        columna_tabla: df[columna_df] if columna_df in df.columns else df[columna_tabla]
+        for columna_tabla, columna_df in columnas_tabla.items()
+    })
+    clave = list(CLAVES_NATURALES[nombre_tabla])
+    sin_clave = datos[clave].isna().any(axis=1)
+    if sin_clave.any():
+        raise ValueError(f"{int(sin_clave.sum())} filas de {nombre_tabla} tienen vacía su clave ({', '.join(clave)}); "
+                         f"primeras filas afectadas: {list(df.index[sin_clave.to_numpy()][:5])}")
+    for columna in datos.select_dtypes(include="float").columns:
+        valores = datos[columna].dropna()
+        if (valores == valores.round()).all():
+            datos[columna] = datos[columna].astype("Int64")
+    return datos
 
         
-def crear_tablas(database_name):
+def crear_tablas(database_name, particionado=None):
     """
     Crea las tablas necesarias en la base de datos PostgreSQL para el proyecto de análisis de Fórmula 1.
 
     Parámetros:
     - database_name (str): Nombre de la base de datos en la que se desean crear las tablas.
+    - particionado (str, opcional): Si `mejores_pilotos` se crea particionada por rango de "temporada". Por defecto es
+      `None` (una única tabla).
+        - "decada": una partición por cada década ya terminada ("mejores_pilotos_1950s", ...) y una por temporada en la
+          década en curso ("mejores_pilotos_2024", ...), de modo que la temporada abierta siempre se puede sustituir sola.
+        - "temporada": una partición por temporada.
 
     Las tablas que se crean son:
     - **escuderias_historicas**: Almacena información sobre escuderías históricas, incluyendo nombre, nacionalidad y duración.
     - **equipos_presente**: Almacena datos sobre los equipos presentes en la Fórmula 1, incluyendo información sobre motor, base, nacionalidad y estadísticas de carreras.
     - **datos_historicos**: Almacena información histórica relacionada con carreras, victorias, poles y campeonatos de los equipos históricos.
     - **mejores_pilotos**: Almacena datos sobre los pilotos más destacados de la historia de la Fórmula 1, incluyendo información sobre temporadas, victorias, podios y estadísticas de desempeño.
+    - **equipos_antecedentes**: Relaciona cada equipo presente con las escuderías históricas de las que procede.
+
+    Además se crean:
+    - Las claves foráneas de `equipos_antecedentes` y `CLAVES_FORANEAS` (los datos históricos de cada escudería deben
+      corresponder a una escudería de `escuderias_historicas`).
+    - Los índices de `INDICES`, para las consultas por equipo, por temporada y de campeones.
+    - Las vistas materializadas de `VISTAS_MATERIALIZADAS` (totales de carrera por piloto y por constructor), cada una
+      con un índice único para poder refrescarla con `REFRESH ... CONCURRENTLY` (ver `refrescar_vistas`).
 
-    La función establece una conexión a la base de datos, ejecuta las consultas SQL necesarias para crear las tablas, y luego cierra la conexión.
+    La función toma una conexión del pool compartido (`conexion`), ejecuta las consultas SQL necesarias para crear las tablas y la devuelve al pool tras hacer `commit`.
 
     Notas:
     - Si alguna de las tablas ya existe, la consulta `CREATE TABLE IF NOT EXISTS` se asegura de no duplicarla.
+    - Cada tabla recibe un índice único sobre su clave natural (`CLAVES_NATURALES`), que es el que usa `insertar_datos`
+      para hacer upsert. En una base de datos ya creada con filas duplicadas hay que eliminarlas antes de crear el índice.
+    - Las claves foráneas se añaden solo si no existen; en una base de datos ya creada con datos históricos de escuderías
+      que no están en `escuderias_historicas`, hay que corregirlos antes.
+    - Con `particionado`, los índices de `mejores_pilotos` se crean en la tabla padre y PostgreSQL los crea en cada
+      partición; las consultas que filtran por "temporada" solo leen las particiones afectadas. Se crean particiones desde
+      `PRIMERA_TEMPORADA` hasta la temporada actual; las de temporadas posteriores las crea `insertar_datos` al cargarlas.
+      Las temporadas se sustituyen de una en una con `reemplazar_temporada`.
+    - Si `mejores_pilotos` ya existe sin particionar, no se modifica: hay que borrarla (o renombrarla) antes para crearla
+      particionada.
     - En caso de error, se imprime un mensaje descriptivo del error.
     """
+    if particionado not in (None, *PARTICIONADOS):
+        raise ValueError(f"Particionado no soportado: {particionado}")
     try:
-        conn = establecer_conexion(database_name, "admin", "postgres")
-        cursor = conn.cursor()
+        with conexion(database_name) as conn:
+            cursor = conn.cursor()
         
-        query_escuderias_historicas = """
-            CREATE TABLE IF NOT EXISTS escuderias_historicas (
-                id_escuderia SERIAL PRIMARY KEY,
-                nombre VARCHAR(200),
-                nacionalidad VARCHAR(200),
-                duracion VARCHAR(200) 
-            );
-        """
-        cursor.execute(query_escuderias_historicas)
-
-        query_escuderias_presente = """
-            CREATE TABLE IF NOT EXISTS equipos_presente (
-                id_equipo_presente SERIAL PRIMARY KEY,
-                nombre VARCHAR(200),
-                motor VARCHAR(200),
-                base VARCHAR(200),
-                nacionalidad VARCHAR(200),
-                duracion VARCHAR(200),
-                carreras_ingresadas INT,
-                carreras_empezadas INT,
-                pilotos_totales INT,
-                total_inscripciones INT,
-                victorias INT,
-                puntos_totales INT,
-                poles INT,
-                vueltas_rapidas INT,
-                podios INT,
-                titulos_constructores INT,
-                titulos_pilotos INT
-            );
-        """
-        cursor.execute(query_escuderias_presente)
-
-        query_datos_historicos = """
-            CREATE TABLE IF NOT EXISTS datos_historicos (
-                id_registro SERIAL PRIMARY KEY,
-                carreras_inscritas INT,
-                carreras_empezadas INT,
-                pilotos_totales INT,
-                total_inscripciones INT,
-                victorias INT,
-                puntos_totales DECIMAL,
-                cantidad_poles INT,
-                vueltas_rapidas INT,
-                podios INT,
-                titulos_constructores DECIMAL,
-                titulos_pilotos DECIMAL,
-                escuderias_antecedentes VARCHAR(200)
-            );
-        """
-        cursor.execute(query_datos_historicos)
-
-        query_mejores_pilotos = """
-            CREATE TABLE IF NOT EXISTS mejores_pilotos (
-                id SERIAL PRIMARY KEY,
-                nombre VARCHAR(200),
-                temporada INT,
-                equipo VARCHAR(200),
-                puntos_totales_constructor DECIMAL,
-                total_carreras INT,
-                victorias INT,
-                podios INT,
-                puntos DECIMAL,
-                promedio_posicion_carrera DECIMAL,
-                promedio_posicion_clasificacion DECIMAL,
-                poles DECIMAL,
-                cantidad_dnf INT,
-                promedio_puntos DECIMAL,
-                titulo BOOLEAN
-            );
-        """
-        cursor.execute(query_mejores_pilotos)
+            query_escuderias_historicas = """
+                CREATE TABLE IF NOT EXISTS escuderias_historicas (
+                    id_escuderia SERIAL PRIMARY KEY,
+                    nombre VARCHAR(200),
+                    nacionalidad VARCHAR(200),
+                    duracion VARCHAR(200) 
+                );
+            """
+            cursor.execute(query_escuderias_historicas)
 
-        conn.commit()
-        print("Tables created successfully.")
+            query_escuderias_presente = """
+                CREATE TABLE IF NOT EXISTS equipos_presente (
+                    id_equipo_presente SERIAL PRIMARY KEY,
+                    nombre VARCHAR(200),
+                    motor VARCHAR(200),
+                    base VARCHAR(200),
+                    nacionalidad VARCHAR(200),
+                    duracion VARCHAR(200),
+                    carreras_ingresadas INT,
+                    carreras_empezadas INT,
+                    pilotos_totales INT,
+                    total_inscripciones INT,
+                    victorias INT,
+                    puntos_totales DECIMAL,
+                    poles INT,
+                    vueltas_rapidas INT,
+                    podios INT,
+                    titulos_constructores INT,
+                    titulos_pilotos INT,
+                    escuderias_antecedentes TEXT
+                );
+            """
+            cursor.execute(query_escuderias_presente)
 
-        cursor.close()
-        conn.close()
+            query_datos_historicos = """
+                CREATE TABLE IF NOT EXISTS datos_historicos (
+                    id_registro SERIAL PRIMARY KEY,
+                    nombre VARCHAR(200),
+                    carreras_inscritas INT,
+                    carreras_empezadas INT,
+                    pilotos_totales INT,
+                    total_inscripciones INT,
+                    victorias INT,
+                    puntos_totales DECIMAL,
+                    cantidad_poles INT,
+                    vueltas_rapidas INT,
+                    podios INT,
+                    titulos_constructores DECIMAL,
+                    titulos_pilotos DECIMAL,
+                    escuderias_antecedentes VARCHAR(200)
+                );
+            """
+            cursor.execute(query_datos_historicos)
+
+            query_mejores_pilotos = """
+                CREATE TABLE IF NOT EXISTS mejores_pilotos (
+                    id SERIAL PRIMARY KEY,
+                    nombre VARCHAR(200),
+                    temporada INT,
+                    equipo VARCHAR(200),
+                    puntos_totales_constructor DECIMAL,
+                    total_carreras INT,
+                    victorias INT,
+                    podios INT,
+                    puntos DECIMAL,
+                    promedio_posicion_carrera DECIMAL,
+                    promedio_posicion_clasificacion DECIMAL,
+                    poles DECIMAL,
+                    cantidad_dnf INT,
+                    promedio_puntos DECIMAL,
+                    titulo BOOLEAN
+                );
+            """
+            # Particionada, la clave primaria tiene que incluir la columna de partición.
+            query_mejores_pilotos_particionada = """
+                CREATE TABLE IF NOT EXISTS mejores_pilotos (
+                    id SERIAL,
+                    nombre VARCHAR(200),
+                    temporada INT,
+                    equipo VARCHAR(200),
+                    puntos_totales_constructor DECIMAL,
+                    total_carreras INT,
+                    victorias INT,
+                    podios INT,
+                    puntos DECIMAL,
+                    promedio_posicion_carrera DECIMAL,
+                    promedio_posicion_clasificacion DECIMAL,
+                    poles DECIMAL,
+                    cantidad_dnf INT,
+                    promedio_puntos DECIMAL,
+                    titulo BOOLEAN,
+                    PRIMARY KEY (id, temporada)
+                ) PARTITION BY RANGE (temporada);
+            """
+            cursor.execute(query_mejores_pilotos if particionado is None else query_mejores_pilotos_particionada)
+            if particionado is not None:
+                if _esta_particionada(cursor, "mejores_pilotos"):
+                    _crear_particiones_mejores_pilotos(cursor, particionado)
+                else:
+                    print("mejores_pilotos ya existe sin particionar; se deja como está")
+
+            # Columnas añadidas después de la primera versión del esquema, para bases de datos ya creadas
+            cursor.execute("ALTER TABLE equipos_presente ADD COLUMN IF NOT EXISTS escuderias_antecedentes TEXT;")
+            cursor.execute("ALTER TABLE datos_historicos ADD COLUMN IF NOT EXISTS nombre VARCHAR(200);")
+
+            # La clave natural de equipos_antecedentes es su clave primaria, así que no necesita un índice aparte
+            for nombre_tabla, clave in CLAVES_NATURALES.items():
+                if nombre_tabla != "equipos_antecedentes":
+                    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{nombre_tabla}_clave ON {nombre_tabla} ({', '.join(clave)});")
+
+            query_equipos_antecedentes = """
+                CREATE TABLE IF NOT EXISTS equipos_antecedentes (
+                    id_equipo_presente INT NOT NULL REFERENCES equipos_presente (id_equipo_presente) ON DELETE CASCADE,
+                    id_escuderia_historica INT NOT NULL REFERENCES escuderias_historicas (id_escuderia) ON DELETE CASCADE,
+                    PRIMARY KEY (id_equipo_presente, id_escuderia_historica)
+                );
+            """
+            cursor.execute(query_equipos_antecedentes)
+
+            for nombre_restriccion, sentencia in CLAVES_FORANEAS.items():
+                cursor.execute("SELECT 1 FROM pg_constraint WHERE conname = %s", (nombre_restriccion,))
+                if cursor.fetchone() is None:
+                    cursor.execute(sentencia)
+
+            for nombre_indice, definicion in INDICES.items():
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {nombre_indice} ON {definicion};")
+
+            for nombre_vista, vista in VISTAS_MATERIALIZADAS.items():
+                cursor.execute(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {nombre_vista} AS {vista['consulta']} WITH DATA;")
+                cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{nombre_vista} ON {nombre_vista} ({', '.join(vista['clave'])});")
+
+            cursor.close()
+            print("Tables created successfully.")
 
     except (Exception, psycopg2.DatabaseError) as error:
         print(f"Error al crear las tablas: {error}")
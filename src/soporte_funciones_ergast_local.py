@@ -0,0 +1,210 @@
+import csv
+import os
+import sqlite3
+from contextlib import closing
+from itertools import islice
+
+import pandas as pd
+
+from . import soporte_funciones_extraccion as sfe
+from .soporte_funciones_metricas import METRICAS
+
+VALOR_NULO = "\\N"
+
+# Tablas del volcado CSV de Ergast que se importan: fichero(s) admitidos y columnas que se conservan, con su tipo.
+TABLAS_DUMP = {
+    "races": (("races.csv",), {
+        "raceId": "INTEGER PRIMARY KEY", "year": "INTEGER", "round": "INTEGER", "name": "TEXT", "date": "TEXT"}),
+    "drivers": (("drivers.csv",), {
+        "driverId": "INTEGER PRIMARY KEY", "driverRef": "TEXT", "forename": "TEXT", "surname": "TEXT", "nationality": "TEXT"}),
+    "constructors": (("constructors.csv",), {
+        "constructorId": "INTEGER PRIMARY KEY", "constructorRef": "TEXT", "name": "TEXT", "nationality": "TEXT"}),
+    "results": (("results.csv",), {
+        "resultId": "INTEGER PRIMARY KEY", "raceId": "INTEGER", "driverId": "INTEGER", "constructorId": "INTEGER", "grid": "INTEGER",
+        "position": "INTEGER", "positionText": "TEXT", "positionOrder": "INTEGER", "points": "REAL", "statusId": "INTEGER"}),
+    "driver_standings": (("driver_standings.csv", "driverStandings.csv"), {
+        "driverStandingsId": "INTEGER PRIMARY KEY", "raceId": "INTEGER", "driverId": "INTEGER", "points": "REAL",
+        "position": "INTEGER", "wins": "INTEGER"}),
+    "constructor_standings": (("constructor_standings.csv", "constructorStandings.csv"), {
+        "constructorStandingsId": "INTEGER PRIMARY KEY", "raceId": "INTEGER", "constructorId": "INTEGER", "points": "REAL",
+        "position": "INTEGER", "wins": "INTEGER"})
+}
+
+INDICES_DUMP = {
+    "ix_results_year_driver": "results (year, driverId)",
+    "ix_results_driver_year": "results (driverId, year)",
+    "ix_results_race": "results (raceId)",
+    "ix_races_year_round": "races (year, round)",
+    "ix_drivers_ref": "drivers (driverRef)",
+    "ix_driver_standings_race": "driver_standings (raceId, position)",
+    "ix_constructor_standings_race": "constructor_standings (raceId, constructorId)"
+}
+
+SQL_RESULTADOS = """
+    SELECT s.orden, d.driverRef AS piloto, CAST(res.year AS TEXT) AS temporada, res.raceId AS carrera,
+           res.positionOrder AS posicion, COALESCE(res.grid, 0) AS posicion_clasificacion,
+           COALESCE(res.positionText, '') AS posicion_texto, res.points AS puntos, c.name AS equipo
+    FROM seleccion s
+    JOIN drivers d ON d.driverRef = s.driverRef
+    JOIN results res ON res.driverId = d.driverId
+    JOIN races ra ON ra.raceId = res.raceId
+    JOIN constructors c ON c.constructorId = res.constructorId
+    WHERE (:desde IS NULL OR res.year >= :desde) AND (:hasta IS NULL OR res.year <= :hasta)
+    ORDER BY s.orden, res.year, ra.round, res.positionOrder
+"""
+
+SQL_CAMPEONES = """
+    SELECT CAST(uc.year AS TEXT) AS temporada, d.driverRef AS campeon
+    FROM ultimas_carreras uc
+    JOIN driver_standings ds ON ds.raceId = uc.raceId AND ds.position = 1
+    JOIN drivers d ON d.driverId = ds.driverId
+"""
+
+SQL_PUNTOS_CONSTRUCTORES = """
+    SELECT CAST(uc.year AS TEXT) AS temporada, c.name AS equipo, cs.points AS puntos_totales_constructor
+    FROM ultimas_carreras uc
+    JOIN constructor_standings cs ON cs.raceId = uc.raceId
+    JOIN constructors c ON c.constructorId = cs.constructorId
+"""
+
+
+def importar_dump_ergast(directorio_csv, ruta_bbdd, tamano_lote=50000):
+    """
+    Importa el volcado CSV de Ergast en una base de datos SQLite local sobre la que calcular el histórico sin red.
+
+    Parámetros:
+    - directorio_csv (str): Carpeta con los CSV del volcado (`races.csv`, `results.csv`, `drivers.csv`, `constructors.csv`,
+      `driver_standings.csv` y `constructor_standings.csv`; también se aceptan `driverStandings.csv` y
+      `constructorStandings.csv`).
+    - ruta_bbdd (str): Fichero SQLite en el que guardar los datos. Si ya existe, sus tablas se vuelven a crear.
+    - tamano_lote (int, opcional): Filas que se leen del CSV e insertan de cada vez. Por defecto es 50000.
+
+    Retorna:
+    - dict: Diccionario {tabla: filas importadas}.
+
+    Notas:
+    - Solo se conservan las columnas que usa `obtener_historicos_local`, con los nombres del volcado. Los `\\N` se
+      guardan como NULL.
+    - A `results` se le añade la columna `year` de su carrera y se crean índices sobre (year, driverId), (driverId, year),
+      `raceId` y `driverRef`, de modo que consultar un piloto o una temporada no recorre la tabla entera.
+    - La tabla `ultimas_carreras` guarda, por temporada, la última carrera con clasificaciones, de la que se toman el
+      campeón y los puntos de los constructores.
+    - Antes de tocar la base de datos se comprueba que existen todos los CSV. Después, las tablas, los índices y las filas
+      se crean en una única transacción: si la importación falla a mitad (un CSV sin alguna columna, un valor mal
+      formado...), la base de datos queda como estaba.
+    """
+    rutas_csv = {tabla: _buscar_fichero(directorio_csv, ficheros) for tabla, (ficheros, _) in TABLAS_DUMP.items()}
+    filas_importadas = {}
+    # Sin `isolation_level=None`, sqlite3 confirma por su cuenta los DROP y CREATE TABLE antes de abrir la transacción de
+    # los INSERT; aquí la transacción se abre y se cierra a mano para que incluya también el esquema.
+    with closing(sqlite3.connect(ruta_bbdd, isolation_level=None)) as conn:
+        conn.execute("BEGIN")
+        try:
+            for tabla, (_, columnas) in TABLAS_DUMP.items():
+                with METRICAS.etapa("ergast_local.importar"):
+                    filas_importadas[tabla] = _importar_tabla(conn, tabla, rutas_csv[tabla], columnas, tamano_lote)
+
+            with METRICAS.etapa("ergast_local.indices"):
+                conn.execute("ALTER TABLE results ADD COLUMN year INTEGER")
+                conn.execute("UPDATE results SET year = (SELECT ra.year FROM races ra WHERE ra.raceId = results.raceId)")
+                for nombre_indice, definicion in INDICES_DUMP.items():
+                    conn.execute(f"CREATE INDEX {nombre_indice} ON {definicion}")
+                conn.execute("DROP TABLE IF EXISTS ultimas_carreras")
+                conn.execute("""
+                    CREATE TABLE ultimas_carreras AS
+                    SELECT ra.year, ra.raceId
+                    FROM races ra
+                    WHERE ra.round = (
+                        SELECT MAX(r2.round) FROM races r2
+                        WHERE r2.year = ra.year AND EXISTS (SELECT 1 FROM driver_standings ds WHERE ds.raceId = r2.raceId)
+                    )
+                """)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("ANALYZE")
+    return filas_importadas
+
+
+def obtener_historicos_local(pilotos, ruta_bbdd, temporadas=None):
+    """
+    Calcula el rendimiento histórico de los pilotos a partir del volcado de Ergast importado con `importar_dump_ergast`.
+
+    Parámetros:
+    - pilotos (list): Lista de identificadores de los pilotos (`driverRef`, el mismo identificador que en la API).
+    - ruta_bbdd (str): Fichero SQLite creado por `importar_dump_ergast`.
+    - temporadas (tuple, opcional): (desde, hasta) para limitar las temporadas, ambas incluidas. Cualquiera de los dos
+      extremos puede ser `None`. Por defecto se devuelven todas.
+
+    Retorna:
+    - pd.DataFrame: Las mismas columnas y filas que `obtener_historicos`, ordenadas por piloto (en el orden de `pilotos`)
+      y temporada.
+
+    Notas:
+    - En lugar de una petición por (piloto, temporada), los resultados de todos los pilotos se obtienen con una sola
+      consulta y el campeón y los puntos de constructor de cada temporada con otras dos, que se cruzan con `merge`.
+    - Las métricas se calculan con `_agregar_rendimiento`, igual que en la extracción desde la API, así que los promedios
+      y los redondeos coinciden. Como en la API, si un piloto tiene varios resultados en una carrera se toma el de mejor
+      posición.
+    - Los pilotos que no aparecen en el volcado no generan filas. Una temporada sin clasificación de pilotos deja
+      "titulo" a `None`; un equipo sin clasificación de constructores, "puntos_totales_constructor" a 0.
+    - El tiempo de cada etapa ("ergast_local.consulta", "historicos.agregar" y "historicos.clasificaciones") queda
+      registrado en `METRICAS`.
+    """
+    desde, hasta = temporadas if temporadas is not None else (None, None)
+    with closing(sqlite3.connect(ruta_bbdd)) as conn:
+        with METRICAS.etapa("ergast_local.consulta"):
+            conn.execute("CREATE TEMP TABLE seleccion (driverRef TEXT PRIMARY KEY, orden INTEGER)")
+            conn.executemany("INSERT OR IGNORE INTO seleccion VALUES (?, ?)", ((piloto, orden) for orden, piloto in enumerate(pilotos)))
+            df_resultados = pd.read_sql_query(SQL_RESULTADOS, conn, params={"desde": desde, "hasta": hasta})
+            df_campeones = pd.read_sql_query(SQL_CAMPEONES, conn)
+            df_constructores = pd.read_sql_query(SQL_PUNTOS_CONSTRUCTORES, conn)
+
+    with METRICAS.etapa("historicos.agregar"):
+        df_unidades = df_resultados.groupby(["piloto", "temporada"], sort=False)["carrera"].nunique().rename("total_carreras").reset_index()
+        df_resultados = df_resultados.drop_duplicates(["piloto", "carrera"])
+        df_rendimiento = sfe._agregar_rendimiento(df_resultados.drop(columns=["orden", "carrera"]), df_unidades)
+
+    with METRICAS.etapa("historicos.clasificaciones"):
+        campeon = df_rendimiento["temporada"].map(df_campeones.drop_duplicates("temporada").set_index("temporada")["campeon"])
+        titulo = df_rendimiento["piloto"].eq(campeon)
+        if campeon.isna().any():
+            titulo = titulo.astype(object).where(campeon.notna(), None)
+        df_rendimiento = df_rendimiento.merge(df_constructores.drop_duplicates(["temporada", "equipo"]), on=["temporada", "equipo"], how="left")
+        df_rendimiento["puntos_totales_constructor"] = df_rendimiento["puntos_totales_constructor"].fillna(0)
+        df_rendimiento["titulo"] = titulo
+
+    return df_rendimiento[sfe.COLUMNAS_HISTORICOS]
+
+
+def _buscar_fichero(directorio_csv, ficheros):
+    for fichero in ficheros:
+        ruta_csv = os.path.join(directorio_csv, fichero)
+        if os.path.exists(ruta_csv):
+            return ruta_csv
+    raise FileNotFoundError(f"No se encuentra {' ni '.join(ficheros)} en {directorio_csv}")
+
+
+def _importar_tabla(conn, tabla, ruta_csv, columnas, tamano_lote):
+    """
+    Vuelve a crear la tabla y la rellena desde el CSV por lotes de `tamano_lote` filas.
+
+    Retorna:
+    - int: Filas importadas.
+    """
+    conn.execute(f"DROP TABLE IF EXISTS {tabla}")
+    conn.execute(f"CREATE TABLE {tabla} ({', '.join(f'{columna} {tipo}' for columna, tipo in columnas.items())})")
+    sentencia = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})"
+
+    filas = 0
+    with open(ruta_csv, newline="", encoding="utf-8") as fichero:
+        lector = csv.DictReader(fichero)
+        faltan = set(columnas) - set(lector.fieldnames or [])
+        if faltan:
+            raise ValueError(f"A {ruta_csv} le faltan las columnas {sorted(faltan)}")
+        valores = ([None if fila[columna] == VALOR_NULO else fila[columna] for columna in columnas] for fila in lector)
+        while lote := list(islice(valores, tamano_lote)):
+            conn.executemany(sentencia, lote)
+            filas += len(lote)
+    return filas
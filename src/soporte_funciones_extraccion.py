@@ -1,24 +1,56 @@
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import requests
 from tqdm import tqdm
-from bs4 import BeautifulSoup
+import importlib.util
+import os
 import re
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from urllib.parse import urljoin
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from .soporte_funciones_http import crear_sesion, sesion_compartida
+from .soporte_funciones_metricas import METRICAS
 
-def obtener_historicos(pilotos):
+# bs4 y selenium se importan dentro de las funciones que los usan: la extracción de Ergast no los necesita y así no
+# hace falta instalarlos (ni pagar su tiempo de importación) en los trabajos que solo usan la API.
+
+PARSER_HTML = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+PATRON_REFERENCIAS = re.compile(r"\[.*?\]")
+PATRON_CLASE_WIKITABLE = re.compile(r"(^|\s)wikitable(\s|$)")
+PATRON_CLASE_COMUNICADO = re.compile(r"(^|\s)press-release-item(\s|$)")
+PATRON_AUDIENCIA = re.compile(r"audience|viewership|rating", re.IGNORECASE)
+URL_LIBERTY_MEDIA = "https://www.libertymedia.com/investors/news-events/press-releases"
+
+COLUMNAS_EQUIPOS_HISTORICOS = [
+    "nombre", "nacionalidad", "duracion", "carreras_inscritas", "carreras_empezadas", "pilotos_totales", "total_inscripciones",
+    "victorias", "puntos_totales", "cantidad_poles", "vueltas_rapidas", "podios", "titulos_constructores", "titulos_pilotos"]
+COLUMNAS_EQUIPOS_PRESENTES = [
+    "nombre", "motor", "nacionalidad", "base", "duracion", "carreras_ingresadas", "carreras_empezadas", "pilotos_totales",
+    "total_inscripciones", "victorias", "puntos_totales", "cantidad_poles", "vueltas_rapidas", "cantidad_podiums", "titulos_constructores", "titulos_pilotos", "anteriores_equipos"]
+COLUMNAS_HISTORICOS = ["piloto", "temporada", "equipo", "puntos_totales_constructor","total_carreras", "victorias", "podios", "puntos", "promedio_posicion_carrera", "promedio_posicion_clasificacion", "poles", "cantidad_dnf", "promedio_puntos", "titulo"]
+
+def obtener_historicos(pilotos, max_concurrencia=8, sesion=None, cache_clasificaciones=None, modo="piloto", diario=None):
     """
     Obtiene el rendimiento histórico de una lista de pilotos de Fórmula 1 utilizando la API de Ergast.
 
     Parámetros:
     - pilotos (list): Lista de identificadores de los pilotos (str) para los cuales se desea obtener el rendimiento histórico.
+    - max_concurrencia (int, opcional): Número máximo de peticiones simultáneas a la API. Por defecto es 8.
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar. Si no se indica, se crea una con un pool de
+      `max_concurrencia` conexiones mediante `crear_sesion`.
+    - cache_clasificaciones (CacheClasificaciones, opcional): Caché de clasificaciones por temporada. Si no se indica, se
+      crea una nueva para esta llamada. Pasar una propia permite consultar sus contadores o reutilizarla entre llamadas.
+    - modo (str, opcional): Forma de descargar los resultados de las carreras:
+        - "piloto" (por defecto): una petición `/{temporada}/drivers/{piloto}/results.json` por piloto y temporada.
+        - "temporada": una descarga paginada `/{temporada}/results.json` con todos los resultados de cada temporada, de la
+          que se extraen los de cada piloto. El número de peticiones crece con el número de temporadas y no con
+          pilotos × temporadas, por lo que conviene cuando se sigue a muchos pilotos.
+    - diario (DiarioExtraccion, opcional): Diario en disco en el que se va escribiendo cada (piloto, temporada) en cuanto
+      se calcula. Si la extracción se interrumpe, al repetir la llamada con el mismo diario solo se descarga lo que falta.
+      Solo se admite con `modo="piloto"`.
 
     Para cada piloto en la lista, la función realiza lo siguiente:
     - Obtiene todas las temporadas en las que participó.
@@ -47,88 +79,607 @@ def obtener_historicos(pilotos):
 
     Notas:
     - La función utiliza múltiples llamadas a la API de Ergast para obtener los datos de cada piloto y temporada.
+    - Las peticiones se reparten entre `max_concurrencia` hilos que comparten una única sesión HTTP, por lo que el tiempo
+      total depende del límite de concurrencia y no del número de peticiones. Las filas se devuelven en el mismo orden
+      (piloto y temporada) que en la versión secuencial.
+    - Los resultados de todas las carreras se aplanan en un DataFrame columnar y las métricas de cada (piloto, temporada)
+      se calculan con una única agregación `groupby`, en lugar de recorrer las carreras una a una.
     - Utiliza `tqdm` para mostrar el progreso de la descarga de datos.
-    - Requiere las funciones auxiliares `obtener_campeon` y `obtener_puntos_constructor` para determinar si un piloto fue campeón y los puntos del constructor.
-
-    """
-
-    rendimiento_pilotos = []
-    
-    for piloto in tqdm(pilotos):
-        url = f"https://ergast.com/api/f1/drivers/{piloto}/seasons.json"
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            for season in data["MRData"]["SeasonTable"]["Seasons"]:
-                temporada = season["season"]
-                url_stats = f"https://ergast.com/api/f1/{temporada}/drivers/{piloto}/results.json"
-                response_stats = requests.get(url_stats)
-                if response_stats.status_code == 200:
-                    data_stats = response_stats.json()
-                    victorias = 0
-                    podios = 0
-                    puntos = 0
-                    retiros = 0
-                    pole_positions = 0
-                    posicion_media_clasificacion = []
-                    posicion_media_carrera = []
-                    total_carreras = len(data_stats["MRData"]["RaceTable"]["Races"])
-                    constructor_principal = None
-                    for race in data_stats["MRData"]["RaceTable"]["Races"]:
-                        if "Results" in race and len(race["Results"]) > 0:
-                            resultado = race["Results"][0]
-                            posicion = int(resultado["position"])
-                            posicion_clasificacion = int(resultado.get("grid", 0))
-                            if resultado["position"] == "1":
-                                victorias += 1
-                            if int(resultado["position"]) <= 3:
-                                podios += 1
-                            if posicion_clasificacion == 1:
-                                pole_positions += 1
-                            if resultado.get("positionText", "") == "R":
-                                retiros += 1
-                            puntos += float(resultado["points"])
-                            posicion_media_carrera.append(posicion)
-                            posicion_media_clasificacion.append(posicion_clasificacion)
-                            if constructor_principal is None:
-                                constructor_principal = resultado["Constructor"]["name"]
-                    promedio_posicion_carrera = round(sum(posicion_media_carrera) / len(posicion_media_carrera), 2) if posicion_media_carrera else 0
-                    promedio_posicion_clasificacion = round(sum(posicion_media_clasificacion) / len(posicion_media_clasificacion), 2) if posicion_media_clasificacion else 0
-                    promedio_puntos = round(puntos / total_carreras, 2) if total_carreras > 0 else 0
-
-                    url_campeon = f"https://ergast.com/api/f1/{temporada}/driverStandings/1.json"
-                    es_campeon = obtener_campeon(url_campeon, piloto)
-
-                    url_constructor = f"https://ergast.com/api/f1/{temporada}/constructors/{constructor_principal.lower().replace(' ', '_')}/constructorStandings.json"
-                    puntos_totales_constructor = obtener_puntos_constructor(url_constructor)
-
-                    rendimiento_pilotos.append([
-                        piloto,
-                        temporada,
-                        constructor_principal,
-                        puntos_totales_constructor,
-                        total_carreras,
-                        victorias,
-                        podios,
-                        puntos,
-                        promedio_posicion_carrera,
-                        promedio_posicion_clasificacion,
-                        pole_positions,
-                        retiros,
-                        promedio_puntos,
-                        es_campeon
-                    ])
-
-    return pd.DataFrame(rendimiento_pilotos, columns=["piloto", "temporada", "equipo", "puntos_totales_constructor","total_carreras", "victorias", "podios", "puntos", "promedio_posicion_carrera", "promedio_posicion_clasificacion", "poles", "cantidad_dnf", "promedio_puntos", "titulo"])
-
-
-def obtener_campeon(url_campeon, piloto):
+    - El campeón y los puntos del constructor se obtienen a través de `CacheClasificaciones`, que descarga las
+      clasificaciones de cada temporada una sola vez aunque varios pilotos la hayan disputado.
+    - El tiempo de cada etapa ("historicos.temporadas", "historicos.descarga", "json", "historicos.aplanar",
+      "historicos.agregar" y "historicos.clasificaciones") queda registrado en `METRICAS`.
+    - Con `diario`, los registros se extraen con `iterar_historicos` y se escriben en disco a medida que llegan, por lo
+      que en memoria solo hay unos pocos a la vez; el DataFrame final se reúne leyendo el diario, con las filas en el
+      mismo orden y la columna "temporada" como entero. Las (piloto, temporada) cuya descarga falla no se escriben y se
+      vuelven a intentar en la siguiente llamada.
+
+    """
+    if modo not in ("piloto", "temporada"):
+        raise ValueError(f"Modo de extracción no soportado: {modo}")
+    if diario is not None:
+        if modo != "piloto":
+            raise ValueError("El diario de extracción solo se admite con modo='piloto'")
+        return _extraer_con_diario(pilotos, diario, max_concurrencia, sesion, cache_clasificaciones)
+    if sesion is None:
+        sesion = crear_sesion(max_conexiones=max_concurrencia)
+    if cache_clasificaciones is None:
+        cache_clasificaciones = CacheClasificaciones(sesion)
+
+    with ThreadPoolExecutor(max_workers=max_concurrencia) as executor:
+        with METRICAS.etapa("historicos.temporadas"):
+            temporadas_pilotos = list(tqdm(executor.map(lambda piloto: _obtener_temporadas(sesion, piloto), pilotos), total=len(pilotos)))
+        unidades = [(piloto, temporada) for piloto, temporadas in zip(pilotos, temporadas_pilotos) for temporada in temporadas]
+        return _extraer_unidades(unidades, sesion, cache_clasificaciones, executor, modo)
+
+
+def obtener_historicos_incremental(pilotos, historico, pilotos_historicos=None, temporada_actual=None, max_concurrencia=8, sesion=None, cache_clasificaciones=None, modo="piloto"):
+    """
+    Actualiza un histórico de rendimiento ya materializado descargando solo las temporadas que faltan o siguen abiertas.
+
+    Parámetros:
+    - pilotos (list): Lista de identificadores de los pilotos (str) en la API de Ergast.
+    - historico (pd.DataFrame o str): Histórico existente, o ruta al CSV en el que se guardó (por ejemplo
+      `datos/output/historico_mejores_pilotos.csv`). Acepta también el contenido de la tabla `mejores_pilotos`, cuya
+      columna "nombre" se trata como "piloto". Si la ruta no existe, se extrae el histórico completo.
+    - pilotos_historicos (list, opcional): Nombres completos de los pilotos, como en `formatear_datos_historicos`. Si se
+      indica, las filas nuevas se formatean con esos nombres y así se comparan con el histórico existente.
+    - temporada_actual (int, opcional): Primera temporada que se considera abierta y se vuelve a descargar siempre. Por
+      defecto es el año en curso.
+    - max_concurrencia (int, opcional): Número máximo de peticiones simultáneas a la API. Por defecto es 8.
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar.
+    - cache_clasificaciones (CacheClasificaciones, opcional): Caché de clasificaciones por temporada.
+    - modo (str, opcional): Forma de descargar los resultados, igual que en `obtener_historicos`. Por defecto es "piloto".
+
+    Retorna:
+    - pd.DataFrame: Histórico con las mismas columnas que `obtener_historicos`, ordenado por piloto (en el orden de
+      `pilotos`) y temporada. La columna "temporada" es de tipo entero, como al leer el CSV.
+
+    Notas:
+    - Se sigue haciendo una petición por piloto para conocer sus temporadas; el resto de peticiones solo se hacen para
+      las (piloto, temporada) que no están en el histórico o que son de la temporada actual.
+    - Las filas de temporadas abiertas del histórico se sustituyen por las recién calculadas.
+    - Las filas de pilotos que no están en `pilotos` se conservan al final.
+    """
+    if isinstance(historico, str):
+        historico = pd.read_csv(historico, index_col=0) if os.path.exists(historico) else pd.DataFrame(columns=COLUMNAS_HISTORICOS)
+    df_existente = historico.rename(columns={"nombre": "piloto"})[COLUMNAS_HISTORICOS]
+    if temporada_actual is None:
+        temporada_actual = datetime.now().year
+    nombre_mapeo = _mapeo_nombres(pilotos_historicos or [])
+    nombres = {piloto: _nombre_formateado(piloto, nombre_mapeo) for piloto in pilotos}
+
+    existentes = set(zip(df_existente["piloto"], df_existente["temporada"].astype(int)))
+    if sesion is None:
+        sesion = crear_sesion(max_conexiones=max_concurrencia)
+    if cache_clasificaciones is None:
+        cache_clasificaciones = CacheClasificaciones(sesion)
+
+    with ThreadPoolExecutor(max_workers=max_concurrencia) as executor:
+        temporadas_pilotos = list(executor.map(lambda piloto: _obtener_temporadas(sesion, piloto), pilotos))
+        unidades = [(piloto, temporada) for piloto, temporadas in zip(pilotos, temporadas_pilotos) for temporada in temporadas]
+        pendientes = [
+            (piloto, temporada) for piloto, temporada in unidades
+            if (nombres[piloto], int(temporada)) not in existentes or int(temporada) >= temporada_actual
+        ]
+        print(f"{len(pendientes)} de {len(unidades)} temporadas de pilotos pendientes de descargar")
+        df_nuevo = _extraer_unidades(pendientes, sesion, cache_clasificaciones, executor, modo)
+
+    if pilotos_historicos:
+        df_nuevo = formatear_datos_historicos(df_nuevo, pilotos_historicos)
+    df_nuevo["temporada"] = df_nuevo["temporada"].astype(int)
+
+    claves_nuevas = set(zip(df_nuevo["piloto"], df_nuevo["temporada"]))
+    claves_existentes = pd.Series(list(zip(df_existente["piloto"], df_existente["temporada"].astype(int))), index=df_existente.index, dtype=object)
+    abiertas = df_existente["temporada"].astype(int).ge(temporada_actual) & df_existente["piloto"].isin(nombres.values())
+    df_existente = df_existente[~(claves_existentes.isin(claves_nuevas) | abiertas)]
+
+    partes = [df for df in (df_existente, df_nuevo) if not df.empty] or [df_nuevo]
+    df_historico = pd.concat(partes, ignore_index=True)
+    df_historico["temporada"] = df_historico["temporada"].astype(int)
+    orden_pilotos = {nombre: posicion for posicion, nombre in enumerate(nombres.values())}
+    df_historico["_orden"] = df_historico["piloto"].map(orden_pilotos).fillna(len(orden_pilotos))
+    return df_historico.sort_values(["_orden", "temporada"], kind="stable").drop(columns="_orden").reset_index(drop=True)
+
+
+def _extraer_unidades(unidades, sesion, cache_clasificaciones, executor, modo):
+    """
+    Descarga y calcula el rendimiento de una lista de (piloto, temporada).
+
+    Parámetros:
+    - unidades (list): Tuplas (piloto, temporada) a extraer, en el orden de salida.
+    - sesion (requests.Session): Sesión HTTP a utilizar.
+    - cache_clasificaciones (CacheClasificaciones): Caché de clasificaciones por temporada.
+    - executor (ThreadPoolExecutor): Pool de hilos con el que lanzar las peticiones.
+    - modo (str): "piloto" o "temporada", como en `obtener_historicos`.
+
+    Retorna:
+    - pd.DataFrame: DataFrame con las columnas de `COLUMNAS_HISTORICOS`.
+    """
+    with METRICAS.etapa("historicos.descarga"):
+        if modo == "temporada":
+            temporadas = list(dict.fromkeys(temporada for _, temporada in unidades))
+            resultados_temporadas = dict(zip(temporadas, tqdm(executor.map(lambda temporada: _obtener_resultados_temporada(sesion, temporada), temporadas), total=len(temporadas))))
+            carreras_unidades = [
+                None if resultados_temporadas[temporada] is None else _filtrar_carreras_piloto(resultados_temporadas[temporada], piloto)
+                for piloto, temporada in unidades
+            ]
+        else:
+            carreras_unidades = list(tqdm(executor.map(lambda unidad: _obtener_resultados_piloto(sesion, *unidad), unidades), total=len(unidades)))
+
+    with METRICAS.etapa("historicos.aplanar"):
+        df_resultados, df_unidades = _aplanar_resultados(unidades, carreras_unidades)
+    with METRICAS.etapa("historicos.agregar"):
+        df_rendimiento = _agregar_rendimiento(df_resultados, df_unidades)
+    with METRICAS.etapa("historicos.clasificaciones"):
+        return _completar_clasificaciones(df_rendimiento, cache_clasificaciones, executor)
+
+
+def _extraer_con_diario(pilotos, diario, max_concurrencia, sesion, cache_clasificaciones, tamano_bloque=20):
+    """
+    Extrae con `iterar_historicos` las (piloto, temporada) que no están en el diario, las va añadiendo a él y devuelve
+    el histórico completo leído del diario.
+    """
+    completadas = diario.completadas()
+    if completadas:
+        print(f"{len(completadas)} temporadas de pilotos ya están en el diario, se continúa a partir de ellas")
+
+    bloque = []
+    for registro in iterar_historicos(pilotos, max_concurrencia=max_concurrencia, sesion=sesion, cache_clasificaciones=cache_clasificaciones, tamano_bloque=tamano_bloque, omitir=completadas):
+        bloque.append(registro)
+        if len(bloque) >= tamano_bloque:
+            diario.anadir(bloque)
+            bloque = []
+    diario.anadir(bloque)
+
+    df_historico = diario.leer(COLUMNAS_HISTORICOS)
+    df_historico = df_historico[df_historico["piloto"].isin(pilotos)]
+    df_historico["temporada"] = df_historico["temporada"].astype(int)
+    orden_pilotos = {piloto: posicion for posicion, piloto in enumerate(pilotos)}
+    return df_historico.sort_values(["piloto", "temporada"], key=lambda columna: columna.map(orden_pilotos) if columna.name == "piloto" else columna).reset_index(drop=True)
+
+
+def iterar_historicos(pilotos, max_concurrencia=8, sesion=None, cache_clasificaciones=None, tamano_bloque=20, max_pendientes=None, omitir=None):
+    """
+    Genera el rendimiento histórico de los pilotos registro a registro, a medida que terminan sus descargas.
+
+    Parámetros:
+    - pilotos (list): Lista de identificadores de los pilotos (str) en la API de Ergast.
+    - max_concurrencia (int, opcional): Número máximo de peticiones simultáneas a la API. Por defecto es 8.
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar. Si no se indica, se crea una con `crear_sesion`.
+    - cache_clasificaciones (CacheClasificaciones, opcional): Caché de clasificaciones por temporada.
+    - tamano_bloque (int, opcional): Número de (piloto, temporada) descargadas que se agregan juntas antes de emitirlas.
+      Por defecto es 20.
+    - max_pendientes (int, opcional): Número máximo de descargas de resultados lanzadas y aún no emitidas. Por defecto es
+      `4 * max_concurrencia`.
+    - omitir (set, opcional): Tuplas (piloto, temporada) con la temporada como entero que no se descargan, por ejemplo
+      las que ya están en un `DiarioExtraccion`.
+
+    Retorna:
+    - generator: Genera un diccionario por (piloto, temporada) con las claves de `COLUMNAS_HISTORICOS` y los mismos
+      valores que la fila correspondiente de `obtener_historicos`. La temporada se emite como entero.
+
+    Notas:
+    - Las descargas de resultados empiezan en cuanto llegan las temporadas de cada piloto, sin esperar a las del resto.
+    - Los registros salen en el orden en que terminan las descargas, no ordenados por piloto y temporada.
+    - Nunca hay más de `max_pendientes` descargas lanzadas sin emitir: si quien consume el generador va más lento (por
+      ejemplo, al insertar en la base de datos), las peticiones en curso terminan pero no se lanzan más. Así la memoria
+      no depende del número total de temporadas.
+    - Solo admite el modo "piloto" de `obtener_historicos`; el modo "temporada" necesita la temporada completa antes de
+      poder emitir ningún piloto.
+    - El tiempo hasta el primer registro se registra en `METRICAS` como "historicos_primer_registro_segundos".
+    """
+    if sesion is None:
+        sesion = crear_sesion(max_conexiones=max_concurrencia)
+    if cache_clasificaciones is None:
+        cache_clasificaciones = CacheClasificaciones(sesion)
+    if max_pendientes is None:
+        max_pendientes = 4 * max_concurrencia
+    omitir = omitir or set()
+
+    inicio = time.perf_counter()
+    primer_registro = True
+    with ThreadPoolExecutor(max_workers=max_concurrencia) as executor:
+        temporadas = {executor.submit(_obtener_temporadas, sesion, piloto): piloto for piloto in pilotos}
+        descargas = {}
+        unidades_pendientes = deque()
+        bloque = []
+
+        while temporadas or descargas or unidades_pendientes or bloque:
+            while unidades_pendientes and len(descargas) + len(bloque) < max_pendientes:
+                unidad = unidades_pendientes.popleft()
+                descargas[executor.submit(_obtener_resultados_piloto, sesion, *unidad)] = unidad
+
+            if temporadas or descargas:
+                terminados, _ = wait(list(temporadas) + list(descargas), return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    if futuro in temporadas:
+                        piloto = temporadas.pop(futuro)
+                        unidades_pendientes.extend((piloto, temporada) for temporada in futuro.result() if (piloto, int(temporada)) not in omitir)
+                    else:
+                        bloque.append((descargas.pop(futuro), futuro.result()))
+
+            if len(bloque) >= tamano_bloque or (bloque and not temporadas and not descargas and not unidades_pendientes) \
+                    or (bloque and len(descargas) + len(bloque) >= max_pendientes):
+                unidades, carreras_unidades = zip(*bloque)
+                bloque = []
+                with METRICAS.etapa("historicos.aplanar"):
+                    df_resultados, df_unidades = _aplanar_resultados(unidades, carreras_unidades)
+                if df_unidades.empty:
+                    continue
+                with METRICAS.etapa("historicos.agregar"):
+                    df_rendimiento = _agregar_rendimiento(df_resultados, df_unidades)
+                with METRICAS.etapa("historicos.clasificaciones"):
+                    df_rendimiento = _completar_clasificaciones(df_rendimiento, cache_clasificaciones, executor)
+                df_rendimiento["temporada"] = df_rendimiento["temporada"].astype(int)
+
+                if primer_registro:
+                    METRICAS.observar("historicos_primer_registro_segundos", time.perf_counter() - inicio)
+                    primer_registro = False
+                METRICAS.contar("historicos_registros", len(df_rendimiento))
+                for registro in df_rendimiento.to_dict("records"):
+                    yield registro
+
+
+def _obtener_temporadas(sesion, piloto):
+    """
+    Obtiene la lista de temporadas en las que participó un piloto.
+
+    Parámetros:
+    - sesion (requests.Session): Sesión HTTP a utilizar.
+    - piloto (str): Identificador del piloto en la API de Ergast.
+
+    Retorna:
+    - list: Temporadas (str) del piloto. Si la petición falla, retorna una lista vacía.
+    """
+    url = f"https://ergast.com/api/f1/drivers/{piloto}/seasons.json"
+    response = sesion.get(url)
+    if response.status_code != 200:
+        return []
+    with METRICAS.etapa("json"):
+        data = response.json()
+    return [season["season"] for season in data["MRData"]["SeasonTable"]["Seasons"]]
+
+
+def _obtener_resultados_piloto(sesion, piloto, temporada):
+    """
+    Descarga los resultados de un piloto en una temporada.
+
+    Parámetros:
+    - sesion (requests.Session): Sesión HTTP a utilizar.
+    - piloto (str): Identificador del piloto en la API de Ergast.
+    - temporada (str): Temporada (año) a consultar.
+
+    Retorna:
+    - list: Carreras (`Races`) de la temporada en las que participó el piloto, o `None` si la petición falla.
+    """
+    url_stats = f"https://ergast.com/api/f1/{temporada}/drivers/{piloto}/results.json"
+    response_stats = sesion.get(url_stats)
+    if response_stats.status_code != 200:
+        return None
+    with METRICAS.etapa("json"):
+        return response_stats.json()["MRData"]["RaceTable"]["Races"]
+
+
+def _obtener_resultados_temporada(sesion, temporada, tamano_pagina=1000):
+    """
+    Descarga todos los resultados de una temporada paginando con `limit`/`offset`.
+
+    Parámetros:
+    - sesion (requests.Session): Sesión HTTP a utilizar.
+    - temporada (str): Temporada (año) a consultar.
+    - tamano_pagina (int, opcional): Resultados por página. La API de Ergast admite como máximo 1000. Por defecto es 1000.
+
+    Retorna:
+    - list: Carreras (`Races`) de la temporada con los resultados de todos los pilotos, o `None` si alguna página falla.
+
+    Notas:
+    - La API pagina por resultados y no por carreras, así que una carrera puede quedar repartida entre dos páginas; sus
+      resultados se unen por ronda.
+    """
+    carreras = {}
+    offset = 0
+    total = None
+    while total is None or offset < total:
+        response = sesion.get(f"https://ergast.com/api/f1/{temporada}/results.json", params={"limit": tamano_pagina, "offset": offset})
+        if response.status_code != 200:
+            return None
+        with METRICAS.etapa("json"):
+            data = response.json()["MRData"]
+        total = int(data["total"])
+        for race in data["RaceTable"]["Races"]:
+            if race["round"] in carreras:
+                carreras[race["round"]]["Results"].extend(race.get("Results", []))
+            else:
+                carreras[race["round"]] = {**race, "Results": list(race.get("Results", []))}
+        offset += tamano_pagina
+    return list(carreras.values())
+
+
+def _filtrar_carreras_piloto(carreras, piloto):
+    """
+    Extrae de los resultados completos de una temporada las carreras de un piloto.
+
+    Parámetros:
+    - carreras (list): Carreras (`Races`) con los resultados de todos los pilotos.
+    - piloto (str): Identificador del piloto en la API de Ergast.
+
+    Retorna:
+    - list: Carreras en las que participó el piloto, cada una solo con sus resultados, igual que las devuelve
+      `/{temporada}/drivers/{piloto}/results.json`.
+    """
+    carreras_piloto = []
+    for race in carreras:
+        resultados = [resultado for resultado in race["Results"] if resultado["Driver"]["driverId"] == piloto]
+        if resultados:
+            carreras_piloto.append({**race, "Results": resultados})
+    return carreras_piloto
+
+
+def _aplanar_resultados(unidades, carreras_unidades):
+    """
+    Convierte las carreras descargadas de cada (piloto, temporada) en una tabla columnar con una fila por carrera.
+
+    Parámetros:
+    - unidades (list): Tuplas (piloto, temporada) en el orden en que deben aparecer en el resultado.
+    - carreras_unidades (list): Para cada unidad, sus carreras (`Races`) o `None` si la descarga falló.
+
+    Retorna:
+    - tuple: (`df_resultados`, `df_unidades`):
+        - `df_resultados` (pd.DataFrame): Una fila por carrera con el primer resultado del piloto en ella. Columnas "piloto",
+          "temporada", "posicion", "posicion_clasificacion", "posicion_texto", "puntos" y "equipo".
+        - `df_unidades` (pd.DataFrame): Una fila por unidad descargada correctamente, con "piloto", "temporada" y
+          "total_carreras".
+
+    Notas:
+    - Las unidades cuya descarga falló se descartan, igual que hacía el bucle original.
+    """
+    registros = []
+    unidades_validas = []
+    for (piloto, temporada), carreras in zip(unidades, carreras_unidades):
+        if carreras is None:
+            continue
+        unidades_validas.append((piloto, temporada, len(carreras)))
+        for race in carreras:
+            if "Results" in race and len(race["Results"]) > 0:
+                resultado = race["Results"][0]
+                registros.append((
+                    piloto,
+                    temporada,
+                    int(resultado["position"]),
+                    int(resultado.get("grid", 0)),
+                    resultado.get("positionText", ""),
+                    float(resultado["points"]),
+                    resultado["Constructor"]["name"]
+                ))
+
+    df_resultados = pd.DataFrame(registros, columns=["piloto", "temporada", "posicion", "posicion_clasificacion", "posicion_texto", "puntos", "equipo"])
+    df_unidades = pd.DataFrame(unidades_validas, columns=["piloto", "temporada", "total_carreras"])
+    return df_resultados, df_unidades
+
+
+def _agregar_rendimiento(df_resultados, df_unidades):
+    """
+    Calcula las métricas de cada (piloto, temporada) con una única agregación `groupby`.
+
+    Parámetros:
+    - df_resultados (pd.DataFrame): Resultados por carrera devueltos por `_aplanar_resultados`.
+    - df_unidades (pd.DataFrame): Unidades (piloto, temporada) con su "total_carreras", en el orden de salida.
+
+    Retorna:
+    - pd.DataFrame: Una fila por unidad con todas las columnas de `COLUMNAS_HISTORICOS` salvo "puntos_totales_constructor"
+      y "titulo", que se añaden en `_completar_clasificaciones`.
+
+    Notas:
+    - Las medias se redondean a dos decimales. Una unidad sin resultados conserva su fila con los contadores a 0 y sin equipo.
+    """
+    df_resultados = df_resultados.assign(
+        victoria=df_resultados["posicion"].eq(1),
+        podio=df_resultados["posicion"].le(3),
+        pole=df_resultados["posicion_clasificacion"].eq(1),
+        dnf=df_resultados["posicion_texto"].eq("R")
+    )
+    df_agregado = df_resultados.groupby(["piloto", "temporada"], sort=False).agg(
+        equipo=("equipo", "first"),
+        victorias=("victoria", "sum"),
+        podios=("podio", "sum"),
+        puntos=("puntos", "sum"),
+        promedio_posicion_carrera=("posicion", "mean"),
+        promedio_posicion_clasificacion=("posicion_clasificacion", "mean"),
+        poles=("pole", "sum"),
+        cantidad_dnf=("dnf", "sum")
+    ).reset_index()
+
+    df_rendimiento = df_unidades.merge(df_agregado, on=["piloto", "temporada"], how="left")
+    contadores = ["victorias", "podios", "poles", "cantidad_dnf"]
+    df_rendimiento[contadores] = df_rendimiento[contadores].astype(float).fillna(0).astype(int)
+    promedios = ["puntos", "promedio_posicion_carrera", "promedio_posicion_clasificacion"]
+    df_rendimiento[promedios] = df_rendimiento[promedios].astype(float).fillna(0)
+    df_rendimiento[promedios[1:]] = df_rendimiento[promedios[1:]].round(2)
+    total_carreras = df_rendimiento["total_carreras"]
+    df_rendimiento["promedio_puntos"] = (df_rendimiento["puntos"] / total_carreras.where(total_carreras > 0)).round(2).fillna(0)
+    return df_rendimiento
+
+
+def _completar_clasificaciones(df_rendimiento, cache_clasificaciones, executor):
+    """
+    Añade el campeón y los puntos del constructor a cada (piloto, temporada).
+
+    Parámetros:
+    - df_rendimiento (pd.DataFrame): Métricas devueltas por `_agregar_rendimiento`.
+    - cache_clasificaciones (CacheClasificaciones): Caché de la que obtener las clasificaciones.
+    - executor (ThreadPoolExecutor): Pool con el que descargar en paralelo las clasificaciones de temporadas distintas.
+
+    Retorna:
+    - pd.DataFrame: DataFrame con las columnas de `COLUMNAS_HISTORICOS` en su orden.
+
+    Notas:
+    - Solo se consulta la caché una vez por temporada y por (temporada, equipo); el resultado se reparte con `map`.
+    """
+    temporadas = list(dict.fromkeys(df_rendimiento["temporada"]))
+    campeones = dict(zip(temporadas, executor.map(cache_clasificaciones.campeon, temporadas)))
+
+    pares = list(dict.fromkeys(zip(df_rendimiento["temporada"], df_rendimiento["equipo"])))
+    puntos = dict(zip(pares, executor.map(lambda par: cache_clasificaciones.puntos_constructor(*par), pares)))
+
+    campeon = df_rendimiento["temporada"].map(campeones)
+    titulo = df_rendimiento["piloto"].eq(campeon)
+    if campeon.isna().any():
+        titulo = titulo.astype(object).where(campeon.notna(), None)
+
+    df_rendimiento = df_rendimiento.assign(
+        puntos_totales_constructor=[puntos[par] for par in zip(df_rendimiento["temporada"], df_rendimiento["equipo"])],
+        titulo=titulo
+    )
+    return df_rendimiento[COLUMNAS_HISTORICOS]
+
+
+class CacheClasificaciones:
+    """
+    Caché en memoria de las clasificaciones de pilotos y constructores de cada temporada.
+
+    El campeón de una temporada y los puntos de sus constructores no dependen del piloto consultado, por lo que esta
+    clase descarga una sola vez por temporada la clasificación de pilotos (`/{temporada}/driverStandings/1.json`) y la
+    clasificación completa de constructores (`/{temporada}/constructorStandings.json`) y responde el resto de consultas
+    desde memoria.
+
+    Parámetros:
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar. Si no se indica, se usa `sesion_compartida()`.
+
+    Atributos:
+    - aciertos (int): Consultas respondidas desde memoria.
+    - fallos (int): Consultas que han necesitado descargar la clasificación de la temporada.
+
+    Notas:
+    - Es segura para su uso desde varios hilos: si dos hilos piden a la vez la misma temporada, solo uno la descarga.
+    - Las descargas fallidas no se guardan, de modo que la siguiente consulta vuelve a intentarlo.
+    """
+
+    def __init__(self, sesion=None):
+        self.sesion = sesion if sesion is not None else sesion_compartida()
+        self.aciertos = 0
+        self.fallos = 0
+        self._campeones = {}
+        self._constructores = {}
+        self._bloqueo = threading.Lock()
+        self._bloqueos_temporada = {}
+
+    def es_campeon(self, temporada, piloto):
+        """
+        Indica si el piloto fue el campeón de la temporada.
+
+        Parámetros:
+        - temporada (str): Temporada (año) a consultar.
+        - piloto (str): Identificador del piloto en la API de Ergast.
+
+        Retorna:
+        - bool: `True` si el piloto fue campeón, `False` si no lo fue, o `None` si no hay clasificación disponible
+          (mismo comportamiento que `obtener_campeon`).
+        """
+        campeon = self.campeon(temporada)
+        if campeon is None:
+            return None
+        return campeon == piloto
+
+    def campeon(self, temporada):
+        """
+        Obtiene el campeón de pilotos de la temporada.
+
+        Parámetros:
+        - temporada (str): Temporada (año) a consultar.
+
+        Retorna:
+        - str: Identificador (`driverId`) del campeón, o `None` si no hay clasificación disponible.
+        """
+        return self._obtener(self._campeones, "pilotos", temporada, self._descargar_campeon)
+
+    def puntos_constructor(self, temporada, constructor):
+        """
+        Obtiene los puntos totales de un constructor en la temporada.
+
+        Parámetros:
+        - temporada (str): Temporada (año) a consultar.
+        - constructor (str): Nombre del constructor tal y como aparece en los resultados de la API (por ejemplo "Red Bull").
+
+        Retorna:
+        - float: Puntos totales del constructor en la temporada. Si no se encuentran datos, retorna 0.
+
+        Notas:
+        - El constructor se busca primero por su identificador (nombre en minúsculas con "_" en lugar de espacios, igual que
+          hacía `obtener_historicos`) y después por su nombre.
+        """
+        puntos = self._obtener(self._constructores, "constructores", temporada, self._descargar_constructores)
+        if not puntos or constructor is None:
+            return 0
+        identificador = constructor.lower().replace(" ", "_")
+        return puntos.get(identificador, puntos.get(constructor, 0))
+
+    def estadisticas(self):
+        """
+        Devuelve los contadores de uso de la caché.
+
+        Retorna:
+        - dict: Diccionario con las claves "aciertos", "fallos", "temporadas_pilotos" y "temporadas_constructores".
+        """
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "temporadas_pilotos": len(self._campeones),
+            "temporadas_constructores": len(self._constructores),
+        }
+
+    def _obtener(self, almacen, tipo, temporada, descargar):
+        with self._bloqueo:
+            if temporada in almacen:
+                self.aciertos += 1
+                return almacen[temporada]
+            bloqueo_temporada = self._bloqueos_temporada.setdefault((tipo, temporada), threading.Lock())
+
+        with bloqueo_temporada:
+            with self._bloqueo:
+                if temporada in almacen:
+                    self.aciertos += 1
+                    return almacen[temporada]
+                self.fallos += 1
+            valor, ok = descargar(temporada)
+            if ok:
+                with self._bloqueo:
+                    almacen[temporada] = valor
+            return valor
+
+    def _descargar_campeon(self, temporada):
+        response = self.sesion.get(f"https://ergast.com/api/f1/{temporada}/driverStandings/1.json")
+        if response.status_code != 200:
+            return None, False
+        with METRICAS.etapa("json"):
+            clasificaciones = response.json()["MRData"]["StandingsTable"]["StandingsLists"]
+        if not clasificaciones:
+            return None, True
+        return clasificaciones[0]["DriverStandings"][0]["Driver"]["driverId"], True
+
+    def _descargar_constructores(self, temporada):
+        response = self.sesion.get(f"https://ergast.com/api/f1/{temporada}/constructorStandings.json", params={"limit": 100})
+        if response.status_code != 200:
+            return {}, False
+        with METRICAS.etapa("json"):
+            clasificaciones = response.json()["MRData"]["StandingsTable"]["StandingsLists"]
+        puntos = {}
+        for clasificacion in clasificaciones:
+            for posicion in clasificacion["ConstructorStandings"]:
+                valor = float(posicion["points"])
+                puntos[posicion["Constructor"]["constructorId"]] = valor
+                puntos[posicion["Constructor"]["name"]] = valor
+        return puntos, True
+
+
+def obtener_campeon(url_campeon, piloto, sesion=None):
     """
     Verifica si el piloto especificado fue el campeón de la temporada correspondiente.
 
     Parámetros:
     - url_campeon (str): URL de la API de Ergast para obtener la información del campeón de la temporada.
     - piloto (str): Identificador del piloto que se desea verificar si ganó el campeonato.
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar. Si no se indica, se usa `sesion_compartida()`.
 
     La función realiza una petición HTTP a la URL proporcionada y verifica si el `driverId` del campeón coincide con el `piloto` especificado.
 
@@ -139,7 +690,8 @@ def obtener_campeon(url_campeon, piloto):
     - La función asume que la respuesta de la API contiene información sobre la clasificación del piloto en el primer lugar.
     - Si no hay información de la clasificación, la función retorna `False`.
     """
-    response_champion = requests.get(url_campeon)
+    cliente = sesion if sesion is not None else sesion_compartida()
+    response_champion = cliente.get(url_campeon)
     if response_champion.status_code == 200:
         data_champion = response_champion.json()
         if data_champion["MRData"]["StandingsTable"]["StandingsLists"]:
@@ -149,12 +701,13 @@ def obtener_campeon(url_campeon, piloto):
             else:
                 return False
 
-def obtener_puntos_constructor(url_constructor):
+def obtener_puntos_constructor(url_constructor, sesion=None):
     """
     Obtiene los puntos totales del constructor para una temporada específica utilizando la API de Ergast.
 
     Parámetros:
     - url_constructor (str): URL de la API de Ergast para obtener la clasificación del constructor de la temporada correspondiente.
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar. Si no se indica, se usa `sesion_compartida()`.
 
     La función realiza una petición HTTP a la URL proporcionada y extrae los puntos totales obtenidos por el constructor en esa temporada.
 
@@ -165,7 +718,8 @@ def obtener_puntos_constructor(url_constructor):
     - La función asume que la respuesta de la API contiene la clasificación del constructor en la temporada.
     - Si no hay información sobre la clasificación, la función retornará 0.
     """
-    response_constructor = requests.get(url_constructor)
+    cliente = sesion if sesion is not None else sesion_compartida()
+    response_constructor = cliente.get(url_constructor)
     puntos_totales_constructor = 0
     if response_constructor.status_code == 200:
         data_constructor = response_constructor.json()
@@ -192,17 +746,50 @@ def formatear_datos_historicos(df_rendimiento: pd.DataFrame, pilotos_historicos:
     - La función utiliza el apellido del piloto como clave para buscar su nombre completo en `pilotos_historicos`.
     - Si no se encuentra una correspondencia, se mantiene el valor original del identificador del piloto.
     """
-    nombre_mapeo = {piloto.split()[-1].lower(): piloto for piloto in pilotos_historicos}
-    df_rendimiento["piloto"] = df_rendimiento["piloto"].apply(lambda x: nombre_mapeo.get(str(x).split("_")[-1], x))
+    nombre_mapeo = _mapeo_nombres(pilotos_historicos)
+    df_rendimiento["piloto"] = df_rendimiento["piloto"].apply(lambda x: _nombre_formateado(x, nombre_mapeo))
     return df_rendimiento
 
+
+def normalizar_registros(registros, pilotos_historicos):
+    """
+    Sustituye el identificador de piloto de cada registro por su nombre completo, sin materializar los registros.
+
+    Parámetros:
+    - registros (iterable): Diccionarios con la clave "piloto", como los que genera `iterar_historicos`.
+    - pilotos_historicos (list): Lista de nombres completos de los pilotos históricos.
+
+    Retorna:
+    - generator: Los mismos registros con "piloto" formateado igual que en `formatear_datos_historicos`.
+    """
+    nombre_mapeo = _mapeo_nombres(pilotos_historicos)
+    for registro in registros:
+        registro["piloto"] = _nombre_formateado(registro["piloto"], nombre_mapeo)
+        yield registro
+
+
+def _mapeo_nombres(pilotos_historicos):
+    """
+    Construye el mapeo apellido (en minúsculas) -> nombre completo usado por `formatear_datos_historicos`.
+    """
+    return {piloto.split()[-1].lower(): piloto for piloto in pilotos_historicos}
+
+
+def _nombre_formateado(piloto, nombre_mapeo):
+    """
+    Devuelve el nombre completo de un identificador de piloto, o el propio identificador si no está en el mapeo.
+    """
+    return nombre_mapeo.get(str(piloto).split("_")[-1], piloto)
+
 # API 2
-def obtener_historial_escuderias(url):
+def obtener_historial_escuderias(url, sesion=None):
     """
     Obtiene el historial de escuderías de Fórmula 1 desde una API y devuelve la información en un DataFrame.
 
     Parámetros:
     - url (str): URL de la API desde la cual se desea obtener el historial de escuderías.
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar, por ejemplo una creada con `crear_sesion` y una
+      `CacheRespuestas`. Si no se indica, se usa `sesion_compartida()`.
 
     La función realiza una petición HTTP a la URL proporcionada y obtiene información sobre las escuderías,
     incluyendo el identificador del constructor, nombre y nacionalidad.
@@ -222,7 +809,8 @@ def obtener_historial_escuderias(url):
         "Content-Type": "application/json",
         "Authorization": "Bearer YOUR_API_KEY"
     }
-    response = requests.get(url, headers=headers)
+    cliente = sesion if sesion is not None else sesion_compartida()
+    response = cliente.get(url, headers=headers)
     if response.status_code == 200:
         data = response.json()
         for team in data.get("teams", []):
@@ -240,12 +828,14 @@ def obtener_historial_escuderias(url):
     return df_escuderias
 
 # Web scraping 1
-def obtener_equipos_historicos_wikipedia(url):
+def obtener_equipos_historicos_wikipedia(url, sesion=None):
     """
     Obtiene información sobre equipos históricos de Fórmula 1 desde una tabla de Wikipedia y la devuelve en un DataFrame.
 
     Parámetros:
     - url (str): URL de la página de Wikipedia desde la cual se desea extraer la información sobre los equipos históricos.
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar, por ejemplo una creada con `crear_sesion` y una
+      `CacheRespuestas`. Si no se indica, se usa `sesion_compartida()`.
 
     La función realiza una petición HTTP a la URL proporcionada y analiza el contenido HTML utilizando BeautifulSoup para extraer 
     una tabla con información sobre equipos históricos. Luego, limpia los datos eliminando referencias y ajusta ciertos valores 
@@ -273,37 +863,26 @@ def obtener_equipos_historicos_wikipedia(url):
     - Utiliza expresiones regulares para limpiar las referencias de texto (por ejemplo, "[1]").
     - Si la página no se encuentra o no tiene la estructura esperada, se retorna un DataFrame vacío.
     """
-    response = requests.get(url)
+    cliente = sesion if sesion is not None else sesion_compartida()
+    response = cliente.get(url)
     equipos_historicos = []
 
     if response.status_code == 200:
-        soup = BeautifulSoup(response.content, "html.parser")
-        tables = soup.find_all("table", class_="wikitable")
-        patron_regex = r"\[.*?\]"
-        if len(tables) > 1:
-            rows = tables[1].find_all("tr")
-            for row in rows[1:]:
-                cols = row.find_all("td")
-                resultados = []
-                if len(cols) > 1:
-                    for n in range(len(cols)):
-                        elemento = re.sub(patron_regex, "", cols[n].get_text(strip=True))
-                        if elemento == "n/a":
-                            elemento = pd.NA
-                        resultados.append(elemento)
-                    equipos_historicos.append(resultados)
-
-    df_equipos_historicos = pd.DataFrame(equipos_historicos, columns=[
-        "nombre", "nacionalidad", "duracion", "carreras_inscritas", "carreras_empezadas", "pilotos_totales", "total_inscripciones",
-        "victorias", "puntos_totales", "cantidad_poles", "vueltas_rapidas", "podios", "titulos_constructores", "titulos_pilotos"])
-    return df_equipos_historicos
-
-def obtener_equipos_presentes_wikipedia(url):
+        with METRICAS.etapa("wikipedia.analisis"):
+            tables = _tablas_wikitable(response.content)
+            if len(tables) > 1:
+                equipos_historicos = _filas_equipos_historicos(tables[1])
+
+    return pd.DataFrame(equipos_historicos, columns=COLUMNAS_EQUIPOS_HISTORICOS)
+
+def obtener_equipos_presentes_wikipedia(url, sesion=None):
     """
     Obtiene información sobre los equipos presentes de Fórmula 1 desde una tabla de Wikipedia y la devuelve en un DataFrame.
 
     Parámetros:
     - url (str): URL de la página de Wikipedia desde la cual se desea extraer la información sobre los equipos presentes.
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar, por ejemplo una creada con `crear_sesion` y una
+      `CacheRespuestas`. Si no se indica, se usa `sesion_compartida()`.
 
     La función realiza una petición HTTP a la URL proporcionada y analiza el contenido HTML utilizando BeautifulSoup para extraer 
     una tabla con información sobre los equipos presentes. Luego, limpia los datos eliminando referencias, caracteres especiales y 
@@ -335,69 +914,273 @@ def obtener_equipos_presentes_wikipedia(url):
     - Reemplaza "—" con "Sin equipos antecedentes" en la columna de equipos anteriores.
     - Si la página no se encuentra o no tiene la estructura esperada, se retorna un DataFrame vacío.
     """
-    response = requests.get(url)
+    cliente = sesion if sesion is not None else sesion_compartida()
+    response = cliente.get(url)
+    equipos_presentes = []
+
+    if response.status_code == 200:
+        with METRICAS.etapa("wikipedia.analisis"):
+            tables = _tablas_wikitable(response.content)
+            if len(tables) > 1:
+                equipos_presentes = _filas_equipos_presentes(tables[0])
+
+    return pd.DataFrame(equipos_presentes, columns=COLUMNAS_EQUIPOS_PRESENTES)
+
+
+def obtener_equipos_wikipedia(url, sesion=None, medir_memoria=False):
+    """
+    Obtiene en una sola descarga y un solo análisis los equipos históricos y los equipos presentes de Fórmula 1 desde Wikipedia.
+
+    Parámetros:
+    - url (str): URL de la página de Wikipedia con las tablas de constructores (`List_of_Formula_One_constructors`).
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar. Si no se indica, se usa `sesion_compartida()`.
+    - medir_memoria (bool, opcional): Si se mide con `tracemalloc` el pico de memoria del análisis. `tracemalloc` ralentiza
+      varias veces el análisis y el tiempo reportado incluye ese coste, por eso solo se activa bajo demanda. Por defecto es False.
+
+    Retorna:
+    - tuple: (`df_equipos_historicos`, `df_equipos_presentes`, `metricas`):
+        - `df_equipos_historicos` (pd.DataFrame): Mismo resultado que `obtener_equipos_historicos_wikipedia`.
+        - `df_equipos_presentes` (pd.DataFrame): Mismo resultado que `obtener_equipos_presentes_wikipedia`.
+        - `metricas` (dict): "bytes" descargados, "segundos_analisis" y "memoria_pico_bytes" del análisis HTML
+          (`None` si no se mide).
+
+    Notas:
+    - Sustituye a llamar por separado a `obtener_equipos_historicos_wikipedia` y `obtener_equipos_presentes_wikipedia`,
+      que descargan y analizan la misma página dos veces.
+    - Solo se construye el árbol de las tablas `wikitable` (`SoupStrainer`), con `lxml` si está instalado.
+    """
+    cliente = sesion if sesion is not None else sesion_compartida()
+    response = cliente.get(url)
+    equipos_historicos = []
     equipos_presentes = []
+    metricas = {"bytes": len(response.content), "segundos_analisis": 0.0, "memoria_pico_bytes": None}
 
     if response.status_code == 200:
-        soup = BeautifulSoup(response.content, "html.parser")
-        tables = soup.find_all("table", class_="wikitable")
-        patron_regex = r"\[.*?\]"
-        if len(tables) > 1:
-            rows = tables[0].find_all("tr")
-            for row in rows[1:]:
-                cols = row.find_all("td")
-                resultados = []
-                if len(cols) > 1:
-                    for n in range(len(cols)):
-                        elemento = re.sub(patron_regex, "", cols[n].get_text(strip=True))
-                        elemento = elemento.replace("/","")
-                        if elemento == "—":
-                            elemento = "Sin equipos antecedentes"
-                        resultados.append(elemento)
-                    equipos_presentes.append(resultados)
-
-    df_equipos_presentes = pd.DataFrame(equipos_presentes, columns=[
-        "nombre", "motor", "nacionalidad", "base", "duracion", "carreras_ingresadas", "carreras_empezadas", "pilotos_totales",
-        "total_inscripciones", "victorias", "puntos_totales", "cantidad_poles", "vueltas_rapidas", "cantidad_podiums", "titulos_constructores", "titulos_pilotos", "anteriores_equipos"
-    ])
-    return df_equipos_presentes
+        traza_previa = tracemalloc.is_tracing()
+        if medir_memoria:
+            if traza_previa:
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+            memoria_inicial = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+
+        with METRICAS.etapa("wikipedia.analisis"):
+            tables = _tablas_wikitable(response.content)
+            if len(tables) > 1:
+                equipos_presentes = _filas_equipos_presentes(tables[0])
+                equipos_historicos = _filas_equipos_historicos(tables[1])
+
+        metricas["segundos_analisis"] = time.perf_counter() - inicio
+        if medir_memoria:
+            metricas["memoria_pico_bytes"] = tracemalloc.get_traced_memory()[1] - memoria_inicial
+            if not traza_previa:
+                tracemalloc.stop()
+
+    df_equipos_historicos = pd.DataFrame(equipos_historicos, columns=COLUMNAS_EQUIPOS_HISTORICOS)
+    df_equipos_presentes = pd.DataFrame(equipos_presentes, columns=COLUMNAS_EQUIPOS_PRESENTES)
+    return df_equipos_historicos, df_equipos_presentes, metricas
+
+
+def _tablas_wikitable(contenido):
+    """
+    Analiza el HTML construyendo solo las tablas de clase `wikitable`.
+
+    Parámetros:
+    - contenido (bytes): HTML de la página.
+
+    Retorna:
+    - list: Tablas (`bs4.element.Tag`) en el orden en que aparecen en la página.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(contenido, PARSER_HTML, parse_only=SoupStrainer("table", class_=PATRON_CLASE_WIKITABLE))
+    return soup.find_all("table", class_="wikitable")
+
+
+def _filas_equipos_historicos(tabla):
+    """
+    Extrae y limpia las filas de la tabla de equipos históricos.
+    """
+    equipos_historicos = []
+    for row in tabla.find_all("tr")[1:]:
+        cols = row.find_all("td")
+        if len(cols) > 1:
+            resultados = []
+            for col in cols:
+                elemento = PATRON_REFERENCIAS.sub("", col.get_text(strip=True))
+                if elemento == "n/a":
+                    elemento = pd.NA
+                resultados.append(elemento)
+            equipos_historicos.append(resultados)
+    return equipos_historicos
+
+
+def _filas_equipos_presentes(tabla):
+    """
+    Extrae y limpia las filas de la tabla de equipos presentes.
+    """
+    equipos_presentes = []
+    for row in tabla.find_all("tr")[1:]:
+        cols = row.find_all("td")
+        if len(cols) > 1:
+            resultados = []
+            for col in cols:
+                elemento = PATRON_REFERENCIAS.sub("", col.get_text(strip=True))
+                elemento = elemento.replace("/","")
+                if elemento == "—":
+                    elemento = "Sin equipos antecedentes"
+                resultados.append(elemento)
+            equipos_presentes.append(resultados)
+    return equipos_presentes
 
 # Web scraping 2
-def obtener_datos_audiencia_liberty_media():
+def obtener_datos_audiencia_liberty_media(url=URL_LIBERTY_MEDIA, modo="navegador", max_concurrencia=8, navegadores=2, sesion=None, headless=True, timeout=10):
+    """
+    Obtiene los párrafos sobre audiencia de los comunicados de prensa de Liberty Media.
+
+    Parámetros:
+    - url (str, opcional): URL del listado de comunicados de prensa. Por defecto es `URL_LIBERTY_MEDIA`.
+    - modo (str, opcional): Cómo se descargan los comunicados. Por defecto es "navegador".
+        - "navegador": El listado y los comunicados se cargan con Chrome, repartiendo los comunicados entre `navegadores`
+          instancias que trabajan en paralelo.
+        - "http": El listado y los comunicados se descargan con peticiones HTTP concurrentes, sin navegador. Solo sirve si la
+          web entrega el listado en el HTML (por ejemplo, con un servidor local de pruebas).
+    - max_concurrencia (int, opcional): Número máximo de comunicados descargados a la vez en modo "http". Por defecto es 8.
+    - navegadores (int, opcional): Número de instancias de Chrome en modo "navegador". Por defecto es 2.
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar en modo "http". Si no se indica, se crea una.
+    - headless (bool, opcional): Si Chrome se ejecuta sin ventana. Por defecto es True.
+    - timeout (int, opcional): Segundos máximos de espera por cada página. Por defecto es 10.
+
+    Retorna:
+    - pd.DataFrame: DataFrame con la columna "descripcion", con un párrafo por fila en el orden de los comunicados.
+
+    Notas:
+    - Las URLs de los comunicados se recogen una sola vez del listado; ya no se navega con `click()` y `driver.back()`,
+      que obligaba a recargar el listado y dejaba elementos obsoletos (`StaleElementReferenceException`).
+    - Los párrafos se extraen del HTML de cada comunicado con BeautifulSoup y se filtran con `PATRON_AUDIENCIA`.
+    - Si un comunicado falla se muestra el error y se continúa con el resto.
+    """
+    if modo not in ("navegador", "http"):
+        raise ValueError(f"Modo no soportado: {modo}")
+
+    if modo == "http":
+        if sesion is None:
+            sesion = crear_sesion(max_conexiones=max_concurrencia)
+        enlaces = _enlaces_comunicados(sesion.get(url, timeout=timeout).content, url)
+        with ThreadPoolExecutor(max_workers=max_concurrencia) as executor:
+            parrafos_comunicados = list(executor.map(lambda enlace: _comunicado_http(sesion, enlace, timeout), enlaces))
+    else:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        driver = _crear_navegador(headless)
+        try:
+            driver.get(url)
+            WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.CLASS_NAME, "press-release-item")))
+            enlaces = _enlaces_comunicados(driver.page_source, driver.current_url)
+        finally:
+            driver.quit()
+        parrafos_comunicados = _comunicados_navegador(enlaces, navegadores, headless, timeout)
+
+    audiencia_data = [[parrafo] for parrafos in parrafos_comunicados for parrafo in parrafos]
+    return pd.DataFrame(audiencia_data, columns=["descripcion"])
+
+
+def _crear_navegador(headless):
+    from selenium import webdriver
+
     chrome_options = webdriver.ChromeOptions()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-gpu")
+    # Los comunicados son texto: no hace falta descargar imágenes.
+    chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return webdriver.Chrome(options=chrome_options)
 
-    prefs = {
-        "download.default_directory": r"C:/Bravo/Hackio/Modulo5/Proyecto/Proyecto5-Historico_Formula1/datos/raw",
-        "download.prompt_for_download": False,
-        "directory_upgrade": True,
-    }
 
-    chrome_options.add_experimental_option("prefs", prefs)
-    driver = webdriver.Chrome(options=chrome_options)
-    url = "https://www.libertymedia.com/investors/news-events/press-releases"
-    driver.get(url)
+def _enlaces_comunicados(contenido, url_base):
+    """
+    Extrae las URLs absolutas de los comunicados del HTML del listado, sin repetidas y en orden de aparición.
+
+    Notas:
+    - Cada comunicado es un elemento de clase `press-release-item`, que puede ser el propio enlace o contener uno.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(contenido, PARSER_HTML, parse_only=SoupStrainer(class_=PATRON_CLASE_COMUNICADO))
+    enlaces = []
+    for item in soup.find_all(class_=PATRON_CLASE_COMUNICADO):
+        enlace = item if item.name == "a" and item.get("href") else item.find("a", href=True)
+        if enlace is not None:
+            url_comunicado = urljoin(url_base, enlace["href"])
+            if url_comunicado not in enlaces:
+                enlaces.append(url_comunicado)
+    return enlaces
 
+
+def _parrafos_audiencia(contenido):
+    """
+    Devuelve el texto de los párrafos `<p>` del HTML que mencionan audiencia, espectadores o ratings.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(contenido, PARSER_HTML, parse_only=SoupStrainer("p"))
+    parrafos = []
+    for parrafo in soup.find_all("p"):
+        texto = " ".join(parrafo.get_text().split())
+        if PATRON_AUDIENCIA.search(texto):
+            parrafos.append(texto)
+    return parrafos
+
+
+def _comunicado_http(sesion, url, timeout):
     try:
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, "press-release-item")))
-        enlaces = driver.find_elements(By.CLASS_NAME, "press-release-item")
-        audiencia_data = []
-
-        for enlace in enlaces:
-            try:
-                enlace.click()
-                WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "p")))
-                parrafos = driver.find_elements(By.TAG_NAME, "p")
-                for parrafo in parrafos:
-                    texto = parrafo.text
-                    if "audience" in texto.lower() or "viewership" in texto.lower() or "rating" in texto.lower():
-                        audiencia_data.append([texto])
-                driver.back()
-            except Exception as e:
-                print(f"Error al procesar un enlace: {e}")
-                driver.back()
-
-        df_audiencia = pd.DataFrame(audiencia_data, columns=["descripcion"])
-    finally:
-        driver.quit()
-
-    return df_audiencia
+        response = sesion.get(url, timeout=timeout)
+        response.raise_for_status()
+        return _parrafos_audiencia(response.content)
+    except Exception as e:
+        print(f"Error al procesar un enlace: {e}")
+        return []
+
+
+def _comunicados_navegador(enlaces, navegadores, headless, timeout):
+    """
+    Reparte los comunicados entre varias instancias de Chrome que trabajan en paralelo.
+
+    Retorna:
+    - list: Párrafos de audiencia de cada comunicado, en el mismo orden que `enlaces`.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    resultados = [[] for _ in enlaces]
+    pendientes = iter(enumerate(enlaces))
+    bloqueo = threading.Lock()
+
+    def trabajador():
+        driver = _crear_navegador(headless)
+        try:
+            while True:
+                with bloqueo:
+                    siguiente = next(pendientes, None)
+                if siguiente is None:
+                    break
+                posicion, enlace = siguiente
+                try:
+                    driver.get(enlace)
+                    WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.TAG_NAME, "p")))
+                    resultados[posicion] = _parrafos_audiencia(driver.page_source)
+                except Exception as e:
+                    print(f"Error al procesar un enlace: {e}")
+        finally:
+            driver.quit()
+
+    num_navegadores = min(navegadores, len(enlaces))
+    if num_navegadores > 0:
+        with ThreadPoolExecutor(max_workers=num_navegadores) as executor:
+            for futuro in [executor.submit(trabajador) for _ in range(num_navegadores)]:
+                futuro.result()
+    return resultados
@@ -0,0 +1,583 @@
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .soporte_funciones_metricas import METRICAS
+
+TTL_TEMPORADA_ACTUAL = 60 * 60
+TTL_POR_DEFECTO = 24 * 60 * 60
+# Fracción de `max_bytes` hasta la que se vacía la caché al superarlo, para no desalojar en cada escritura.
+FRACCION_DESALOJO = 0.9
+PATRON_TEMPORADA_ERGAST = re.compile(r"/api/f1/(\d{4})/")
+CODIGOS_REINTENTO = {429, 500, 502, 503, 504}
+CODIGOS_ESTRANGULAMIENTO = {429, 503}
+
+_SESION_COMPARTIDA = None
+_BLOQUEO_SESION_COMPARTIDA = threading.Lock()
+
+
+def ttl_por_endpoint(url):
+    """
+    Calcula el tiempo de vida (TTL) en caché de la respuesta de una URL.
+
+    Parámetros:
+    - url (str): URL completa de la petición.
+
+    Retorna:
+    - int o None: Segundos durante los que la respuesta es válida, o `None` si no caduca nunca.
+
+    Notas:
+    - Las URLs de Ergast de temporadas ya cerradas (anteriores al año actual) no caducan, porque sus resultados no cambian.
+    - Las de la temporada actual y el resto de endpoints de Ergast (por ejemplo, las temporadas de un piloto) caducan en una hora.
+    - Cualquier otra URL (Wikipedia, API de equipos) caduca en un día.
+    """
+    coincidencia = PATRON_TEMPORADA_ERGAST.search(url)
+    if coincidencia:
+        if int(coincidencia.group(1)) < datetime.now().year:
+            return None
+        return TTL_TEMPORADA_ACTUAL
+    if "/api/f1/" in url:
+        return TTL_TEMPORADA_ACTUAL
+    return TTL_POR_DEFECTO
+
+
+class CacheRespuestas:
+    """
+    Caché en disco de respuestas HTTP, direccionada por el contenido de la petición (método, URL y cabeceras).
+
+    Parámetros:
+    - directorio (str): Carpeta donde se guardan las respuestas. Se crea si no existe.
+    - max_bytes (int, opcional): Tamaño máximo que puede ocupar la caché. Al superarlo se eliminan las respuestas usadas
+      hace más tiempo (LRU). Por defecto es 500 MB.
+    - ttl (callable, opcional): Función que recibe la URL y devuelve los segundos de validez de su respuesta, o `None` si no
+      caduca. Por defecto es `ttl_por_endpoint`.
+    - offline (bool, opcional): Si es `True`, las peticiones solo se responden desde la caché (incluidas las caducadas) y
+      nunca se accede a la red. Por defecto es False.
+
+    Notas:
+    - Cada respuesta se guarda en dos ficheros, `<clave>.json` con los metadatos y `<clave>.body` con el contenido, dentro de
+      una subcarpeta con los dos primeros caracteres de la clave.
+    - El orden LRU se guarda en memoria (clave -> tamaño), construido al crear la caché a partir de la fecha de
+      modificación de los ficheros `.body`, que se actualiza en cada acierto para conservar el orden entre ejecuciones.
+    - Al superar `max_bytes` se desalojan las respuestas menos usadas hasta bajar al 90% de `max_bytes`, de modo que las
+      escrituras siguientes no vuelven a desalojar enseguida.
+    - Varios procesos pueden compartir la carpeta (los ficheros temporales tienen nombres únicos), pero cada uno lleva su
+      propia cuenta de bytes: solo tiene en cuenta las respuestas que había al crearla y las que lee o escribe él mismo.
+    - Los metadatos se escriben después del contenido e incluyen su hash SHA-256, de modo que un lector que coincide con
+      una escritura y junta un contenido con los metadatos de otra versión lo detecta y lo trata como un fallo. Las
+      entradas guardadas por versiones anteriores, sin hash, se siguen aceptando.
+    - Solo se guardan las respuestas con código 200.
+    """
+
+    def __init__(self, directorio, max_bytes=500 * 1024 ** 2, ttl=ttl_por_endpoint, offline=False):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.offline = offline
+        self.aciertos = 0
+        self.fallos = 0
+        self._bloqueo = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+        self._indice = OrderedDict()
+        for _, ruta_body, tamano in sorted(self._ficheros_body()):
+            self._indice[os.path.basename(ruta_body)[:-len(".body")]] = tamano
+        self._bytes_totales = sum(self._indice.values())
+
+    def clave(self, metodo, url, cabeceras=None):
+        """
+        Calcula la clave de una petición.
+
+        Parámetros:
+        - metodo (str): Método HTTP.
+        - url (str): URL completa, incluidos los parámetros de la query.
+        - cabeceras (dict, opcional): Cabeceras indicadas explícitamente en la petición.
+
+        Retorna:
+        - str: Hash SHA-256 en hexadecimal.
+        """
+        cabeceras_ordenadas = sorted((str(k).lower(), str(v)) for k, v in (cabeceras or {}).items())
+        contenido = json.dumps([metodo.upper(), url, cabeceras_ordenadas])
+        return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+    def obtener(self, clave):
+        """
+        Busca una respuesta en la caché.
+
+        Parámetros:
+        - clave (str): Clave calculada con `clave`.
+
+        Retorna:
+        - requests.Response o None: Respuesta guardada, o `None` si no existe o ha caducado (salvo en modo offline).
+        """
+        ruta_meta, ruta_body = self._rutas(clave)
+        try:
+            with open(ruta_meta, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(ruta_body, "rb") as f:
+                contenido = f.read()
+        except (OSError, ValueError):
+            with self._bloqueo:
+                self.fallos += 1
+            return None
+
+        caducada = meta["caduca"] is not None and meta["caduca"] < time.time()
+        incompleta = "sha256" in meta and meta["sha256"] != hashlib.sha256(contenido).hexdigest()
+        if incompleta or (caducada and not self.offline):
+            with self._bloqueo:
+                self.fallos += 1
+            return None
+
+        try:
+            os.utime(ruta_body)
+        except OSError:
+            # Otro hilo ha desalojado la entrada después de leerla: la respuesta leída sigue siendo válida.
+            pass
+        with self._bloqueo:
+            self.aciertos += 1
+            if clave in self._indice:
+                self._indice.move_to_end(clave)
+            else:
+                # Guardada por otro proceso después de crear la caché.
+                self._indice[clave] = len(contenido)
+                self._bytes_totales += len(contenido)
+        return self._construir_respuesta(meta, contenido)
+
+    def guardar(self, clave, response):
+        """
+        Guarda una respuesta en la caché y aplica el desalojo LRU si se supera `max_bytes`.
+
+        Parámetros:
+        - clave (str): Clave calculada con `clave`.
+        - response (requests.Response): Respuesta a guardar. Solo se guarda si su código es 200.
+        """
+        if response.status_code != 200:
+            return
+        ttl = self.ttl(response.url)
+        meta = {
+            "url": response.url,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "encoding": response.encoding,
+            "headers": dict(response.headers),
+            "guardada": time.time(),
+            "caduca": None if ttl is None else time.time() + ttl,
+            "sha256": hashlib.sha256(response.content).hexdigest(),
+        }
+        ruta_meta, ruta_body = self._rutas(clave)
+        carpeta = os.path.dirname(ruta_meta)
+        os.makedirs(carpeta, exist_ok=True)
+
+        # Nombres temporales únicos también entre procesos que comparten la carpeta.
+        with tempfile.NamedTemporaryFile(dir=carpeta, prefix=clave, suffix=".tmp", delete=False) as f:
+            f.write(response.content)
+            temporal_body = f.name
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=carpeta, prefix=clave, suffix=".tmp", delete=False) as f:
+            json.dump(meta, f)
+            temporal_meta = f.name
+        # Los metadatos se sustituyen los últimos: hasta entonces, un lector ve los anteriores y su hash no coincide con
+        # el contenido nuevo.
+        os.replace(temporal_body, ruta_body)
+        os.replace(temporal_meta, ruta_meta)
+
+        with self._bloqueo:
+            self._bytes_totales += len(response.content) - self._indice.pop(clave, 0)
+            self._indice[clave] = len(response.content)
+            if self._bytes_totales > self.max_bytes:
+                self._desalojar()
+
+    def estadisticas(self):
+        """
+        Devuelve los contadores de uso de la caché.
+
+        Retorna:
+        - dict: Diccionario con las claves "aciertos", "fallos" y "bytes".
+        """
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "bytes": self._bytes_totales}
+
+    def _desalojar(self):
+        """
+        Borra las respuestas menos usadas hasta bajar a `FRACCION_DESALOJO` de `max_bytes`. Se llama con el bloqueo
+        tomado; solo recorre el índice en memoria, no la carpeta.
+        """
+        objetivo = self.max_bytes * FRACCION_DESALOJO
+        while self._indice and self._bytes_totales > objetivo:
+            clave, tamano = self._indice.popitem(last=False)
+            self._bytes_totales -= tamano
+            for ruta in self._rutas(clave):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+
+    def _ficheros_body(self):
+        """
+        Recorre los ficheros `.body` de la caché.
+
+        Retorna:
+        - generator: Tuplas (fecha_modificacion, ruta, tamano).
+        """
+        for carpeta, _, ficheros in os.walk(self.directorio):
+            for fichero in ficheros:
+                if fichero.endswith(".body"):
+                    ruta = os.path.join(carpeta, fichero)
+                    try:
+                        estado = os.stat(ruta)
+                    except OSError:
+                        continue
+                    yield estado.st_mtime, ruta, estado.st_size
+
+    def _rutas(self, clave):
+        base = os.path.join(self.directorio, clave[:2], clave)
+        return base + ".json", base + ".body"
+
+    @staticmethod
+    def _construir_respuesta(meta, contenido):
+        response = requests.Response()
+        response.status_code = meta["status_code"]
+        response.reason = meta["reason"]
+        response.encoding = meta["encoding"]
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response.url = meta["url"]
+        response._content = contenido
+        response.elapsed = timedelta(0)
+        response.from_cache = True
+        return response
+
+
+class LimitadorAdaptativo:
+    """
+    Limitador de peticiones por host con cubo de tokens y concurrencia adaptativa.
+
+    Parámetros:
+    - peticiones_por_segundo (float, opcional): Ritmo inicial de cada host. Por defecto es 10.
+    - concurrencia (int, opcional): Número inicial y máximo de peticiones simultáneas a cada host. Por defecto es 10.
+    - minimo_peticiones_por_segundo (float, opcional): Ritmo por debajo del cual no se reduce nunca. Por defecto es 0.5.
+    - maximo_peticiones_por_segundo (float, opcional): Ritmo máximo al que puede crecer. Por defecto no tiene límite.
+
+    Notas:
+    - El ritmo se ajusta como en el control de congestión de TCP (AIMD): hasta el primer estrangulamiento (429, 503 o
+      timeout) crece un 50% por segundo; a partir de ahí, cada respuesta correcta lo aumenta en torno a una petición por
+      segundo cada segundo, y cada estrangulamiento lo reduce a la mitad. Así el extractor converge al ritmo más alto que
+      el servidor acepta sin ajustarlo a mano.
+    - Los timeouts reducen además a la mitad la concurrencia del host, que vuelve a crecer en uno por cada tanda de
+      respuestas correctas.
+    - El cubo admite como máximo un token, así que las peticiones salen espaciadas de forma uniforme y sin ráfagas.
+    - Un `Retry-After` del servidor pausa todas las peticiones a ese host, no solo la que lo recibió.
+    - Es seguro compartirlo entre hilos.
+    """
+
+    def __init__(self, peticiones_por_segundo=10.0, concurrencia=10, minimo_peticiones_por_segundo=0.5, maximo_peticiones_por_segundo=None):
+        self.peticiones_por_segundo = peticiones_por_segundo
+        self.concurrencia = concurrencia
+        self.minimo_peticiones_por_segundo = minimo_peticiones_por_segundo
+        self.maximo_peticiones_por_segundo = maximo_peticiones_por_segundo
+        self._hosts = {}
+        self._condicion = threading.Condition()
+
+    def adquirir(self, host):
+        """
+        Espera hasta que se pueda lanzar una petición al host y la registra como en curso.
+
+        Parámetros:
+        - host (str): Host de destino (por ejemplo "ergast.com").
+        """
+        with self._condicion:
+            estado = self._estado(host)
+            while True:
+                ahora = time.monotonic()
+                estado["tokens"] = min(1.0, estado["tokens"] + (ahora - estado["ultimo"]) * estado["tasa"])
+                estado["ultimo"] = ahora
+                if ahora < estado["pausa_hasta"]:
+                    espera = estado["pausa_hasta"] - ahora
+                elif estado["en_curso"] >= estado["concurrencia"]:
+                    espera = None
+                elif estado["tokens"] < 1:
+                    espera = (1 - estado["tokens"]) / estado["tasa"]
+                else:
+                    estado["tokens"] -= 1
+                    estado["en_curso"] += 1
+                    return
+                self._condicion.wait(espera)
+
+    def liberar(self, host, estrangulada=False, espera=None, timeout=False):
+        """
+        Registra el final de una petición y ajusta el ritmo y la concurrencia del host.
+
+        Parámetros:
+        - host (str): Host de destino.
+        - estrangulada (bool, opcional): Si el servidor ha limitado la petición (429, 503 o timeout). Por defecto es False.
+        - espera (float, opcional): Segundos indicados en `Retry-After` durante los que no se envían peticiones al host.
+        - timeout (bool, opcional): Si la petición ha agotado su timeout. Además de reducir el ritmo, reduce a la mitad la
+          concurrencia del host. Por defecto es False.
+        """
+        with self._condicion:
+            estado = self._estado(host)
+            estado["en_curso"] -= 1
+            if estrangulada or timeout:
+                estado["tasa"] = max(self.minimo_peticiones_por_segundo, estado["tasa"] / 2)
+                estado["tokens"] = min(estado["tokens"], 0.0)
+                if timeout:
+                    estado["concurrencia"] = max(1, estado["concurrencia"] // 2)
+                estado["exitos"] = 0
+                estado["estrangulamientos"] += 1
+                if espera:
+                    estado["pausa_hasta"] = max(estado["pausa_hasta"], time.monotonic() + espera)
+            else:
+                # Arranque rápido (como el "slow start" de TCP): hasta el primer estrangulamiento el ritmo crece de forma
+                # multiplicativa; después, de forma aditiva.
+                estado["tasa"] += 0.5 if estado["estrangulamientos"] == 0 else 1 / estado["tasa"]
+                if self.maximo_peticiones_por_segundo is not None:
+                    estado["tasa"] = min(self.maximo_peticiones_por_segundo, estado["tasa"])
+                estado["exitos"] += 1
+                if estado["exitos"] >= estado["concurrencia"]:
+                    estado["concurrencia"] = min(self.concurrencia, estado["concurrencia"] + 1)
+                    estado["exitos"] = 0
+            self._condicion.notify_all()
+
+    def estadisticas(self):
+        """
+        Devuelve el estado actual de cada host.
+
+        Retorna:
+        - dict: Para cada host, un diccionario con "peticiones_por_segundo", "concurrencia" y "estrangulamientos".
+        """
+        with self._condicion:
+            return {
+                host: {
+                    "peticiones_por_segundo": round(estado["tasa"], 2),
+                    "concurrencia": estado["concurrencia"],
+                    "estrangulamientos": estado["estrangulamientos"],
+                }
+                for host, estado in self._hosts.items()
+            }
+
+    def _estado(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = {
+                "tasa": self.peticiones_por_segundo,
+                "tokens": 1.0,
+                "ultimo": time.monotonic(),
+                "concurrencia": self.concurrencia,
+                "en_curso": 0,
+                "exitos": 0,
+                "estrangulamientos": 0,
+                "pausa_hasta": 0.0,
+            }
+        return self._hosts[host]
+
+
+class SesionHTTP(requests.Session):
+    """
+    Sesión HTTP con caché en disco, limitación de ritmo por host y reintentos con backoff exponencial.
+
+    Parámetros:
+    - cache (CacheRespuestas, opcional): Caché en disco desde la que responder las peticiones `GET`. Si es `None`, no se usa caché.
+    - limitador (LimitadorAdaptativo, opcional): Limitador de ritmo y concurrencia por host. Si es `None`, no se limita.
+    - reintentos (int, opcional): Número máximo de reintentos ante errores de conexión, timeouts o códigos 429/5xx. Por defecto es 0.
+    - backoff (float, opcional): Espera base en segundos del backoff exponencial. Por defecto es 0.5.
+    - backoff_maximo (float, opcional): Espera máxima en segundos entre reintentos, también para `Retry-After`. Por defecto es 60.
+    - timeout (float, opcional): Timeout en segundos de cada petición si no se indica otro. Por defecto no hay timeout.
+
+    Notas:
+    - En modo offline, una petición que no está en caché devuelve una respuesta con código 504 sin acceder a la red,
+      de forma que las funciones de extracción la traten como cualquier otra petición fallida.
+    - Los aciertos de caché no consumen ritmo del limitador.
+    - Entre reintentos se espera lo que indique la cabecera `Retry-After` o, si no la hay, un tiempo aleatorio entre 0 y
+      `backoff * 2 ** intento` ("full jitter"), para que los hilos no reintenten todos a la vez.
+    - Si tras agotar los reintentos la respuesta sigue siendo un error, se muestra un aviso y se devuelve esa respuesta;
+      si el error es de conexión, se propaga la excepción.
+    - Cada petición se registra en `METRICAS` (número por endpoint, código y origen, bytes y duración).
+    """
+
+    def __init__(self, cache=None, limitador=None, reintentos=0, backoff=0.5, backoff_maximo=60, timeout=None):
+        super().__init__()
+        self.cache = cache
+        self.limitador = limitador
+        self.reintentos = reintentos
+        self.backoff = backoff
+        self.backoff_maximo = backoff_maximo
+        self.timeout = timeout
+        self.reintentos_realizados = 0
+        self._bloqueo = threading.Lock()
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            response = self._request_cacheado(method, url, params=params, headers=headers, **kwargs)
+        except requests.RequestException:
+            METRICAS.registrar_peticion(url, None, time.perf_counter() - inicio)
+            raise
+        num_bytes = int(response.headers.get("Content-Length", 0)) if kwargs.get("stream") else None
+        METRICAS.registrar_peticion(url, response, time.perf_counter() - inicio, num_bytes)
+        return response
+
+    def _request_cacheado(self, method, url, params=None, headers=None, **kwargs):
+        if self.cache is None or method.upper() != "GET":
+            return self._request_con_reintentos(method, url, params=params, headers=headers, **kwargs)
+
+        url_completa = requests.Request(method, url, params=params).prepare().url
+        clave = self.cache.clave(method, url_completa, headers)
+        response = self.cache.obtener(clave)
+        if response is not None:
+            return response
+
+        if self.cache.offline:
+            response = requests.Response()
+            response.status_code = 504
+            response.reason = "Not cached (offline)"
+            response.url = url_completa
+            response._content = b""
+            response.from_cache = False
+            return response
+
+        response = self._request_con_reintentos(method, url, params=params, headers=headers, **kwargs)
+        self.cache.guardar(clave, response)
+        response.from_cache = False
+        return response
+
+    def estadisticas(self):
+        """
+        Devuelve los contadores de la sesión.
+
+        Retorna:
+        - dict: "reintentos" realizados, "hosts" con el estado del limitador y "cache" con los contadores de la caché
+          (vacíos si no se usan).
+        """
+        return {
+            "reintentos": self.reintentos_realizados,
+            "hosts": self.limitador.estadisticas() if self.limitador is not None else {},
+            "cache": self.cache.estadisticas() if self.cache is not None else {},
+        }
+
+    def _request_con_reintentos(self, method, url, **kwargs):
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        intento = 0
+        while True:
+            if self.limitador is not None:
+                self.limitador.adquirir(host)
+            error = None
+            response = None
+            estrangulada = False
+            espera = None
+            try:
+                response = super().request(method, url, **kwargs)
+                estrangulada = response.status_code in CODIGOS_ESTRANGULAMIENTO
+                espera = _segundos_retry_after(response)
+                if espera is not None:
+                    espera = min(espera, self.backoff_maximo)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            finally:
+                # La petición se libera siempre, también con las excepciones que no se reintentan (redirecciones,
+                # codificación, interrupciones...), que se propagan sin contar como estrangulamiento ni timeout. Si no,
+                # cada una dejaría ocupado para siempre un hueco de concurrencia del host.
+                if self.limitador is not None:
+                    self.limitador.liberar(host, estrangulada=estrangulada, espera=espera, timeout=isinstance(error, requests.Timeout))
+
+            reintentable = error is not None or response.status_code in CODIGOS_REINTENTO
+            if not reintentable:
+                return response
+            if intento >= self.reintentos:
+                if self.reintentos:
+                    motivo = error if error is not None else f"código {response.status_code}"
+                    print(f"Petición fallida tras {intento} reintentos: {url} ({motivo})")
+                if error is not None:
+                    raise error
+                return response
+
+            if espera is None:
+                espera = random.uniform(0, min(self.backoff_maximo, self.backoff * 2 ** intento))
+            if response is not None:
+                response.close()
+            intento += 1
+            with self._bloqueo:
+                self.reintentos_realizados += 1
+            time.sleep(espera)
+
+
+def _segundos_retry_after(response):
+    """
+    Interpreta la cabecera `Retry-After` (segundos o fecha HTTP) de una respuesta.
+
+    Retorna:
+    - float o None: Segundos a esperar, o `None` si la cabecera no existe o no es válida.
+    """
+    valor = response.headers.get("Retry-After")
+    if valor is None:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return max(0.0, (fecha - datetime.now(timezone.utc)).total_seconds())
+
+
+def crear_sesion(max_conexiones=10, cache=None, peticiones_por_segundo=10.0, reintentos=5, timeout=30):
+    """
+    Crea una sesión HTTP compartida con un pool de conexiones reutilizables, limitación de ritmo y reintentos.
+
+    Parámetros:
+    - max_conexiones (int, opcional): Número máximo de conexiones abiertas por host. Debe ser al menos igual a la
+      concurrencia con la que se vaya a usar la sesión para que ninguna petición espere por una conexión libre. También es
+      la concurrencia máxima por host del limitador. Por defecto es 10.
+    - cache (CacheRespuestas, opcional): Caché en disco desde la que responder las peticiones `GET`. Por defecto no se usa caché.
+    - peticiones_por_segundo (float, opcional): Ritmo inicial por host del `LimitadorAdaptativo`, que después se ajusta
+      según las respuestas del servidor. Si es `None`, no se limita el ritmo. Por defecto es 10.
+    - reintentos (int, opcional): Reintentos ante errores de conexión, timeouts o códigos 429/5xx. Por defecto es 5.
+    - timeout (float, opcional): Timeout en segundos de cada petición. Por defecto es 30.
+
+    Retorna:
+    - SesionHTTP: Sesión con adaptadores HTTP y HTTPS configurados para reutilizar las conexiones (keep-alive).
+
+    Notas:
+    - Reutilizar la misma sesión evita repetir el handshake TCP/TLS en cada petición a la API de Ergast.
+    - La sesión puede compartirse entre los hilos de un `ThreadPoolExecutor` para peticiones `GET`; el limitador es común
+      a todos ellos, así que el ritmo total por host no depende del número de hilos.
+    """
+    limitador = None
+    if peticiones_por_segundo is not None:
+        limitador = LimitadorAdaptativo(peticiones_por_segundo=peticiones_por_segundo, concurrencia=max_conexiones)
+    sesion = SesionHTTP(cache=cache, limitador=limitador, reintentos=reintentos, timeout=timeout)
+    adaptador = HTTPAdapter(pool_connections=max_conexiones, pool_maxsize=max_conexiones)
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    return sesion
+
+
+def sesion_compartida():
+    """
+    Devuelve la sesión HTTP por defecto del proyecto, creándola con `crear_sesion` la primera vez que se pide.
+
+    Retorna:
+    - SesionHTTP: La misma sesión en todas las llamadas.
+
+    Notas:
+    - La usan las funciones de extracción a las que no se les pasa una sesión, para que todas las peticiones salientes
+      compartan el limitador de ritmo y los reintentos.
+    """
+    global _SESION_COMPARTIDA
+    with _BLOQUEO_SESION_COMPARTIDA:
+        if _SESION_COMPARTIDA is None:
+            _SESION_COMPARTIDA = crear_sesion()
+        return _SESION_COMPARTIDA
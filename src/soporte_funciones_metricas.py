@@ -0,0 +1,318 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+PATRON_SEGMENTO_NUMERICO = re.compile(r"^\d+$")
+SEGMENTOS_CON_IDENTIFICADOR = {"drivers", "constructors", "circuits", "status", "wiki"}
+
+
+class RegistroMetricas:
+    """
+    Registro de métricas del pipeline: tiempos por etapa, contadores y observaciones con etiquetas.
+
+    Parámetros:
+    - perfilar (iterable o bool, opcional): Etapas que se perfilan con `cProfile` cada vez que se ejecutan, o `True` para
+      perfilar todas. Por defecto no se perfila ninguna.
+    - directorio_perfiles (str, opcional): Si se indica, cada perfil se guarda además en `<directorio>/<etapa>.prof`
+      para abrirlo con `pstats` o `snakeviz`.
+
+    Atributos:
+    - perfiles (dict): Estadísticas `pstats.Stats` acumuladas por etapa perfilada.
+
+    Notas:
+    - Es seguro usarlo desde varios hilos. Las etapas que se ejecutan en paralelo suman su tiempo, por lo que el total de
+      una etapa puede superar el tiempo real transcurrido.
+    - `cProfile` solo perfila el hilo que entra en la etapa y no admite dos perfiles a la vez: si otra etapa ya se está
+      perfilando, la nueva se mide pero no se perfila.
+    """
+
+    def __init__(self, perfilar=None, directorio_perfiles=None):
+        self.perfilar = perfilar
+        self.directorio_perfiles = directorio_perfiles
+        self.perfiles = {}
+        self._bloqueo = threading.Lock()
+        self._perfil_activo = False
+        self.reiniciar()
+
+    def reiniciar(self):
+        """
+        Borra todas las métricas y perfiles registrados.
+        """
+        with self._bloqueo:
+            self._etapas = {}
+            self._contadores = {}
+            self._observaciones = {}
+            self.perfiles = {}
+
+    @contextmanager
+    def etapa(self, nombre):
+        """
+        Mide el tiempo de un bloque `with` como una ejecución de la etapa `nombre`.
+
+        Parámetros:
+        - nombre (str): Nombre de la etapa, por ejemplo "historicos.descarga".
+
+        Notas:
+        - Si la etapa está en `perfilar`, el bloque se ejecuta bajo `cProfile`.
+        """
+        perfil = self._iniciar_perfil(nombre)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            if perfil is not None:
+                self._guardar_perfil(nombre, perfil)
+            with self._bloqueo:
+                etapa = self._etapas.setdefault(nombre, {"llamadas": 0, "segundos": 0.0, "maximo": 0.0})
+                etapa["llamadas"] += 1
+                etapa["segundos"] += segundos
+                etapa["maximo"] = max(etapa["maximo"], segundos)
+
+    def contar(self, nombre, valor=1, **etiquetas):
+        """
+        Suma `valor` al contador `nombre` con las etiquetas indicadas.
+
+        Parámetros:
+        - nombre (str): Nombre del contador, por ejemplo "http_peticiones".
+        - valor (int o float, opcional): Cantidad a sumar. Por defecto es 1.
+        - **etiquetas: Etiquetas del contador, por ejemplo `endpoint=...` y `codigo=200`.
+        """
+        clave = (nombre, _etiquetas_ordenadas(etiquetas))
+        with self._bloqueo:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def observar(self, nombre, valor, **etiquetas):
+        """
+        Registra una observación (por ejemplo, una duración) de la métrica `nombre`.
+
+        Parámetros:
+        - nombre (str): Nombre de la métrica, por ejemplo "http_segundos".
+        - valor (float): Valor observado.
+        - **etiquetas: Etiquetas de la métrica.
+
+        Notas:
+        - De cada métrica se guarda el número de observaciones, su suma y su máximo.
+        """
+        clave = (nombre, _etiquetas_ordenadas(etiquetas))
+        with self._bloqueo:
+            observacion = self._observaciones.setdefault(clave, {"cantidad": 0, "suma": 0.0, "maximo": 0.0})
+            observacion["cantidad"] += 1
+            observacion["suma"] += valor
+            observacion["maximo"] = max(observacion["maximo"], valor)
+
+    def registrar_peticion(self, url, response, segundos, num_bytes=None):
+        """
+        Registra una petición HTTP: número de peticiones por código y origen, bytes recibidos y duración por endpoint.
+
+        Parámetros:
+        - url (str): URL pedida.
+        - response (requests.Response o None): Respuesta recibida, o `None` si la petición lanzó una excepción.
+        - segundos (float): Duración total de la petición, incluidas las esperas del limitador y los reintentos.
+        - num_bytes (int, opcional): Bytes recibidos. Por defecto es la longitud del contenido de la respuesta.
+        """
+        endpoint = plantilla_endpoint(url)
+        if response is None:
+            self.contar("http_peticiones", endpoint=endpoint, codigo="error", cache="no")
+        else:
+            desde_cache = "si" if getattr(response, "from_cache", False) else "no"
+            self.contar("http_peticiones", endpoint=endpoint, codigo=response.status_code, cache=desde_cache)
+            self.contar("http_bytes", len(response.content) if num_bytes is None else num_bytes, endpoint=endpoint)
+        self.observar("http_segundos", segundos, endpoint=endpoint)
+
+    def registrar_consulta(self, sentencia, segundos):
+        """
+        Registra el tiempo de una sentencia SQL, agrupado por su tipo (`INSERT`, `COPY`, `CREATE`...).
+
+        Parámetros:
+        - sentencia (str o bytes): Sentencia ejecutada.
+        - segundos (float): Tiempo que ha tardado `cursor.execute` (o `copy_expert`).
+        """
+        if isinstance(sentencia, bytes):
+            sentencia = sentencia.decode("utf-8", errors="replace")
+        tipo = str(sentencia).strip().split(None, 1)[0].upper() if str(sentencia).strip() else "VACIA"
+        self.observar("bbdd_execute_segundos", segundos, sentencia=tipo)
+
+    def instantanea(self):
+        """
+        Devuelve una copia de todas las métricas.
+
+        Retorna:
+        - dict: Con las claves "etapas" ({nombre: {"llamadas", "segundos", "maximo"}}), "contadores" y "observaciones"
+          (listas de diccionarios con "nombre", "etiquetas" y sus valores).
+        """
+        with self._bloqueo:
+            return {
+                "etapas": {nombre: dict(valores) for nombre, valores in self._etapas.items()},
+                "contadores": [
+                    {"nombre": nombre, "etiquetas": dict(etiquetas), "valor": valor}
+                    for (nombre, etiquetas), valor in self._contadores.items()
+                ],
+                "observaciones": [
+                    {"nombre": nombre, "etiquetas": dict(etiquetas), **valores}
+                    for (nombre, etiquetas), valores in self._observaciones.items()
+                ],
+            }
+
+    def exportar_json(self, ruta=None):
+        """
+        Exporta las métricas en JSON.
+
+        Parámetros:
+        - ruta (str, opcional): Fichero en el que guardarlas. Si no se indica, solo se devuelven.
+
+        Retorna:
+        - str: Métricas en formato JSON.
+        """
+        texto = json.dumps(self.instantanea(), indent=2, ensure_ascii=False, default=str)
+        if ruta is not None:
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(texto)
+        return texto
+
+    def exportar_prometheus(self, ruta=None, prefijo="proyecto5"):
+        """
+        Exporta las métricas en el formato de texto de Prometheus.
+
+        Parámetros:
+        - ruta (str, opcional): Fichero en el que guardarlas, por ejemplo el que lee el "textfile collector" de
+          `node_exporter`. Si no se indica, solo se devuelven.
+        - prefijo (str, opcional): Prefijo de los nombres de las métricas. Por defecto es "proyecto5".
+
+        Retorna:
+        - str: Métricas en formato Prometheus.
+
+        Notas:
+        - Las etapas se exportan como `<prefijo>_etapa_segundos_total`, `<prefijo>_etapa_llamadas_total` y
+          `<prefijo>_etapa_segundos_max` con la etiqueta `etapa`; los contadores como `<prefijo>_<nombre>_total` y las
+          observaciones como `<prefijo>_<nombre>_sum`, `_count` y `_max`.
+        """
+        datos = self.instantanea()
+        lineas = []
+
+        def serie(nombre, tipo, muestras):
+            lineas.append(f"# TYPE {prefijo}_{nombre} {tipo}")
+            for etiquetas, valor in muestras:
+                lineas.append(f"{prefijo}_{nombre}{_formatear_etiquetas(etiquetas)} {valor}")
+
+        etapas = datos["etapas"].items()
+        if etapas:
+            serie("etapa_segundos_total", "counter", [({"etapa": nombre}, valores["segundos"]) for nombre, valores in etapas])
+            serie("etapa_llamadas_total", "counter", [({"etapa": nombre}, valores["llamadas"]) for nombre, valores in etapas])
+            serie("etapa_segundos_max", "gauge", [({"etapa": nombre}, valores["maximo"]) for nombre, valores in etapas])
+
+        for nombre in dict.fromkeys(contador["nombre"] for contador in datos["contadores"]):
+            serie(f"{nombre}_total", "counter", [(c["etiquetas"], c["valor"]) for c in datos["contadores"] if c["nombre"] == nombre])
+
+        for nombre in dict.fromkeys(observacion["nombre"] for observacion in datos["observaciones"]):
+            observaciones = [o for o in datos["observaciones"] if o["nombre"] == nombre]
+            lineas.append(f"# TYPE {prefijo}_{nombre} summary")
+            for o in observaciones:
+                etiquetas = _formatear_etiquetas(o["etiquetas"])
+                lineas.append(f"{prefijo}_{nombre}_sum{etiquetas} {o['suma']}")
+                lineas.append(f"{prefijo}_{nombre}_count{etiquetas} {o['cantidad']}")
+            serie(f"{nombre}_max", "gauge", [(o["etiquetas"], o["maximo"]) for o in observaciones])
+
+        texto = "\n".join(lineas) + "\n"
+        if ruta is not None:
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(texto)
+        return texto
+
+    def informe_perfil(self, nombre, lineas=20, orden="cumulative"):
+        """
+        Devuelve el resumen de `pstats` de una etapa perfilada.
+
+        Parámetros:
+        - nombre (str): Nombre de la etapa.
+        - lineas (int, opcional): Número de funciones a mostrar. Por defecto es 20.
+        - orden (str, opcional): Criterio de ordenación de `pstats`. Por defecto es "cumulative".
+
+        Retorna:
+        - str: Informe de texto, o cadena vacía si la etapa no se ha perfilado.
+        """
+        with self._bloqueo:
+            estadisticas = self.perfiles.get(nombre)
+            if estadisticas is None:
+                return ""
+            salida = io.StringIO()
+            estadisticas.stream = salida
+            estadisticas.sort_stats(orden).print_stats(lineas)
+        return salida.getvalue()
+
+    def _iniciar_perfil(self, nombre):
+        if not self.perfilar or (self.perfilar is not True and nombre not in self.perfilar):
+            return None
+        with self._bloqueo:
+            if self._perfil_activo:
+                return None
+            self._perfil_activo = True
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            with self._bloqueo:
+                self._perfil_activo = False
+            return None
+        return perfil
+
+    def _guardar_perfil(self, nombre, perfil):
+        perfil.disable()
+        with self._bloqueo:
+            self._perfil_activo = False
+            if nombre in self.perfiles:
+                self.perfiles[nombre].add(perfil)
+            else:
+                self.perfiles[nombre] = pstats.Stats(perfil)
+            if self.directorio_perfiles is not None:
+                os.makedirs(self.directorio_perfiles, exist_ok=True)
+                self.perfiles[nombre].dump_stats(os.path.join(self.directorio_perfiles, f"{nombre}.prof"))
+
+
+def plantilla_endpoint(url):
+    """
+    Convierte una URL en la plantilla de su endpoint, para agrupar las métricas HTTP.
+
+    Parámetros:
+    - url (str): URL completa.
+
+    Retorna:
+    - str: Host y ruta con los años, números e identificadores sustituidos, por ejemplo
+      "ergast.com/api/f1/{n}/drivers/{id}/results.json". Los parámetros de la query se descartan.
+    """
+    partes = urlsplit(url)
+    segmentos = partes.path.split("/")
+    plantilla = []
+    for posicion, segmento in enumerate(segmentos):
+        if PATRON_SEGMENTO_NUMERICO.match(segmento):
+            plantilla.append("{n}")
+        elif posicion > 0 and segmentos[posicion - 1] in SEGMENTOS_CON_IDENTIFICADOR and segmento:
+            extension = os.path.splitext(segmento)[1]
+            plantilla.append("{id}" + extension if extension == ".json" else "{id}")
+        else:
+            plantilla.append(segmento)
+    return partes.netloc + "/".join(plantilla)
+
+
+def _etiquetas_ordenadas(etiquetas):
+    return tuple(sorted((clave, str(valor)) for clave, valor in etiquetas.items()))
+
+
+def _formatear_etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    pares = []
+    for clave, valor in etiquetas.items():
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pares.append(f'{clave}="{valor}"')
+    return "{" + ",".join(pares) + "}"
+
+
+METRICAS = RegistroMetricas()
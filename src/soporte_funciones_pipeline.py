@@ -0,0 +1,35 @@
+from . import soporte_funciones_creacion_bbdd as sfcb
+from . import soporte_funciones_extraccion as sfe
+
+
+def ejecutar_pipeline_historicos(pilotos, pilotos_historicos, database_name=None, max_concurrencia=8, sesion=None, cache_clasificaciones=None, tamano_bloque=20, tamano_lote=200, refrescar=True, **opciones_carga):
+    """
+    Extrae el rendimiento histórico de los pilotos y lo carga en `mejores_pilotos` en flujo, sin pasar por un CSV.
+
+    Parámetros:
+    - pilotos (list): Lista de identificadores de los pilotos (str) en la API de Ergast.
+    - pilotos_historicos (list): Nombres completos de los pilotos, como en `formatear_datos_historicos`.
+    - database_name (str, opcional): Nombre de la base de datos.
+    - max_concurrencia (int, opcional): Número máximo de peticiones simultáneas a la API. Por defecto es 8.
+    - sesion (requests.Session, opcional): Sesión HTTP a reutilizar.
+    - cache_clasificaciones (CacheClasificaciones, opcional): Caché de clasificaciones por temporada.
+    - tamano_bloque (int, opcional): (piloto, temporada) que se agregan juntas en la extracción, como en `iterar_historicos`.
+      Por defecto es 20.
+    - tamano_lote (int, opcional): Registros que se insertan y confirman juntos, como en `cargar_en_flujo`. Por defecto es 200.
+    - refrescar (bool, opcional): Si al terminar se refrescan las vistas materializadas de `mejores_pilotos`. Por defecto es True.
+    - **opciones_carga: Opciones de `insertar_datos` (`metodo`, `upsert`).
+
+    Retorna:
+    - dict: Estadísticas de la carga, las que devuelve `cargar_en_flujo`.
+
+    Notas:
+    - Las tres etapas (`iterar_historicos`, `normalizar_registros` y `cargar_en_flujo`) se encadenan como generadores: cada
+      (piloto, temporada) se emite en cuanto termina su descarga, se le pone el nombre completo y se inserta en el
+      siguiente lote, mientras siguen las descargas. Las primeras filas llegan a la base de datos tras el primer lote,
+      sin esperar a todo el histórico, y la memoria no crece con el número de temporadas.
+    - Equivale a `obtener_historicos` + `formatear_datos_historicos` + `cargar_tablas({"mejores_pilotos": df})`, pero la
+      tabla se rellena en el orden en que terminan las descargas.
+    """
+    registros = sfe.iterar_historicos(pilotos, max_concurrencia=max_concurrencia, sesion=sesion, cache_clasificaciones=cache_clasificaciones, tamano_bloque=tamano_bloque)
+    registros = sfe.normalizar_registros(registros, pilotos_historicos)
+    return sfcb.cargar_en_flujo(registros, "mejores_pilotos", database_name=database_name, tamano_lote=tamano_lote, refrescar=refrescar, **opciones_carga)
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from src.soporte_funciones_antecedentes import normalizar_nombre, resolver_antecedentes
+
+
+@pytest.fixture
+def df_historicas():
+    return pd.DataFrame(
+        [
+            ("Lotus(1958–1994)", "1958–1994"),
+            ("Lotus(2012–2015)", "2012–2015"),
+            ("Toleman", "1981–1985"),
+            ("Automobiles Gonfaronnaises Sportives(AGS)", "1986–1991"),
+            ("British American Racing", "1999–2005"),
+            ("March(1970–1982)", "1970–1982"),
+            ("March(1987–1992)", "1987–1992"),
+            ("Brawn GP", "2009"),
+        ],
+        columns=["nombre", "duracion"],
+    )
+
+
+def resolver(anteriores, df_historicas):
+    df_presente = pd.DataFrame({"nombre": ["Equipo"], "anteriores_equipos": [anteriores]})
+    return resolver_antecedentes(df_presente, df_historicas).set_index("antecedente")
+
+
+def test_coincidencia_completa_distingue_escuderias_homonimas(df_historicas):
+    fila = resolver("Lotus(2012–2015)", df_historicas).loc["Lotus(2012–2015)"]
+    assert fila["escuderia_historica"] == "Lotus(2012–2015)"
+    assert fila["metodo"] == "completa"
+    assert fila["similitud"] == 1.0
+
+
+def test_coincidencia_por_nombre(df_historicas):
+    fila = resolver("Toleman(1981–1985)", df_historicas).loc["Toleman(1981–1985)"]
+    assert fila["escuderia_historica"] == "Toleman"
+    assert fila["metodo"] == "nombre"
+    assert (fila["anio_inicio"], fila["anio_fin"]) == (1981, 1985)
+
+
+def test_coincidencia_por_alias(df_historicas):
+    fila = resolver("AGS(1986–1991)", df_historicas).loc["AGS(1986–1991)"]
+    assert fila["escuderia_historica"] == "Automobiles Gonfaronnaises Sportives(AGS)"
+    assert fila["metodo"] == "alias"
+
+
+def test_coincidencia_por_siglas(df_historicas):
+    fila = resolver("BAR(1999–2005)", df_historicas).loc["BAR(1999–2005)"]
+    assert fila["escuderia_historica"] == "British American Racing"
+    assert fila["metodo"] == "siglas"
+
+
+def test_clave_ambigua_se_resuelve_por_anios_en_comun(df_historicas):
+    df = resolver("March(1988–1989),March(1975–1977)", df_historicas)
+    assert df.loc["March(1988–1989)", "escuderia_historica"] == "March(1987–1992)"
+    assert df.loc["March(1975–1977)", "escuderia_historica"] == "March(1970–1982)"
+    assert set(df["metodo"]) == {"nombre"}
+
+
+def test_coincidencia_aproximada_por_prefijo(df_historicas):
+    fila = resolver("Brawn(2009)", df_historicas).loc["Brawn(2009)"]
+    assert fila["escuderia_historica"] == "Brawn GP"
+    assert fila["metodo"] == "aproximada"
+    assert fila["similitud"] < 1.0
+
+
+def test_antecedente_sin_escuderia(df_historicas):
+    fila = resolver("Xyzzy Racing(1990–1991)", df_historicas).loc["Xyzzy Racing(1990–1991)"]
+    assert fila["escuderia_historica"] is None
+    assert fila["metodo"] is None
+
+
+def test_texto_sin_antecedentes_no_genera_filas(df_historicas):
+    df_presente = pd.DataFrame({"nombre": ["Equipo", "Otro"], "anteriores_equipos": ["Sin equipos antecedentes", None]})
+    assert resolver_antecedentes(df_presente, df_historicas).empty
+
+
+def test_normalizar_nombre():
+    assert normalizar_nombre("Scuderia Toro Rosso (STR)") == "scuderia toro rosso str"
+    assert normalizar_nombre("Équipe Ligier") == "equipe ligier"
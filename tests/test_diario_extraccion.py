@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+
+from src.soporte_funciones_almacenamiento import DiarioExtraccion
+
+
+def registros(piloto, temporadas, puntos=0):
+    return [{"piloto": piloto, "temporada": temporada, "puntos": puntos} for temporada in temporadas]
+
+
+def truncar_ultima_linea(ruta, bytes_a_quitar=5):
+    with open(ruta, "rb+") as f:
+        f.seek(-bytes_a_quitar, os.SEEK_END)
+        f.truncate()
+
+
+def test_rota_de_fichero_y_se_continua_al_reabrir(tmp_path):
+    diario = DiarioExtraccion(tmp_path, registros_por_fichero=2)
+    assert diario.anadir(registros("alonso", [2005, 2006, 2007])) == 3
+    assert sorted(os.listdir(tmp_path)) == ["parte_00000.jsonl", "parte_00001.jsonl"]
+
+    diario = DiarioExtraccion(tmp_path, registros_por_fichero=2)
+    diario.anadir(registros("alonso", [2008, 2009]))
+    assert sorted(os.listdir(tmp_path)) == ["parte_00000.jsonl", "parte_00001.jsonl", "parte_00002.jsonl"]
+    assert diario.completadas() == {("alonso", temporada) for temporada in range(2005, 2010)}
+
+
+def test_linea_truncada_se_ignora_y_se_sigue_en_un_fichero_nuevo(tmp_path):
+    diario = DiarioExtraccion(tmp_path)
+    diario.anadir(registros("hamilton", [2007, 2008, 2009]))
+    ruta = tmp_path / "parte_00000.jsonl"
+    truncar_ultima_linea(ruta)
+
+    diario = DiarioExtraccion(tmp_path)
+    assert len(diario) == 2
+    assert diario.completadas() == {("hamilton", 2007), ("hamilton", 2008)}
+
+    diario.anadir(registros("hamilton", [2009, 2010]))
+    assert sorted(os.listdir(tmp_path)) == ["parte_00000.jsonl", "parte_00001.jsonl"]
+    # El fichero truncado no se toca: la línea rota no queda pegada a la siguiente.
+    assert not ruta.read_bytes().endswith(b"\n")
+    assert diario.completadas() == {("hamilton", temporada) for temporada in range(2007, 2011)}
+
+    df = diario.leer(columnas=["piloto", "temporada", "puntos"])
+    assert df["temporada"].tolist() == [2007, 2008, 2009, 2010]
+
+
+def test_leer_se_queda_el_ultimo_registro_de_cada_temporada(tmp_path):
+    diario = DiarioExtraccion(tmp_path, registros_por_fichero=2)
+    diario.anadir(registros("verstappen", [2023, 2024], puntos=100))
+    diario.anadir(registros("verstappen", [2024], puntos=np.int64(437)))
+
+    df = diario.leer()
+    assert len(df) == 2
+    assert df.set_index("temporada").loc[2024, "puntos"] == 437
+
+
+def test_limpiar(tmp_path):
+    diario = DiarioExtraccion(tmp_path, registros_por_fichero=1)
+    diario.anadir(registros("sainz", [2015, 2016]))
+    diario.limpiar()
+    assert len(diario) == 0
+    assert diario.leer(columnas=["piloto", "temporada"]).empty
+    diario.anadir(registros("sainz", [2017]))
+    assert os.listdir(tmp_path) == ["parte_00000.jsonl"]
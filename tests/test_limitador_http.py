@@ -0,0 +1,127 @@
+import time
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from src.soporte_funciones_http import LimitadorAdaptativo, SesionHTTP
+
+URL = "https://ergast.test/api/f1/2020/results.json"
+HOST = "ergast.test"
+
+
+class AdaptadorGuionado(BaseAdapter):
+    """
+    Adaptador que, en lugar de acceder a la red, devuelve en orden los pasos de un guion: un código HTTP, una tupla
+    (código, cabeceras) o una excepción que lanzar.
+    """
+
+    def __init__(self, guion):
+        super().__init__()
+        self.guion = list(guion)
+        self.peticiones = 0
+
+    def send(self, request, **kwargs):
+        self.peticiones += 1
+        paso = self.guion.pop(0)
+        if isinstance(paso, BaseException):
+            raise paso
+        status_code, cabeceras = paso if isinstance(paso, tuple) else (paso, {})
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(cabeceras)
+        response._content = b"{}"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def crear(guion, reintentos=0, **opciones_limitador):
+    limitador = LimitadorAdaptativo(**{"peticiones_por_segundo": 1000, "concurrencia": 8, **opciones_limitador})
+    sesion = SesionHTTP(limitador=limitador, reintentos=reintentos, backoff=0, backoff_maximo=0.05)
+    adaptador = AdaptadorGuionado(guion)
+    sesion.mount("https://", adaptador)
+    return sesion, limitador, adaptador
+
+
+def estado(limitador):
+    return limitador._hosts[HOST]
+
+
+@pytest.mark.parametrize("status_code", [429, 503])
+def test_estrangulamiento_reduce_el_ritmo_a_la_mitad(status_code):
+    sesion, limitador, _ = crear([status_code, status_code])
+    assert sesion.get(URL).status_code == status_code
+    assert estado(limitador)["tasa"] == 500
+    sesion.get(URL)
+    assert estado(limitador)["tasa"] == 250
+    assert estado(limitador)["estrangulamientos"] == 2
+    assert estado(limitador)["en_curso"] == 0
+    assert estado(limitador)["concurrencia"] == 8
+
+
+def test_respuestas_correctas_aumentan_el_ritmo():
+    sesion, limitador, _ = crear([200, 429, 200], peticiones_por_segundo=10)
+    sesion.get(URL)
+    # Antes del primer estrangulamiento crece de forma multiplicativa; después, de forma aditiva.
+    assert estado(limitador)["tasa"] == 10.5
+    sesion.get(URL)
+    assert estado(limitador)["tasa"] == 5.25
+    sesion.get(URL)
+    assert estado(limitador)["tasa"] == pytest.approx(5.25 + 1 / 5.25)
+
+
+def test_retry_after_pausa_el_host():
+    sesion, limitador, _ = crear([(503, {"Retry-After": "30"})])
+    sesion.get(URL)
+    # La espera se limita a `backoff_maximo` (0.05 s).
+    restante = estado(limitador)["pausa_hasta"] - time.monotonic()
+    assert 0 < restante <= 0.05
+
+    inicio = time.monotonic()
+    limitador.adquirir(HOST)
+    assert time.monotonic() - inicio >= restante * 0.9
+    limitador.liberar(HOST)
+
+
+def test_retry_after_se_respeta_al_reintentar():
+    sesion, limitador, adaptador = crear([(429, {"Retry-After": "0.05"}), 200], reintentos=2)
+    inicio = time.monotonic()
+    assert sesion.get(URL).status_code == 200
+    assert time.monotonic() - inicio >= 0.045
+    assert adaptador.peticiones == 2
+    assert sesion.reintentos_realizados == 1
+    assert estado(limitador)["en_curso"] == 0
+
+
+def test_timeout_reduce_ritmo_y_concurrencia_y_libera_el_hueco():
+    sesion, limitador, _ = crear([requests.Timeout("lento")])
+    with pytest.raises(requests.Timeout):
+        sesion.get(URL)
+    assert estado(limitador)["en_curso"] == 0
+    assert estado(limitador)["tasa"] == 500
+    assert estado(limitador)["concurrencia"] == 4
+
+
+def test_error_de_conexion_se_reintenta_y_libera_el_hueco():
+    sesion, limitador, adaptador = crear([requests.ConnectionError("caída"), 200], reintentos=1)
+    assert sesion.get(URL).status_code == 200
+    assert adaptador.peticiones == 2
+    assert estado(limitador)["en_curso"] == 0
+
+
+@pytest.mark.parametrize("excepcion", [requests.TooManyRedirects("bucle"), KeyboardInterrupt()])
+def test_excepcion_no_reintentable_libera_el_hueco(excepcion):
+    sesion, limitador, adaptador = crear([excepcion, excepcion], reintentos=3, concurrencia=1)
+    with pytest.raises(type(excepcion)):
+        sesion.get(URL)
+    assert adaptador.peticiones == 1
+    assert estado(limitador)["en_curso"] == 0
+    assert estado(limitador)["estrangulamientos"] == 0
+    # Con concurrencia 1, si el hueco no se hubiera liberado la siguiente petición esperaría para siempre.
+    with pytest.raises(type(excepcion)):
+        sesion.get(URL)